@@ -1,38 +1,58 @@
+import os
+import sqlite3
 from PyQt6.QtCore import QObject, pyqtSlot, QThread, pyqtSignal
 from utils.data_generator import generate_demo_data
+from utils.data_io import read_instance, write_instance
 from models.optimization_model import PricingModel
+from models.regret import choice_from_results, regret_matrix, regret_frame
+from models.run_store import RunStore
+from utils.profiling import tracer
+
+DATA_FILE_FILTER = "Data Files (*.csv *.parquet);;CSV (*.csv);;Parquet (*.parquet)"
+REGRET_FILE_FILTER = "CSV (*.csv);;Parquet (*.parquet)"
+# Runs shown in the History chart
+HISTORY_RUNS = 500
 
 class OptimizationWorker(QThread):
     finished = pyqtSignal(object) # Returns results dict or None
     error = pyqtSignal(str)
 
-    def __init__(self, model, plans, segments, capacity):
+    def __init__(self, model, plans, segments, capacity, flow_id=None, options=None):
         super().__init__()
         self.model = model
         self.plans = plans
         self.segments = segments
         self.capacity = capacity
+        self.options = options or {} # Extra build_and_solve arguments
+        self.flow_id = flow_id # Trace flow linking the UI thread and this worker
 
     def run(self):
-        try:
-            results = self.model.build_and_solve(self.plans, self.segments, self.capacity)
-            if results:
-                self.finished.emit(results)
-            else:
-                self.error.emit("Optimization failed to find a solution (or Gurobi missing).")
-        except Exception as e:
-            self.error.emit(str(e))
+        tracer.name_thread("OptimizationWorker")
+        with tracer.span("OptimizationWorker.run"):
+            tracer.flow_step("optimization", self.flow_id)
+            try:
+                results = self.model.build_and_solve(self.plans, self.segments, self.capacity, **self.options)
+                if results:
+                    self.finished.emit(results)
+                else:
+                    self.error.emit("Optimization failed to find a solution (or Gurobi missing).")
+            except Exception as e:
+                self.error.emit(str(e))
 
 class AppController(QObject):
-    def __init__(self):
+    def __init__(self, run_store=None):
         super().__init__()
         self.model = PricingModel()
         self.view = None # Set later
+        self._run_store = run_store # History of all runs, opened on first use (see run_store)
+        self.solve_options = {'cannibalization_margin': 5.0}
         
         # Data State
         self.plans = []
         self.segments = []
         self.capacity = 0.0
+        self.instance = None # Array form of the last optimized data, used for what-if analysis
+        self.regret = None # Counterfactual regret matrix of the last optimization
 
     def set_view(self, main_window):
         self.view = main_window
@@ -41,17 +61,57 @@ class AppController(QObject):
             self.view.update_status("Ready. Gurobi Solver detected.")
         else:
             self.view.update_status("Warning: Gurobi not found. Optimization will fail.")
+        self.refresh_history()
+
+    @property
+    def run_store(self):
+        """The run history; RunStore.from_env() is opened on first use, so no file is created before a run is saved."""
+        if self._run_store is None:
+            self._run_store = RunStore.from_env()
+        return self._run_store
+
+    def refresh_history(self):
+        if self._run_store is None and not os.path.exists(RunStore.env_path()):
+            return # No run saved yet
+        runs = self.run_store.runs(limit=HISTORY_RUNS)
+        self.view.charts_tab.plot_history(runs, self.run_store.plan_table('price', runs.index))
 
     def load_demo_data(self):
         self.plans, self.segments, self.capacity = generate_demo_data()
         self.view.input_tab.load_data(self.plans, self.segments, self.capacity)
         self.view.show_info("Demo data loaded! Click 'Run Optimization'.")
 
+    def import_data(self):
+        path = self.view.ask_open_path("Import Demand Matrix", DATA_FILE_FILTER)
+        if not path:
+            return
+        # Current plans are used when the file has no sibling '<name>_plans' file
+        plans, _, capacity = self.view.input_tab.get_data()
+        try:
+            instance = read_instance(path, plans=plans, capacity=capacity)
+        except (OSError, ValueError, ImportError) as e:
+            self.view.show_error(f"Import failed: {e}")
+            return
+        self.view.input_tab.load_instance(instance)
+        self.view.update_status(f"Imported {instance.n_segments} segments x {instance.n_plans} plans.")
+
+    def export_data(self):
+        path = self.view.ask_save_path("Export Demand Matrix", DATA_FILE_FILTER)
+        if not path:
+            return
+        try:
+            write_instance(self.view.input_tab.get_instance(), path)
+        except (OSError, ValueError, ImportError) as e:
+            self.view.show_error(f"Export failed: {e}")
+            return
+        self.view.update_status(f"Exported data to {path}.")
+
     def run_optimization(self):
-        # Scrape data from View (SOURCE OF TRUTH)
+        # Read data from the Input tab's table models (SOURCE OF TRUTH)
         # We no longer rely on self.plans/self.segments being up to date from load_demo_data
         # because user might have edited them.
-        self.plans, self.segments, self.capacity = self.view.input_tab.get_data()
+        self.instance = self.view.input_tab.get_instance()
+        self.plans, self.segments, self.capacity = self.instance.to_dicts()
 
         if not self.plans:
             self.view.show_error("No valid plan data found. Please add plans.")
@@ -59,22 +119,53 @@ class AppController(QObject):
 
         self.view.update_status("Optimizing... please wait.")
         
-        self.worker = OptimizationWorker(self.model, self.plans, self.segments, self.capacity)
+        with tracer.span("AppController.run_optimization"):
+            flow_id = tracer.flow_start("optimization")
+        self.worker = OptimizationWorker(self.model, self.plans, self.segments, self.capacity, flow_id,
+                                         self.solve_options)
         self.worker.finished.connect(self.on_optimization_finished)
         self.worker.error.connect(self.on_optimization_error)
         self.worker.start()
 
     @pyqtSlot(object)
     def on_optimization_finished(self, results):
-        self.view.update_status("Optimization Complete.")
-        
-        # Update Results Tab
-        self.view.results_tab.display_results(results, self.plans)
-        
-        # Update Charts Tab
-        self.view.charts_tab.plot_results(results)
-        
-        self.view.tabs.setCurrentIndex(1) # Switch to results tab
+        with tracer.span("AppController.on_optimization_finished"):
+            tracer.flow_end("optimization", self.worker.flow_id)
+            self.view.update_status("Optimization Complete.")
+            
+            # Update Results Tab
+            self.view.results_tab.display_results(results, self.plans)
+            
+            # Update Charts Tab
+            self.view.charts_tab.plot_results(results)
+            self.view.charts_tab.set_what_if(self.instance, results['prices'])
+            self.regret = regret_matrix(self.instance, results['prices'], choice_from_results(self.instance, results))
+            self.view.charts_tab.plot_regret(self.instance, self.regret)
+
+            try:
+                self.run_store.save_run(self.instance, results, self.solve_options, self.model.last_telemetry)
+                self.refresh_history()
+            except sqlite3.Error as e:
+                self.view.update_status(f"Optimization Complete. Run not saved: {e}")
+            
+            self.view.tabs.setCurrentIndex(1) # Switch to results tab
+
+    def export_regret(self):
+        if self.regret is None:
+            return
+        path = self.view.ask_save_path("Export Counterfactual Regret", REGRET_FILE_FILTER)
+        if not path:
+            return
+        frame = regret_frame(self.instance, self.regret)
+        try:
+            if path.lower().endswith(".parquet"):
+                frame.to_parquet(path, index=False)
+            else:
+                frame.to_csv(path, index=False)
+        except (OSError, ValueError, ImportError) as e:
+            self.view.show_error(f"Export failed: {e}")
+            return
+        self.view.update_status(f"Exported regret of {len(frame):,} (segment, plan) pairs to {path}.")
 
     @pyqtSlot(str)
     def on_optimization_error(self, err_msg):
@@ -0,0 +1,350 @@
+"""
+Local HTTP/JSON pricing service (asyncio, standard library only).
+
+    POST /solve    {"plans": [..], "segments": [..], "capacity": .., "cannibalization_margin": 5.0,
+                    "params": {..}, "time_budget": 30}
+                   -> 200 {"results": {..}, "coalesced": false, "queue_time": .., "solve_time": ..}
+                      422 no solution, 503 queue full, 504 budget spent waiting (queue or shared solve)
+    GET  /health   -> {"status": "ok", "workers": .., "active": .., "capacity": ..}
+    GET  /metrics  -> request, solve and rejection counters
+
+Solves run in a bounded pool of worker processes (one Gurobi environment each,
+sized by license seats and cores). Identical requests that arrive while the
+same problem is being solved share its result instead of solving it again. Each
+keeps its own time budget: the solver runs with the first request's budget, and a
+joining request whose budget ends first gets 504. When every worker is busy and the
+queue holds max_queue solves, new problems are rejected with 503 and Retry-After.
+The time budget covers queueing and solving: the solver gets what is left of it
+and returns its best solution so far (status 'TimeLimit') when it runs out.
+
+Results are JSON-encoded with utils.serialization ((plan, segment) keys become
+{"__tuple_keys__": [...]}); use utils.serialization.from_jsonable to restore them.
+
+Usage:
+    python -m controllers.pricing_service [--port 8080] [--workers N] [--seats N] [--max-queue 16]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from models.optimization_model import PricingModel
+from utils.serialization import to_jsonable
+
+DEFAULT_PORT = 8080
+DEFAULT_BUDGET = 30.0
+MAX_BODY = 64 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 422: "Unprocessable Entity", 503: "Service Unavailable",
+               504: "Gateway Timeout"}
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceError(Exception):
+    """An error answered with an HTTP status."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _solve_request(problem, deadline, threads):
+    """Worker-process entry point: solve with what is left of the time budget."""
+    start = time.time()
+    remaining = deadline - start
+    if remaining <= 0:
+        return {'status': 'BudgetExceeded', 'started': start, 'finished': start}
+    params = dict(problem.get('params') or {})
+    if threads:
+        params.setdefault('Threads', threads)
+    results = PricingModel().build_and_solve(problem['plans'], problem['segments'], problem['capacity'],
+                                             problem.get('cannibalization_margin', 5.0), verbose=False,
+                                             params=params, time_limit=remaining)
+    return {'status': 'Solved' if results else 'NoSolution', 'results': to_jsonable(results),
+            'started': start, 'finished': time.time()}
+
+
+def request_key(problem):
+    """Canonical hash of a problem, so identical requests can share one solve."""
+    canonical = json.dumps({k: problem.get(k) for k in ('plans', 'segments', 'capacity',
+                                                        'cannibalization_margin', 'params')},
+                           sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PricingService:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, workers=None, license_seats=None, max_queue=16,
+                 default_budget=DEFAULT_BUDGET, max_budget=600.0):
+        """
+        Args:
+            host, port (str, int): Listen address (port 0 picks a free port).
+            workers (int): Solver processes (default: cores, capped by license_seats).
+            license_seats (int): Concurrent Gurobi solves the license allows (None = no cap).
+            max_queue (int): Solves waiting for a worker before requests are rejected.
+            default_budget, max_budget (float): Time budget per request in seconds.
+        """
+        cores = os.cpu_count() or 1
+        self.workers = workers or cores
+        if license_seats:
+            self.workers = min(self.workers, license_seats)
+        # Share the cores between concurrent solves instead of oversubscribing them
+        self.threads = max(1, cores // self.workers)
+        self.host, self.port = host, port
+        self.max_queue = max_queue
+        self.default_budget = default_budget
+        self.max_budget = max_budget
+
+        self.executor = None
+        self.server = None
+        self._inflight = {}  # request key -> asyncio.Future of the worker reply
+        self._active = 0     # distinct solves queued or running
+        self.counters = {'requests': 0, 'solves': 0, 'coalesced': 0, 'rejected': 0,
+                         'timeouts': 0, 'errors': 0}
+
+    @property
+    def capacity(self):
+        return self.workers + self.max_queue
+
+    async def start(self):
+        # 'spawn' gives each worker a clean process with its own Gurobi environment
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"Pricing service on {self.host}:{self.port} with {self.workers} workers")
+        return self.port
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            # Waiting for the workers blocks, so it runs off the event loop
+            await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    # --- Solving ---
+
+    async def solve(self, problem):
+        """
+        Solve a problem dict, sharing the solve with identical in-flight requests.
+
+        Returns:
+            dict: Response body ('results', 'coalesced', 'queue_time', 'solve_time').
+
+        Raises:
+            ServiceError: 400 invalid request, 503 queue full, 504 budget spent, 422 no solution.
+        """
+        for field in ('plans', 'segments', 'capacity'):
+            if field not in problem:
+                raise ServiceError(400, f"missing field '{field}'")
+        try:
+            budget = float(problem.get('time_budget', self.default_budget))
+        except (TypeError, ValueError):
+            raise ServiceError(400, "time_budget must be a number")
+        if not 0 < budget <= self.max_budget:
+            raise ServiceError(400, f"time_budget must be in (0, {self.max_budget}]")
+
+        received = time.time()
+        key = request_key(problem)
+        future = self._inflight.get(key)
+        coalesced = future is not None
+        if coalesced:
+            self.counters['coalesced'] += 1
+        else:
+            if self._active >= self.capacity:
+                self.counters['rejected'] += 1
+                raise ServiceError(503, "solver queue is full", {'Retry-After': '1'})
+            loop = asyncio.get_running_loop()
+            self._active += 1
+            self.counters['solves'] += 1
+            future = loop.run_in_executor(self.executor, _solve_request, problem, received + budget, self.threads)
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._finish(key))
+
+        # Shielded, so a client that disconnects (or times out) does not cancel the shared solve
+        if coalesced:
+            # The shared solve runs with the first request's budget; this one waits at most its own
+            try:
+                reply = await asyncio.wait_for(asyncio.shield(future), received + budget - time.time())
+            except asyncio.TimeoutError:
+                self.counters['timeouts'] += 1
+                raise ServiceError(504, "time budget spent waiting for a shared solve")
+        else:
+            reply = await asyncio.shield(future)
+        if reply['status'] == 'BudgetExceeded':
+            self.counters['timeouts'] += 1
+            raise ServiceError(504, "time budget spent waiting for a solver")
+        if reply['status'] == 'NoSolution':
+            raise ServiceError(422, "no feasible solution found")
+        return {
+            'results': reply['results'],
+            'coalesced': coalesced,
+            'queue_time': max(reply['started'] - received, 0.0),
+            'solve_time': reply['finished'] - reply['started'],
+        }
+
+    def _finish(self, key):
+        self._active -= 1
+        self._inflight.pop(key, None)
+
+    def health(self):
+        return {'status': 'ok', 'workers': self.workers, 'active': self._active, 'capacity': self.capacity}
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra = await self._route(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                _write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ServiceError as e:
+            _write_response(writer, e.status, {'error': str(e)}, e.headers, False)
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        self.counters['requests'] += 1
+        try:
+            if path == '/solve':
+                if method != 'POST':
+                    raise ServiceError(405, "use POST")
+                try:
+                    problem = json.loads(body or b'{}')
+                except ValueError:
+                    raise ServiceError(400, "body is not valid JSON")
+                if not isinstance(problem, dict):
+                    raise ServiceError(400, "body must be a JSON object")
+                return 200, await self.solve(problem), {}
+            if path == '/health':
+                return 200, self.health(), {}
+            if path == '/metrics':
+                return 200, dict(self.counters, **self.health()), {}
+            raise ServiceError(404, f"no route {path}")
+        except ServiceError as e:
+            return e.status, {'error': str(e)}, e.headers
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.exception("Request failed")
+            return 500, {'error': str(e)}, {}
+
+
+async def _read_request(reader):
+    """Read one HTTP/1.1 request. Returns None when the client closed the connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ServiceError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise ServiceError(400, "bad Content-Length")
+    if length < 0:
+        raise ServiceError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise ServiceError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path.split('?', 1)[0], headers, body
+
+
+def _write_response(writer, status, payload, headers, keep_alive):
+    body = json.dumps(payload).encode()
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}",
+             "Content-Type: application/json",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+
+class ServiceClient:
+    """Minimal keep-alive JSON client for the service (used by the tests and the load test)."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """Returns (status, body dict)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON pricing service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Solver processes (default: cores)")
+    parser.add_argument("--seats", type=int, default=None, help="Concurrent solves the Gurobi license allows")
+    parser.add_argument("--max-queue", type=int, default=16, help="Queued solves before rejecting with 503")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Default time budget (s)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    service = PricingService(args.host, args.port, args.workers, args.seats, args.max_queue, args.budget)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import sys
 from PyQt6.QtWidgets import QApplication
 from views.main_window import MainWindow
 from controllers.app_controller import AppController
+from utils.profiling import tracer
 
 def main():
     app = QApplication(sys.argv)
@@ -22,7 +23,10 @@ def main():
 
     window.show()
     
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if tracer.enabled:
+        print(f"Trace written to {tracer.save()}")
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+"""
+Per-cell network capacity.
+
+A CellCoverage holds a sparse (n_cells x n_segments) matrix W: W[c, s] is the
+share of segment s's traffic carried by cell c (columns usually sum to 1), and
+one capacity per cell. The usage of cell c is
+
+    sum_s W[c, s] * sum_f data_limit_f * q[f, s]
+
+i.e. the rows U = W kron data_limit applied to q flattened segment-major. U is
+built as a SciPy sparse matrix and added to Gurobi with a single addMConstr,
+so thousands of cells over tens of thousands of segments never go through
+Python-level expressions. Without SciPy a dense matrix is used instead (fine
+for small coverages only).
+"""
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = True
+except ImportError:
+    sp = None
+    SCIPY_AVAILABLE = False
+
+
+class CellCoverage:
+    """Sparse segment-to-cell traffic distribution with one capacity per cell."""
+
+    def __init__(self, shares, capacities, segment_ids, cell_ids=None):
+        """
+        Args:
+            shares: (n_cells, n_segments) SciPy sparse matrix or array of traffic shares.
+            capacities (array): Capacity per cell (GB), shape (n_cells,).
+            segment_ids (list): Segment id of each column of `shares`.
+            cell_ids (list): Cell names (default: "0", "1", ...).
+        """
+        if SCIPY_AVAILABLE:
+            self.shares = sp.csr_matrix(shares, dtype=float)
+        else:
+            self.shares = np.asarray(shares, dtype=float)
+        self.capacities = np.asarray(capacities, dtype=float)
+        self.segment_ids = [str(s) for s in segment_ids]
+        n_cells, n_segments = self.shares.shape
+        self.cell_ids = [str(c) for c in cell_ids] if cell_ids is not None else [str(c) for c in range(n_cells)]
+        if len(self.capacities) != n_cells or len(self.cell_ids) != n_cells:
+            raise ValueError("One capacity and one id per cell are required.")
+        if len(self.segment_ids) != n_segments:
+            raise ValueError("One segment id per column of the shares matrix is required.")
+
+    @classmethod
+    def from_triplets(cls, cells, segments, shares, capacities, cell_ids, segment_ids):
+        """
+        Build from (cell index, segment index, share) triplets, e.g. read from a CSV.
+
+        Args:
+            cells, segments (array): Row and column indices of the non-zero shares.
+            shares (array): The shares.
+            capacities (array): Capacity per cell.
+            cell_ids, segment_ids (list): Ids of the rows and columns.
+        """
+        shape = (len(cell_ids), len(segment_ids))
+        if SCIPY_AVAILABLE:
+            matrix = sp.coo_matrix((shares, (cells, segments)), shape=shape)
+        else:
+            matrix = np.zeros(shape)
+            np.add.at(matrix, (np.asarray(cells), np.asarray(segments)), shares)
+        return cls(matrix, capacities, segment_ids, cell_ids)
+
+    @property
+    def n_cells(self):
+        return len(self.cell_ids)
+
+    def _columns(self, segment_order):
+        """Shares with columns reordered to segment_order."""
+        index = {s: i for i, s in enumerate(self.segment_ids)}
+        try:
+            columns = [index[str(s)] for s in segment_order]
+        except KeyError as e:
+            raise ValueError(f"Segment {e} has no column in the cell coverage.") from None
+        return self.shares[:, columns]
+
+    def usage_matrix(self, segment_order, data_limit):
+        """
+        Rows mapping q (flattened segment-major: q[s0, f0], q[s0, f1], ...) to cell usage.
+
+        Args:
+            segment_order (list): Segment ids in the order of q.
+            data_limit (array): Data allowance per plan, in the order of q.
+
+        Returns:
+            (n_cells, n_segments * n_plans) CSR matrix (ndarray without SciPy).
+        """
+        shares = self._columns(segment_order)
+        d = np.asarray(data_limit, dtype=float)[None, :]
+        if SCIPY_AVAILABLE:
+            return sp.kron(shares, sp.csr_matrix(d), format='csr')
+        return np.kron(shares, d)
+
+    def cell_usage(self, segment_order, segment_usage):
+        """Usage per cell from the data usage of each segment (in segment_order)."""
+        return np.asarray(self._columns(segment_order) @ np.asarray(segment_usage, dtype=float)).ravel()
+
+    def plan_rows(self, segment_order, weights):
+        """
+        Per-cell, per-plan sums of shares times (S, F) weights: (n_cells, n_plans) dense.
+
+        Used by the sensitivity analysis, where usage is linear in the prices.
+        """
+        return np.asarray(self._columns(segment_order) @ np.asarray(weights, dtype=float))
@@ -0,0 +1,122 @@
+"""
+Column generation over (plan, segment) assignments.
+
+PricingModel.solve_column_generation solves a restricted master: the
+build_and_solve MIQP with x and q only for a candidate set of columns
+(plan, segment). At the master's prices, the assignment LP over the candidate
+columns (relaxed x, single_choice_* and capacity_constr rows) gives duals
+pi_s and lambda; a missing column (f, s) that is sellable at those prices
+(a - b*p >= 0) is priced out with the reduced cost
+
+    profit_fs - pi_s - lambda * data_limit_f * q_fs
+
+and columns with a positive reduced cost are added until none remains.
+
+Because prices are decision variables, reduced costs at the master's prices
+do not prove optimality alone. The certificate is lagrangian_bound, a valid
+upper bound on the full formulation: dualize the capacity with lambda >= 0
+and let every segment pay its own best price for its best plan, ignoring
+ordering. The gap between that bound and the master objective bounds how
+far the result can be from the full |F| x |S| model's optimum. Before
+stopping, the columns attaining the bound (bound_columns) are added too, so
+the master always contains the plan each segment would pick in the bound.
+"""
+import numpy as np
+
+# Golden-section iterations of the bound's search over lambda
+BOUND_ITERATIONS = 100
+
+
+def column_values(instance, prices):
+    """
+    Profit and network usage of every (segment, plan) column at fixed prices.
+
+    Returns:
+        tuple: (profit, usage, sellable) arrays of shape (S, F); sellable is
+               False where a - b*p < 0 (x = 1 would force a negative quantity).
+    """
+    p = np.asarray(prices, dtype=float)
+    q = instance.a - instance.b * p
+    sellable = q >= -1e-6
+    q = np.maximum(q, 0.0)
+    return q * (p - instance.cost), q * instance.data_limit, sellable
+
+
+def initial_columns(instance, prices, per_segment=2):
+    """
+    Starting candidate set: the per_segment most profitable sellable plans of every segment.
+
+    Returns:
+        (S, F) boolean mask of the columns.
+    """
+    profit, _, sellable = column_values(instance, prices)
+    score = np.where(sellable, profit, -np.inf)
+    k = min(per_segment, instance.n_plans)
+    top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+    mask = np.zeros(score.shape, dtype=bool)
+    np.put_along_axis(mask, top, True, axis=1)
+    return mask
+
+
+def reduced_costs(profit, usage, sellable, pi, lam):
+    """Reduced costs of all columns for single-choice duals pi (S,) and capacity dual lam (-inf if unsellable)."""
+    rc = profit - np.asarray(pi, dtype=float)[:, None] - lam * usage
+    return np.where(sellable, rc, -np.inf)
+
+
+def _relaxed_columns(instance, lam):
+    """(S, F) value of every column in the capacity-dualized relaxation for one lambda."""
+    a, b = instance.a, instance.b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reservation = np.where(b > 0, a / b, 0.0)
+    # Best (p - k)(a - b p) over p in [0, a/b] with k = cost + lambda * data_limit
+    margin = reservation - instance.cost - lam * instance.data_limit
+    value = np.where((b > 0) & (margin > 0), b * (margin / 2) ** 2, 0.0)
+    # Price-insensitive demand (b = 0, a > 0) is unbounded without an upper price
+    return np.where((b <= 0) & (a > 0), np.inf, value)
+
+
+def _relaxed_value(instance, lam):
+    """Capacity-dualized bound for one lambda (segments priced separately)."""
+    best = _relaxed_columns(instance, lam).max(axis=1).sum() if instance.n_plans else 0.0
+    return lam * instance.capacity + best
+
+
+def bound_columns(instance, lam):
+    """Plan index per segment that attains the Lagrangian bound at lambda."""
+    return np.argmax(_relaxed_columns(instance, lam), axis=1)
+
+
+def lagrangian_bound(instance, iterations=BOUND_ITERATIONS):
+    """
+    Upper bound on the optimum of the full formulation.
+
+    The relaxed value is convex in lambda, so a golden-section search over
+    [0, lambda_max] finds the tightest bound; beyond lambda_max no column has
+    a positive margin and the value only grows with lambda * capacity.
+
+    Returns:
+        tuple: (bound, lambda).
+    """
+    b = instance.b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reservation = np.where(b > 0, instance.a / b, 0.0)
+        ratio = np.where(instance.data_limit > 0, (reservation - instance.cost) / instance.data_limit, 0.0)
+    hi = max(float(ratio.max(initial=0.0)), 0.0)
+    lo = 0.0
+    golden = (np.sqrt(5) - 1) / 2
+    x1, x2 = hi - golden * (hi - lo), lo + golden * (hi - lo)
+    f1, f2 = _relaxed_value(instance, x1), _relaxed_value(instance, x2)
+    for _ in range(iterations):
+        if f1 <= f2:
+            hi, x2, f2 = x2, x1, f1
+            x1 = hi - golden * (hi - lo)
+            f1 = _relaxed_value(instance, x1)
+        else:
+            lo, x1, f1 = x1, x2, f2
+            x2 = lo + golden * (hi - lo)
+            f2 = _relaxed_value(instance, x2)
+    # The search brackets the minimum; also check the end points
+    candidates = [(f1, x1), (f2, x2), (_relaxed_value(instance, 0.0), 0.0)]
+    bound, lam = min(candidates)
+    return float(bound), float(lam)
@@ -0,0 +1,152 @@
+import numpy as np
+
+# Segment choice rules:
+#   'profit'  - each segment is assigned the plan that maximizes the operator's profit
+#               (p - c) * (a - b*p) among plans with non-negative demand. This is the
+#               assignment build_and_solve makes when capacity is not binding.
+#   'surplus' - each segment picks the plan with the largest consumer surplus
+#               (a - b*p)^2 / (2b) among plans with positive demand, or buys nothing.
+CHOICE_RULES = ('profit', 'surplus')
+NO_PLAN = -1
+
+
+def price_vector(plan_ids, prices):
+    """Return prices aligned with plan_ids, from a {plan_id: price} dict or an array."""
+    if isinstance(prices, dict):
+        return np.array([prices[pid] for pid in plan_ids], dtype=float)
+    return np.asarray(prices, dtype=float)
+
+
+def evaluate_arrays(prices, cost, data_limit, a, b, rule='profit'):
+    """
+    Evaluate a price vector on demand matrices in one vectorized pass.
+
+    All leading dimensions broadcast, so `a`/`b` may be (S, F) for one instance
+    or (K, S, F) for K demand draws, and `prices` (F,) or (K, F).
+
+    Args:
+        prices (array): Price per plan, shape (..., F).
+        cost (array): Unit cost per plan, shape (F,).
+        data_limit (array): Data allowance per plan, shape (F,).
+        a, b (array): Demand intercepts and slopes, shape (..., S, F).
+        rule (str): Segment choice rule, one of CHOICE_RULES.
+
+    Returns:
+        dict of arrays with shape (..., S): 'choice' (plan index or NO_PLAN),
+        'quantity', 'revenue', 'profit' and 'usage'.
+    """
+    if rule not in CHOICE_RULES:
+        raise ValueError(f"Unknown choice rule '{rule}'. Use one of {CHOICE_RULES}.")
+
+    p = np.asarray(prices, dtype=float)[..., None, :]
+    q = a - b * p                                   # (..., S, F)
+    margin = p - cost
+    if rule == 'profit':
+        score = np.where(q >= 0, margin * q, -np.inf)
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            surplus = np.where(b > 0, q * q / (2 * b), np.inf)
+        score = np.where(q > 0, surplus, -np.inf)
+
+    choice = np.argmax(score, axis=-1)
+    best = np.take_along_axis(score, choice[..., None], axis=-1)[..., 0]
+    buys = best > -np.inf
+    choice = np.where(buys, choice, NO_PLAN)
+
+    idx = np.maximum(choice, 0)[..., None]
+    quantity = np.where(buys, np.take_along_axis(q, idx, axis=-1)[..., 0], 0.0)
+    price = np.take_along_axis(np.broadcast_to(p, q.shape), idx, axis=-1)[..., 0]
+    revenue = quantity * price
+    profit = quantity * (price - cost[idx[..., 0]])
+    usage = quantity * data_limit[idx[..., 0]]
+
+    return {
+        'choice': choice,
+        'quantity': quantity,
+        'revenue': revenue,
+        'profit': profit,
+        'usage': usage,
+    }
+
+
+def evaluate_prices(instance, prices, rule='profit'):
+    """
+    Evaluate any price vector on a PricingInstance without calling the solver.
+
+    Args:
+        instance (PricingInstance): Instance to evaluate.
+        prices (dict or array): {plan_id: price} or prices aligned with instance.plan_ids.
+        rule (str): Segment choice rule, one of CHOICE_RULES.
+
+    Returns:
+        dict: Per-segment arrays from evaluate_arrays plus 'prices' and the
+              totals 'total_profit', 'total_revenue', 'total_usage' and
+              'capacity_ok'.
+    """
+    p = price_vector(instance.plan_ids, prices)
+    ev = evaluate_arrays(p, instance.cost, instance.data_limit, instance.a, instance.b, rule)
+    ev['prices'] = p
+    ev['total_profit'] = float(ev['profit'].sum())
+    ev['total_revenue'] = float(ev['revenue'].sum())
+    ev['total_usage'] = float(ev['usage'].sum())
+    ev['capacity_ok'] = ev['total_usage'] <= instance.capacity
+    return ev
+
+
+def evaluate_store(store, prices, rule='profit', chunk_size=100000):
+    """
+    Stream an InstanceStore chunk by chunk and return totals and per-plan aggregates.
+
+    Returns:
+        dict: 'total_profit', 'total_revenue', 'total_usage', 'capacity_ok' and
+              per-plan arrays 'plan_segments', 'plan_quantity', 'plan_revenue'.
+    """
+    p = price_vector(store.plan_ids, prices)
+    n_f = store.n_plans
+    totals = {'total_profit': 0.0, 'total_revenue': 0.0, 'total_usage': 0.0}
+    plan_segments = np.zeros(n_f, dtype=np.int64)
+    plan_quantity = np.zeros(n_f)
+    plan_revenue = np.zeros(n_f)
+
+    for _, chunk in store.iter_chunks(chunk_size):
+        ev = evaluate_arrays(p, chunk.cost, chunk.data_limit, chunk.a, chunk.b, rule)
+        totals['total_profit'] += float(ev['profit'].sum())
+        totals['total_revenue'] += float(ev['revenue'].sum())
+        totals['total_usage'] += float(ev['usage'].sum())
+
+        bought = ev['choice'] != NO_PLAN
+        choice = ev['choice'][bought]
+        plan_segments += np.bincount(choice, minlength=n_f)
+        plan_quantity += np.bincount(choice, weights=ev['quantity'][bought], minlength=n_f)
+        plan_revenue += np.bincount(choice, weights=ev['revenue'][bought], minlength=n_f)
+
+    totals['capacity_ok'] = totals['total_usage'] <= store.capacity
+    totals.update(prices=p, plan_segments=plan_segments,
+                  plan_quantity=plan_quantity, plan_revenue=plan_revenue)
+    return totals
+
+
+def to_results(instance, evaluation, status='Evaluated'):
+    """Convert an evaluation into the results dict format returned by build_and_solve."""
+    plan_ids = [str(pid) for pid in instance.plan_ids]
+    segment_ids = [str(sid) for sid in instance.segment_ids]
+    choice = evaluation['choice'].tolist()
+    quantity = evaluation['quantity'].tolist()
+
+    quantities = {(f, s): 0.0 for f in plan_ids for s in segment_ids}
+    choices = {(f, s): 0.0 for f in plan_ids for s in segment_ids}
+    for s, j, q in zip(segment_ids, choice, quantity):
+        if j != NO_PLAN:
+            quantities[(plan_ids[j], s)] = q
+            choices[(plan_ids[j], s)] = 1.0
+
+    chosen_plans = set(j for j in choice if j != NO_PLAN)
+    return {
+        'status': status,
+        'objective': evaluation['total_profit'],
+        'prices': dict(zip(plan_ids, evaluation['prices'].tolist())),
+        'quantities': quantities,
+        'choices': choices,
+        'active': {f: 1.0 if j in chosen_plans else 0.0 for j, f in enumerate(plan_ids)},
+        'total_usage': evaluation['total_usage'],
+    }
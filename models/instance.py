@@ -0,0 +1,147 @@
+import numpy as np
+
+
+class PricingInstance:
+    """
+    Array-backed container for a pricing instance.
+
+    Plans are stored column-wise (one entry per plan) and the demand
+    parameters as dense (n_segments, n_plans) matrices, so large instances
+    can be loaded, edited and handed to the solver without per-cell objects.
+    """
+
+    def __init__(self, plan_ids, plan_names, data_limit, cost,
+                 segment_ids, segment_names, size, a, b, capacity=0.0):
+        self.plan_ids = np.asarray(plan_ids, dtype=object)
+        self.plan_names = np.asarray(plan_names, dtype=object)
+        self.data_limit = np.asarray(data_limit, dtype=float)
+        self.cost = np.asarray(cost, dtype=float)
+
+        self.segment_ids = np.asarray(segment_ids, dtype=object)
+        self.segment_names = np.asarray(segment_names, dtype=object)
+        self.size = np.asarray(size, dtype=float)
+
+        n_s, n_f = len(self.segment_ids), len(self.plan_ids)
+        self.a = np.asarray(a, dtype=float).reshape(n_s, n_f)
+        self.b = np.asarray(b, dtype=float).reshape(n_s, n_f)
+        self.capacity = float(capacity)
+
+    @property
+    def n_plans(self):
+        return len(self.plan_ids)
+
+    @property
+    def n_segments(self):
+        return len(self.segment_ids)
+
+    @classmethod
+    def empty(cls, capacity=0.0):
+        return cls([], [], [], [], [], [], [], np.zeros((0, 0)), np.zeros((0, 0)), capacity)
+
+    @classmethod
+    def from_dicts(cls, plans, segments, capacity=0.0):
+        """
+        Build an instance from the list-of-dicts format used by the model.
+
+        Args:
+            plans (list of dict): Plans with 'id', 'name', 'data_limit', 'cost'.
+            segments (list of dict): Segments with 'id', 'name', 'size' and
+                                     'params' ({plan_id: {'a': .., 'b': ..}}).
+            capacity (float): Total network capacity.
+        """
+        plan_ids = [p['id'] for p in plans]
+        a = np.zeros((len(segments), len(plans)))
+        b = np.zeros((len(segments), len(plans)))
+        for i, s in enumerate(segments):
+            params = s.get('params', {})
+            for j, pid in enumerate(plan_ids):
+                param = params.get(pid)
+                if param:
+                    a[i, j] = param.get('a', 0)
+                    b[i, j] = param.get('b', 0)
+
+        return cls(
+            plan_ids,
+            [p.get('name', p['id']) for p in plans],
+            [p['data_limit'] for p in plans],
+            [p['cost'] for p in plans],
+            [s['id'] for s in segments],
+            [s.get('name', s['id']) for s in segments],
+            [s.get('size', 0) for s in segments],
+            a, b, capacity
+        )
+
+    def plan_dicts(self):
+        """Return the plans as a list of dicts ('id', 'name', 'data_limit', 'cost')."""
+        return [
+            {'id': str(pid), 'name': str(name), 'data_limit': float(dl), 'cost': float(c)}
+            for pid, name, dl, c in zip(self.plan_ids, self.plan_names, self.data_limit.tolist(), self.cost.tolist())
+        ]
+
+    def to_dicts(self):
+        """Return (plans, segments, capacity) in the format expected by build_and_solve."""
+        plans = self.plan_dicts()
+        plan_ids = [p['id'] for p in plans]
+
+        a_rows = self.a.tolist()
+        b_rows = self.b.tolist()
+        segments = []
+        for i, (sid, name, size) in enumerate(zip(self.segment_ids, self.segment_names, self.size.tolist())):
+            a_row, b_row = a_rows[i], b_rows[i]
+            segments.append({
+                'id': str(sid),
+                'name': str(name),
+                'size': size,
+                'params': {pid: {'a': a_row[j], 'b': b_row[j]} for j, pid in enumerate(plan_ids)}
+            })
+        return plans, segments, self.capacity
+
+    def copy(self):
+        return PricingInstance(
+            self.plan_ids.copy(), self.plan_names.copy(), self.data_limit.copy(), self.cost.copy(),
+            self.segment_ids.copy(), self.segment_names.copy(), self.size.copy(),
+            self.a.copy(), self.b.copy(), self.capacity
+        )
+
+    def segment_slice(self, index):
+        """Return a new instance restricted to the given segment rows (slice or index array)."""
+        return PricingInstance(
+            self.plan_ids, self.plan_names, self.data_limit, self.cost,
+            self.segment_ids[index], self.segment_names[index], self.size[index],
+            self.a[index], self.b[index], self.capacity
+        )
+
+    # --- Editing ---
+
+    def add_plan(self, plan_id, name, data_limit, cost):
+        self.plan_ids = np.append(self.plan_ids, np.array([plan_id], dtype=object))
+        self.plan_names = np.append(self.plan_names, np.array([name], dtype=object))
+        self.data_limit = np.append(self.data_limit, float(data_limit))
+        self.cost = np.append(self.cost, float(cost))
+        zeros = np.zeros((self.n_segments, 1))
+        self.a = np.hstack([self.a, zeros])
+        self.b = np.hstack([self.b, zeros])
+
+    def remove_plan(self, index):
+        self.plan_ids = np.delete(self.plan_ids, index)
+        self.plan_names = np.delete(self.plan_names, index)
+        self.data_limit = np.delete(self.data_limit, index)
+        self.cost = np.delete(self.cost, index)
+        self.a = np.delete(self.a, index, axis=1)
+        self.b = np.delete(self.b, index, axis=1)
+
+    def add_segment(self, segment_id, name, size, a=None, b=None):
+        self.segment_ids = np.append(self.segment_ids, np.array([segment_id], dtype=object))
+        self.segment_names = np.append(self.segment_names, np.array([name], dtype=object))
+        self.size = np.append(self.size, float(size))
+        a_row = np.zeros((1, self.n_plans)) if a is None else np.asarray(a, dtype=float).reshape(1, -1)
+        b_row = np.zeros((1, self.n_plans)) if b is None else np.asarray(b, dtype=float).reshape(1, -1)
+        self.a = np.vstack([self.a, a_row])
+        self.b = np.vstack([self.b, b_row])
+
+    def remove_segment(self, index):
+        self.segment_ids = np.delete(self.segment_ids, index)
+        self.segment_names = np.delete(self.segment_names, index)
+        self.size = np.delete(self.size, index)
+        self.a = np.delete(self.a, index, axis=0)
+        self.b = np.delete(self.b, index, axis=0)
@@ -0,0 +1,215 @@
+"""
+On-disk, memory-mapped storage for very large pricing instances.
+
+A store is a directory holding:
+    meta.json          plans, capacity, number of segments, dtypes
+    segment_ids.bin    fixed-width unicode (n_segments,)
+    segment_names.bin  fixed-width unicode (n_segments,)
+    size.bin           float64 (n_segments,)
+    a.bin, b.bin       float64 (n_segments, n_plans), row-major
+
+Columns are raw NumPy buffers opened with np.memmap, so only the pages
+touched by a chunk are read from disk.
+"""
+import json
+import os
+
+import numpy as np
+
+from models.instance import PricingInstance
+
+STORE_VERSION = 1
+META_FILE = "meta.json"
+DEFAULT_CHUNK_SIZE = 100000
+
+
+class InstanceStoreWriter:
+    """
+    Appends segment chunks to a new store directory.
+
+    The number of segments does not need to be known in advance; it is
+    written to meta.json by close().
+    """
+
+    def __init__(self, path, plans, capacity=0.0, id_width=32):
+        """
+        Args:
+            path (str): Store directory (created if needed).
+            plans (list of dict): Plans with 'id', 'name', 'data_limit', 'cost'.
+            capacity (float): Network capacity of the instance.
+            id_width (int): Max characters of segment ids and names; longer ones are rejected.
+        """
+        os.makedirs(path, exist_ok=True)
+        # The columns are rewritten: an old meta.json must not describe them until close()
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self.path = path
+        self.plans = [{'id': str(p['id']), 'name': str(p['name']),
+                       'data_limit': float(p['data_limit']), 'cost': float(p['cost'])} for p in plans]
+        self.capacity = float(capacity)
+        self.text_dtype = np.dtype(f"<U{id_width}")
+        self.n_segments = 0
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb")
+                       for name in ('segment_ids', 'segment_names', 'size', 'a', 'b')}
+
+    def append(self, instance):
+        """Append the segments of a PricingInstance chunk (plans must match the store)."""
+        if list(instance.plan_ids) != [p['id'] for p in self.plans]:
+            raise ValueError("Chunk plans do not match the store plans.")
+        ids, names = self._text(instance.segment_ids, 'ids'), self._text(instance.segment_names, 'names')
+        self._files['segment_ids'].write(ids.tobytes())
+        self._files['segment_names'].write(names.tobytes())
+        self._files['size'].write(np.ascontiguousarray(instance.size, dtype=np.float64).tobytes())
+        self._files['a'].write(np.ascontiguousarray(instance.a, dtype=np.float64).tobytes())
+        self._files['b'].write(np.ascontiguousarray(instance.b, dtype=np.float64).tobytes())
+        self.n_segments += instance.n_segments
+
+    def _text(self, values, what):
+        """Fixed-width text column; raises instead of truncating (truncated ids could collide)."""
+        text = np.asarray(values).astype(str)
+        width = self.text_dtype.itemsize // 4
+        if text.size and int(np.char.str_len(text).max()) > width:
+            raise ValueError(f"Segment {what} longer than {width} characters; increase id_width.")
+        return text.astype(self.text_dtype)
+
+    def close(self, write_meta=True):
+        """Close the column files and write meta.json (skipped when write_meta is False)."""
+        for f in self._files.values():
+            f.close()
+        if not write_meta:
+            return
+        meta = {
+            'version': STORE_VERSION,
+            'n_segments': self.n_segments,
+            'capacity': self.capacity,
+            'plans': self.plans,
+            'text_dtype': self.text_dtype.str,
+        }
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed write leaves no meta.json, so the partial store cannot be opened
+        self.close(write_meta=exc_type is None)
+
+
+class InstanceStore:
+    """Read-only, memory-mapped view of a store directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported store version: {meta.get('version')}")
+
+        self.plans = meta['plans']
+        self.capacity = meta['capacity']
+        self.n_segments = meta['n_segments']
+        self.plan_ids = np.array([p['id'] for p in self.plans], dtype=object)
+        self.plan_names = np.array([p['name'] for p in self.plans], dtype=object)
+        self.data_limit = np.array([p['data_limit'] for p in self.plans], dtype=float)
+        self.cost = np.array([p['cost'] for p in self.plans], dtype=float)
+
+        text_dtype = np.dtype(meta['text_dtype'])
+        self.segment_ids = self._map('segment_ids', text_dtype, (self.n_segments,))
+        self.segment_names = self._map('segment_names', text_dtype, (self.n_segments,))
+        self.size = self._map('size', np.float64, (self.n_segments,))
+        self.a = self._map('a', np.float64, (self.n_segments, self.n_plans))
+        self.b = self._map('b', np.float64, (self.n_segments, self.n_plans))
+
+    def _map(self, name, dtype, shape):
+        if self.n_segments == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r", shape=shape)
+
+    @property
+    def n_plans(self):
+        return len(self.plans)
+
+    def chunk(self, start, stop):
+        """Return segments [start, stop) as a PricingInstance (numeric columns stay memory-mapped)."""
+        return PricingInstance(
+            self.plan_ids, self.plan_names, self.data_limit, self.cost,
+            self.segment_ids[start:stop], self.segment_names[start:stop], self.size[start:stop],
+            self.a[start:stop], self.b[start:stop], self.capacity
+        )
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield (start, PricingInstance) for consecutive segment chunks."""
+        for start in range(0, self.n_segments, chunk_size):
+            yield start, self.chunk(start, min(start + chunk_size, self.n_segments))
+
+    def load(self):
+        """Load the whole store into memory (only sensible for small stores)."""
+        return self.chunk(0, self.n_segments).copy()
+
+    def aggregate(self, n_bins=20, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Stream through the store and merge micro-segments into macro-segments.
+
+        Segments are grouped by the plan with the highest reservation price
+        (a / b) and by the bin of that price. Demand functions of a group are
+        summed (a and b add up), which is exact for prices at which every
+        member still has positive demand.
+
+        Args:
+            n_bins (int): Reservation-price bins per preferred plan.
+            chunk_size (int): Segments per streamed chunk.
+
+        Returns:
+            PricingInstance: At most n_plans * n_bins aggregated segments.
+        """
+        n_f = self.n_plans
+
+        # Pass 1: global range of the best reservation price
+        lo, hi = np.inf, -np.inf
+        for _, chunk in self.iter_chunks(chunk_size):
+            best = _best_reservation(chunk.a, chunk.b)[1]
+            if best.size:
+                lo, hi = min(lo, best.min()), max(hi, best.max())
+        if not np.isfinite(lo):
+            return PricingInstance(self.plan_ids, self.plan_names, self.data_limit, self.cost,
+                                   [], [], [], np.zeros((0, n_f)), np.zeros((0, n_f)), self.capacity)
+        edges = np.linspace(lo, hi, n_bins + 1)[1:-1]
+
+        # Pass 2: accumulate sums per (preferred plan, bin) group
+        n_groups = n_f * n_bins
+        a_sum = np.zeros((n_groups, n_f))
+        b_sum = np.zeros((n_groups, n_f))
+        size_sum = np.zeros(n_groups)
+        count = np.zeros(n_groups, dtype=np.int64)
+        for _, chunk in self.iter_chunks(chunk_size):
+            plan_idx, best = _best_reservation(chunk.a, chunk.b)
+            group = plan_idx * n_bins + np.searchsorted(edges, best)
+            for j in range(n_f):
+                a_sum[:, j] += np.bincount(group, weights=chunk.a[:, j], minlength=n_groups)
+                b_sum[:, j] += np.bincount(group, weights=chunk.b[:, j], minlength=n_groups)
+            size_sum += np.bincount(group, weights=chunk.size, minlength=n_groups)
+            count += np.bincount(group, minlength=n_groups)
+
+        used = np.flatnonzero(count)
+        ids = [f"G_{self.plan_ids[g // n_bins]}_{g % n_bins}" for g in used]
+        names = [f"{count[g]} segments preferring {self.plan_ids[g // n_bins]}" for g in used]
+        return PricingInstance(self.plan_ids, self.plan_names, self.data_limit, self.cost,
+                               ids, names, size_sum[used], a_sum[used], b_sum[used], self.capacity)
+
+
+def _best_reservation(a, b):
+    """Index and value of the highest reservation price a / b per segment (0 where b == 0)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reservation = np.where(b > 0, a / b, 0.0)
+    plan_idx = np.argmax(reservation, axis=1)
+    return plan_idx, reservation[np.arange(len(plan_idx)), plan_idx]
+
+
+def write_store(instance, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write an in-memory PricingInstance to a new store directory."""
+    with InstanceStoreWriter(path, instance.plan_dicts(), instance.capacity) as writer:
+        for start in range(0, instance.n_segments, chunk_size):
+            writer.append(instance.segment_slice(slice(start, start + chunk_size)))
+    return InstanceStore(path)
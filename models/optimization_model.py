@@ -1,5 +1,21 @@
 import logging
 import logging
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.column_generation import bound_columns, column_values, initial_columns, lagrangian_bound, reduced_costs
+from models.evaluator import price_vector, to_results
+from models.instance import PricingInstance
+from models.price_search import search_prices
+from models.sensitivity import active_set, fixed_assignment_qp, parameter_range
+from models.solver_profiles import load_profiles, select_params, size_class
+from models.telemetry import SolveTimer, TelemetryLog
 
 try:
     import gurobipy as gp
@@ -10,14 +26,30 @@ except ImportError:
     GRB = None
     GUROBI_AVAILABLE = False
 
+# Formulations of the quantity linearization (see PricingModel._add_segment_choices)
+FORMULATIONS = ("bigm", "indicator")
+
+
 class PricingModel:
     """
     Gurobi optimization model for Telecom Plan Pricing using PLNE/MILP.
     """
 
-    def __init__(self):
+    def __init__(self, profiles=None, telemetry=None):
+        """
+        Args:
+            profiles (dict): Solver parameter profiles per size class (see
+                             models/solver_profiles.py). Default: the shipped
+                             models/solver_profiles.json.
+            telemetry (TelemetryLog): Sink for per-solve telemetry records (see
+                                      models/telemetry.py). Default: the file named
+                                      by PRICING_TELEMETRY, if set.
+        """
         self.model = None
         self.logger = logging.getLogger(__name__)
+        self.profiles = load_profiles() if profiles is None else profiles
+        self.telemetry = TelemetryLog.from_env() if telemetry is None else telemetry
+        self.last_telemetry = None  # Record of the latest solve
 
     def check_solver(self):
         """Check if Gurobi is available and licensed."""
@@ -33,7 +65,221 @@ class PricingModel:
             self.logger.error(f"Gurobi initialization failed: {e}")
             return False
 
-    def build_and_solve(self, plans_data, segments_data, network_capacity, cannibalization_margin=5.0, verbose=True):
+    def _apply_params(self, m, n_plans, n_segments, params=None):
+        """
+        Sets the profile parameters for the instance size, then the explicit ones.
+
+        Returns:
+            dict: The parameters that were set.
+        """
+        applied = select_params(self.profiles, n_plans, n_segments)
+        applied.update(params or {})
+        for name, value in applied.items():
+            m.setParam(name, value)
+        if applied:
+            self.logger.debug(f"Solver parameters: {applied}")
+        return applied
+
+    def _start_timer(self, solve, n_plans, n_segments):
+        cls = size_class(self.profiles, n_plans, n_segments)
+        return SolveTimer(solve, n_plans, n_segments, cls['name'] if cls else None)
+
+    def _record_telemetry(self, timer, m, params, error=None):
+        """Completes the telemetry record of a solve (a failure record if error is set) and writes it to the sink."""
+        record = timer.finish(m, params) if error is None else timer.fail(error, params)
+        self.last_telemetry = record
+        if self.telemetry is not None:
+            try:
+                self.telemetry.record(record)
+            except OSError as e:
+                self.logger.warning(f"Could not write telemetry: {e}")
+        return record
+
+    def _add_prices(self, m, F, cannibalization_margin, fixed_prices=None):
+        """
+        Adds the price variables and the price-ordering constraints.
+
+        Args:
+            m (gp.Model): Model to extend.
+            F (list): Plan ids, sorted by data_limit.
+            cannibalization_margin (float): Min price difference between ordered plans.
+            fixed_prices (dict): Optional {plan_id: price}; prices are fixed and ordering is skipped.
+        """
+        # Price for each plan f
+        # Bounds: p >= cost (to ensure non-negative margin per unit, roughly) or just >= 0
+        p = m.addVars(F, lb=0.0, vtype=GRB.CONTINUOUS, name="price")
+        if fixed_prices is not None:
+            for f in F:
+                p[f].LB = p[f].UB = fixed_prices[f]
+            return p
+
+        # 3. Price Ordering & Cannibalization
+        # p_1 <= p_2 <= ... 
+        # p_{f+1} >= p_f + margin (only if both active? prompt implies strict structure)
+        # Assuming F is ordered list of IDs.
+        for i in range(len(F) - 1):
+            f_curr = F[i]
+            f_next = F[i+1]
+            
+            # Basic ordering: p_next >= p_curr + margin
+            # If we consider y (activation), maybe we don't enforce if inactive? 
+            # For simplicity based on prompt "p_f+1 >= p_f + margin_min", we enforce it globally for the structure.
+            m.addConstr(p[f_next] >= p[f_curr] + cannibalization_margin, name=f"order_{f_curr}_{f_next}")
+        return p
+
+    def _price_upper_bounds(self, plans_data, segments_data, cannibalization_margin):
+        """
+        Valid upper bounds on the prices, for plans_data sorted by data_limit.
+
+        A plan sold with positive demand costs at most the highest reservation
+        price a/b among its segments; a plan without demand can sit just above
+        its predecessor. The Big-M rows bound prices implicitly, the indicator
+        formulation needs these bounds explicitly.
+
+        Returns:
+            dict: {plan_id: upper bound} (GRB.INFINITY for price-insensitive demand).
+        """
+        bounds = {}
+        previous = -cannibalization_margin
+        for pl in plans_data:
+            f = pl['id']
+            reservation = 0.0
+            for seg in segments_data:
+                param = seg['params'].get(f, {'a': 0, 'b': 0})
+                if param['b'] > 0:
+                    reservation = max(reservation, param['a'] / param['b'])
+                elif param['a'] > 0:
+                    reservation = GRB.INFINITY
+            bounds[f] = min(max(reservation, previous + cannibalization_margin), GRB.INFINITY)
+            previous = bounds[f]
+        return bounds
+
+    def _add_segment_choices(self, m, plans_data, segments_data, p, tag="", formulation="bigm", columns=None):
+        """
+        Adds segment choices and the linearized quantities for given price variables.
+
+        build_and_solve calls this once; the sample-average model calls it once per
+        scenario, with `tag` (e.g. "_k3") keeping variable and constraint names unique.
+        `formulation` is one of FORMULATIONS: "bigm" links q, x and p with Big-M rows,
+        "indicator" with Gurobi indicator constraints (no Big-M constants; the prices
+        then need the explicit bounds of _price_upper_bounds). `columns` restricts the
+        choices to a list of (plan_id, segment_id) pairs (the column-generation master);
+        x and q then only exist for those pairs.
+
+        Returns:
+            tuple: (x, y, q_vars, total_data_usage, obj_expr)
+        """
+        F = [pl['id'] for pl in plans_data]       # Plans
+        S = [s['id'] for s in segments_data]      # Segments
+
+        # Mappings for easy access
+        plan_map = {pl['id']: pl for pl in plans_data}
+        seg_map = {s['id']: s for s in segments_data}
+
+        # --- VARIABLES ---
+
+        # Choice of segment s for plan f (Binary) -> x[f,s] = 1 if segment s chooses plan f
+        x = m.addVars(F, S, vtype=GRB.BINARY, name=f"x{tag}") if columns is None else \
+            m.addVars(columns, vtype=GRB.BINARY, name=f"x{tag}")
+        
+        # Activation of plan f (Binary) -> y[f] = 1 if plan offered
+        y = m.addVars(F, vtype=GRB.BINARY, name=f"y{tag}")
+
+        # Auxiliary variable for Quantity q[f,s]
+        # Since q depends on p and x, and demand is linear q = a - bp
+        # usage: total_q[f,s] = x[f,s] * (a - b * p[f])
+        # This is non-linear (x * p). Linearization required.
+        # Let real_q[f,s] be the actual quantity.
+        # If x=1, real_q = a - b*p. If x=0, real_q = 0.
+        # Linearization using Big-M:
+        # real_q <= M * x
+        # real_q <= a - b*p + M(1-x)
+        # real_q >= a - b*p - M(1-x)
+        # real_q >= 0
+        # BUT: "Segment chooses plain" implies it buys it. 
+        # Simplified: q[f,s] = size_segment * (prob of purchase or just quantity per user?)
+        # Prompt says: q_f_s = (a - b*p) * x_f_s
+        # We assume q is "quantity per user in segment" or "total quantity for segment"?
+        # Let's assume input a, b refer to TOTAL demand of segment if price is p.
+        
+        q_vars = m.addVars(F, S, lb=0.0, vtype=GRB.CONTINUOUS, name=f"q{tag}") if columns is None else \
+            m.addVars(columns, lb=0.0, vtype=GRB.CONTINUOUS, name=f"q{tag}")
+        
+        # Big-M for price linearization (assuming max reasonable price e.g. 200)
+        M_price = 1000.0 
+        M_q = 1000000.0 # Max possible demand
+
+        # --- CONSTRAINTS ---
+
+        for f in F:
+            for s in S:
+                if (f, s) not in x:
+                    continue
+                param = seg_map[s]['params'].get(f, {'a': 0, 'b': 0})
+                a_val = param['a']
+                b_val = param['b']
+
+                if formulation == "indicator":
+                    # x=0 => q=0, x=1 => q = a - b*p
+                    m.addGenConstrIndicator(x[f,s], False, q_vars[f,s] == 0, name=f"ind_q_zero_{f}_{s}{tag}")
+                    m.addGenConstrIndicator(x[f,s], True, q_vars[f,s] + b_val * p[f] == a_val,
+                                            name=f"ind_q_{f}_{s}{tag}")
+                    continue
+                
+                # 1. Linearization of q[f,s] = x[f,s] * (a - b*p[f])
+                # If x=0 => q=0
+                m.addConstr(q_vars[f,s] <= M_q * x[f,s], name=f"lin_q_zero_{f}_{s}{tag}")
+                
+                # If x=1 => q = a - b*p
+                # q <= a - b*p + M(1-x)
+                m.addConstr(q_vars[f,s] <= a_val - b_val * p[f] + M_q * (1 - x[f,s]), name=f"lin_q_high_{f}_{s}{tag}")
+                # q >= a - b*p - M(1-x)
+                m.addConstr(q_vars[f,s] >= a_val - b_val * p[f] - M_q * (1 - x[f,s]), name=f"lin_q_low_{f}_{s}{tag}")
+            
+            # Link activation y to x: If no segment picks f, is y 0? 
+            # Or rather: if y=0, no segment can pick f.
+            m.addConstr(gp.quicksum(x[f, s] for s in S if (f, s) in x) <= len(S) * y[f], name=f"activation_{f}{tag}")
+
+
+        # 2. Single Choice per Segment
+        # Each segment must choose exactly one plan (or none? Prompt says "Σ x = 1")
+        for s in S:
+            m.addConstr(gp.quicksum(x[f, s] for f in F if (f, s) in x) == 1, name=f"single_choice_{s}{tag}")
+
+        # Σ_f Σ_s q_f_s * data_limit_f (capacity row is added by the caller)
+        total_data_usage = gp.quicksum(
+            q_vars[f, s] * plan_map[f]['data_limit'] 
+            for f, s in q_vars.keys()
+        )
+
+        # --- OBJECTIVE ---
+        # Max Profit = Σ (p_f - cost_f) * q_{fs}
+        # Term: p[f] * q[f,s] is Quadratic (Continuous * Continuous) since q depends on p.
+        # But wait, q is already (a-bp)x. 
+        # x is binary. p is continuous.
+        # Revenue = p * (a-bp)*x = (ap - bp^2)x = a*p*x - b*p^2*x.
+        # This is cubic if we substituted, or quadratic if we keep q.
+        # Gurobi handles MIQP (Mixed Integer Quadratic Programming).
+        # Let's write objective using q and p directly.
+        # Profit = Σ (p[f] * q[f,s] - c[f] * q[f,s])
+        # p[f] * q[f,s] is Non-Convex quadratic? 
+        # Actually, q ~ (a - bp). Revenue ~ p(a-bp) = ap - bp^2. This is concave quadratic (good for max).
+        # But we have 'x' multiplied.
+        # Let's introduce revenue variable r[f,s] to linearize or use MIQP capability.
+        # user demanded "PL / PLNE / PLM". Gurobi handles Non-Convex MIQP, but standard MIQP is better.
+        # (ap - bp^2) is concave. Multiplication by binary x is fine for Gurobi.
+        # We will just write the expression directly.
+        
+        obj_expr = gp.quicksum(
+            (p[f] - plan_map[f]['cost']) * q_vars[f,s]
+            for f, s in q_vars.keys()
+        )
+
+        return x, y, q_vars, total_data_usage, obj_expr
+
+    def build_and_solve(self, plans_data, segments_data, network_capacity, cannibalization_margin=5.0, verbose=True,
+                        params=None, env=None, time_limit=None, sensitivity=False, cells=None, columns=None,
+                        start=None):
         """
         Builds the MILP model and solves it.
 
@@ -45,6 +291,18 @@ class PricingModel:
             network_capacity (float): Total network capacity (e.g. Total GB).
             cannibalization_margin (float): Min price difference between ordered plans.
             verbose (bool): Whether to print Gurobi logs.
+            params (dict): Gurobi parameters, e.g. {'MIPFocus': 1}. They override the
+                           profile selected for the instance size.
+            env (gp.Env): Gurobi environment to build the model in (default: the default environment).
+            time_limit (float): Time limit in seconds. When it is reached, the best solution found
+                                so far is returned with status 'TimeLimit' (None if there is none).
+            sensitivity (bool): Also run analyze_sensitivity on the solution (results['sensitivity']).
+            cells (CellCoverage): Optional per-cell capacities (see models/cells.py), added on top of
+                                  network_capacity; results then include 'cell_usage'.
+            columns (list): Optional (plan_id, segment_id) pairs segments may choose from; other
+                            choices are left out of the model (see solve_column_generation).
+            start (dict): Optional results of an earlier solve (prices, choices, quantities,
+                          active), passed to Gurobi as a MIP start.
 
         Returns:
             dict: Optimization results or None if failed.
@@ -53,153 +311,919 @@ class PricingModel:
             self.logger.error("Attempted to solve without Gurobi.")
             return None
 
+        timer = self._start_timer("build_and_solve", len(plans_data), len(segments_data))
+        applied = params or {}
         try:
             # Sort plans by data_limit to ensure price-ordering constraints (p_1 <= p_2 ...) make sense
             # i.e., Plan with more data should be more expensive
             plans_data = sorted(plans_data, key=lambda x: x['data_limit'])
 
             # Create Model
-            m = gp.Model("TelecomPricing")
+            m = gp.Model("TelecomPricing", env=env)
             m.setParam('OutputFlag', 1 if verbose else 0)  # Enable logging based on verbose flag
 
             # Indices
             F = [p['id'] for p in plans_data]         # Plans
             S = [s['id'] for s in segments_data]      # Segments
-            
-            # Mappings for easy access
-            plan_map = {p['id']: p for p in plans_data}
-            seg_map = {s['id']: s for s in segments_data}
 
-            # --- VARIABLES ---
-            
-            # Price for each plan f
-            # Bounds: p >= cost (to ensure non-negative margin per unit, roughly) or just >= 0
-            p = m.addVars(F, lb=0.0, vtype=GRB.CONTINUOUS, name="price")
+            applied = self._apply_params(m, len(F), len(S), params)
+            if time_limit is not None:
+                m.setParam('TimeLimit', time_limit)
+                applied['TimeLimit'] = time_limit
             
-            # Choice of segment s for plan f (Binary) -> x[f,s] = 1 if segment s chooses plan f
-            x = m.addVars(F, S, vtype=GRB.BINARY, name="x")
-            
-            # Activation of plan f (Binary) -> y[f] = 1 if plan offered
-            y = m.addVars(F, vtype=GRB.BINARY, name="y")
-
-            # Auxiliary variable for Quantity q[f,s]
-            # Since q depends on p and x, and demand is linear q = a - bp
-            # usage: total_q[f,s] = x[f,s] * (a - b * p[f])
-            # This is non-linear (x * p). Linearization required.
-            # Let real_q[f,s] be the actual quantity.
-            # If x=1, real_q = a - b*p. If x=0, real_q = 0.
-            # Linearization using Big-M:
-            # real_q <= M * x
-            # real_q <= a - b*p + M(1-x)
-            # real_q >= a - b*p - M(1-x)
-            # real_q >= 0
-            # BUT: "Segment chooses plain" implies it buys it. 
-            # Simplified: q[f,s] = size_segment * (prob of purchase or just quantity per user?)
-            # Prompt says: q_f_s = (a - b*p) * x_f_s
-            # We assume q is "quantity per user in segment" or "total quantity for segment"?
-            # Let's assume input a, b refer to TOTAL demand of segment if price is p.
-            
-            q_vars = m.addVars(F, S, lb=0.0, vtype=GRB.CONTINUOUS, name="q")
-            
-            # Big-M for price linearization (assuming max reasonable price e.g. 200)
-            M_price = 1000.0 
-            M_q = 1000000.0 # Max possible demand
-
-            # --- CONSTRAINTS ---
-
-            for f in F:
-                for s in S:
-                    param = seg_map[s]['params'].get(f, {'a': 0, 'b': 0})
-                    a_val = param['a']
-                    b_val = param['b']
-                    
-                    # 1. Linearization of q[f,s] = x[f,s] * (a - b*p[f])
-                    # If x=0 => q=0
-                    m.addConstr(q_vars[f,s] <= M_q * x[f,s], name=f"lin_q_zero_{f}_{s}")
-                    
-                    # If x=1 => q = a - b*p
-                    # q <= a - b*p + M(1-x)
-                    m.addConstr(q_vars[f,s] <= a_val - b_val * p[f] + M_q * (1 - x[f,s]), name=f"lin_q_high_{f}_{s}")
-                    # q >= a - b*p - M(1-x)
-                    m.addConstr(q_vars[f,s] >= a_val - b_val * p[f] - M_q * (1 - x[f,s]), name=f"lin_q_low_{f}_{s}")
-                
-                # Link activation y to x: If no segment picks f, is y 0? 
-                # Or rather: if y=0, no segment can pick f.
-                m.addConstr(gp.quicksum(x[f, s] for s in S) <= len(S) * y[f], name=f"activation_{f}")
-
-
-            # 2. Single Choice per Segment
-            # Each segment must choose exactly one plan (or none? Prompt says "Σ x = 1")
-            for s in S:
-                m.addConstr(gp.quicksum(x[f, s] for f in F) == 1, name=f"single_choice_{s}")
-
-            # 3. Price Ordering & Cannibalization
-            # p_1 <= p_2 <= ... 
-            # p_{f+1} >= p_f + margin (only if both active? prompt implies strict structure)
-            # Assuming F is ordered list of IDs.
-            for i in range(len(F) - 1):
-                f_curr = F[i]
-                f_next = F[i+1]
-                
-                # Basic ordering: p_next >= p_curr + margin
-                # If we consider y (activation), maybe we don't enforce if inactive? 
-                # For simplicity based on prompt "p_f+1 >= p_f + margin_min", we enforce it globally for the structure.
-                m.addConstr(p[f_next] >= p[f_curr] + cannibalization_margin, name=f"order_{f_curr}_{f_next}")
+            p = self._add_prices(m, F, cannibalization_margin)
+            x, y, q_vars, total_data_usage, obj_expr = self._add_segment_choices(m, plans_data, segments_data, p,
+                                                                                 columns=columns)
 
             # 4. Network Capacity
             # Σ_f Σ_s q_f_s * data_limit_f <= Cap
-            total_data_usage = gp.quicksum(
-                q_vars[f, s] * plan_map[f]['data_limit'] 
-                for f in F for s in S
-            )
             m.addConstr(total_data_usage <= network_capacity, name="capacity_constr")
-
-            # --- OBJECTIVE ---
-            # Max Profit = Σ (p_f - cost_f) * q_{fs}
-            # Term: p[f] * q[f,s] is Quadratic (Continuous * Continuous) since q depends on p.
-            # But wait, q is already (a-bp)x. 
-            # x is binary. p is continuous.
-            # Revenue = p * (a-bp)*x = (ap - bp^2)x = a*p*x - b*p^2*x.
-            # This is cubic if we substituted, or quadratic if we keep q.
-            # Gurobi handles MIQP (Mixed Integer Quadratic Programming).
-            # Let's write objective using q and p directly.
-            # Profit = Σ (p[f] * q[f,s] - c[f] * q[f,s])
-            # p[f] * q[f,s] is Non-Convex quadratic? 
-            # Actually, q ~ (a - bp). Revenue ~ p(a-bp) = ap - bp^2. This is concave quadratic (good for max).
-            # But we have 'x' multiplied.
-            # Let's introduce revenue variable r[f,s] to linearize or use MIQP capability.
-            # user demanded "PL / PLNE / PLM". Gurobi handles Non-Convex MIQP, but standard MIQP is better.
-            # (ap - bp^2) is concave. Multiplication by binary x is fine for Gurobi.
-            # We will just write the expression directly.
-            
-            obj_expr = gp.quicksum(
-                (p[f] - plan_map[f]['cost']) * q_vars[f,s]
-                for f in F for s in S
-            )
+            if cells is not None:
+                self._add_cell_capacity(m, cells, plans_data, S, q_vars)
+            if start is not None:
+                self._set_start(start, p, x, y, q_vars)
 
             m.setObjective(obj_expr, GRB.MAXIMIZE)
+            timer.lap('build')
             
             # Solve
-            m.optimize()
+            m.optimize(timer.callback)
+            timer.lap('optimize')
 
-            if m.status == GRB.OPTIMAL:
+            timed_out = time_limit is not None and m.status == GRB.TIME_LIMIT and m.SolCount > 0
+            if m.status == GRB.OPTIMAL or timed_out:
                 results = {
-                    'status': 'Optimal',
+                    'status': 'TimeLimit' if timed_out else 'Optimal',
                     'objective': m.objVal,
                     'prices': {f: p[f].X for f in F},
-                    'quantities': {(f,s): q_vars[f,s].X for f in F for s in S},
-                    'choices': {(f,s): x[f,s].X for f in F for s in S},
+                    'quantities': {(f,s): q_vars[f,s].X if (f,s) in q_vars else 0.0 for f in F for s in S},
+                    'choices': {(f,s): x[f,s].X if (f,s) in x else 0.0 for f in F for s in S},
                     'active': {f: y[f].X for f in F},
                     'total_usage': total_data_usage.getValue()
                 }
+                if cells is not None:
+                    segment_usage = [sum(q_vars[pl['id'], s].X * pl['data_limit'] for pl in plans_data
+                                         if (pl['id'], s) in q_vars) for s in S]
+                    results['cell_usage'] = dict(zip(cells.cell_ids, cells.cell_usage(S, segment_usage).tolist()))
+                timer.lap('extract')
+                self._record_telemetry(timer, m, applied)
+                if sensitivity:
+                    results['sensitivity'] = self.analyze_sensitivity(
+                        plans_data, segments_data, network_capacity, results, cannibalization_margin, env=env,
+                        cells=cells)
                 return results
             else:
+                self._record_telemetry(timer, m, applied)
                 self.logger.warning(f"Optimization ended with status {m.status}")
                 return None
 
         except gp.GurobiError as e:
             self.logger.error(f"Gurobi Error: {e}")
+            self._record_telemetry(timer, None, applied, error=e)
             return None
         except Exception as e:
             self.logger.exception("Unexpected error in optimization")
+            self._record_telemetry(timer, None, applied, error=e)
             return None
+
+    def _set_start(self, start, p, x, y, q_vars):
+        """Sets a MIP start from a results dict; values missing from it are left undefined."""
+        for var, values in ((p, start.get('prices', {})), (y, start.get('active', {})),
+                            (x, start.get('choices', {})), (q_vars, start.get('quantities', {}))):
+            for key, v in var.items():
+                if key in values:
+                    v.Start = values[key]
+
+    def _add_cell_capacity(self, m, cells, plans_data, S, q_vars):
+        """
+        Adds one capacity row per cell from the sparse coverage matrix.
+
+        The rows are the SciPy matrix of CellCoverage.usage_matrix over q
+        flattened segment-major, added in a single addMConstr call.
+
+        Returns:
+            gp.MConstr: The rows, named cell_capacity_<cell id>.
+        """
+        F = [pl['id'] for pl in plans_data]
+        # Only the (plan, segment) columns that have a q variable (all of them unless build_and_solve got columns)
+        present = [(i * len(F) + j, q_vars[f, s]) for i, s in enumerate(S) for j, f in enumerate(F) if (f, s) in q_vars]
+        q = gp.MVar.fromlist([v for _, v in present])
+        usage = cells.usage_matrix(S, [pl['data_limit'] for pl in plans_data])
+        if len(present) < len(S) * len(F):
+            usage = usage[:, [k for k, _ in present]]
+        return m.addMConstr(usage, q, GRB.LESS_EQUAL, cells.capacities,
+                            name=[f"cell_capacity_{c}" for c in cells.cell_ids])
+
+    # --- Sensitivity Analysis ---
+
+    def analyze_sensitivity(self, plans_data, segments_data, network_capacity, results, cannibalization_margin=5.0,
+                            env=None, cells=None):
+        """
+        Marginal values and ranging for a solution of build_and_solve.
+
+        The segment assignment of `results` is fixed, which leaves a concave QP
+        in the prices (see models/sensitivity.py) that Gurobi solves in
+        milliseconds and that has duals. Ranges are computed by an active-set
+        ratio test: inside them the same constraints stay binding and the
+        prices move linearly. They hold for the fixed assignment; a move that
+        makes another assignment more profitable needs a new build_and_solve.
+
+        Args:
+            plans_data, segments_data, network_capacity, cannibalization_margin: As for build_and_solve.
+            results (dict): Results of build_and_solve on the same data.
+            env (gp.Env): Gurobi environment to build the model in.
+            cells (CellCoverage): Per-cell capacities the results were solved with.
+
+        Returns:
+            dict: 'status', 'objective' and 'prices' of the fixed-assignment QP;
+                  'capacity' with 'capacity', 'usage', 'dual' (profit per extra GB),
+                  'dual_slope' (change of the dual per GB), 'range' (capacity values
+                  keeping the active set) and 'price_slope' ({plan_id: dp/dcapacity});
+                  'order' with {constraint name: {'dual' (profit per unit of margin), 'slack'}};
+                  'costs' with {plan_id: {'cost', 'marginal' (profit per unit cost), 'range'}};
+                  'cells' with {cell id: {'capacity', 'usage', 'dual'}} when cells are given;
+                  'active' (names of the binding constraints).
+                  None if the QP could not be solved.
+        """
+        if not GUROBI_AVAILABLE:
+            self.logger.error("Attempted to solve without Gurobi.")
+            return None
+
+        plans_data = sorted(plans_data, key=lambda x: x['data_limit'])
+        qp = fixed_assignment_qp(plans_data, segments_data, network_capacity, results['choices'],
+                                 cannibalization_margin, cells)
+        F, G, h, names = qp['F'], qp['G'], qp['h'], qp['names']
+        try:
+            timer = self._start_timer("sensitivity", len(F), len(segments_data))
+            with gp.Model("TelecomPricingSensitivity", env=env) as m:
+                m.setParam('OutputFlag', 0)
+                p = m.addVars(F, lb=0.0, name="price")
+                rows = {}
+                for i, name in enumerate(names):
+                    if name.startswith("nonneg_"):
+                        continue  # Price bounds; their multipliers are the reduced costs
+                    lhs = gp.quicksum(G[i, j] * p[f] for j, f in enumerate(F) if G[i, j] != 0)
+                    rows[i] = m.addConstr(lhs <= h[i], name=name)
+                m.setObjective(qp['const'] + gp.quicksum(qp['g'][j] * p[f] - 0.5 * qp['H'][j, j] * p[f] * p[f]
+                                                         for j, f in enumerate(F)), GRB.MAXIMIZE)
+                timer.lap('build')
+                m.optimize(timer.callback)
+                timer.lap('optimize')
+                if m.status != GRB.OPTIMAL:
+                    self._record_telemetry(timer, m, {})
+                    self.logger.warning(f"Sensitivity QP ended with status {m.status}")
+                    return None
+
+                price = [p[f].X for f in F]
+                # Multipliers of the rows G p <= h (Gurobi's Pi is d objective / d rhs)
+                mu = [rows[i].Pi if i in rows else -p[names[i][len("nonneg_"):]].RC for i in range(len(names))]
+                objective = m.objVal
+                timer.lap('extract')
+                self._record_telemetry(timer, m, {})
+        except gp.GurobiError as e:
+            self.logger.error(f"Gurobi Error in sensitivity analysis: {e}")
+            return None
+
+        price, mu = np.array(price), np.maximum(np.array(mu), 0.0)
+        slack = h - G @ price
+        cap_row = names.index("capacity_constr")
+
+        # Capacity: only the right-hand side of the capacity row moves
+        dh = np.zeros(len(h))
+        dh[cap_row] = 1.0
+        cap = parameter_range(qp, price, mu, np.zeros(len(F)), dh)
+        quantity = qp['A'] - qp['B'] * price
+        data_limit = np.array([pl['data_limit'] for pl in plans_data], dtype=float)
+
+        costs = {}
+        for j, pl in enumerate(plans_data):
+            dg = np.zeros(len(F))
+            dg[j] = qp['dg_dcost'][j]
+            t_lo, t_hi = parameter_range(qp, price, mu, dg, np.zeros(len(h)))['t_range']
+            costs[pl['id']] = {
+                'cost': pl['cost'],
+                'marginal': -float(quantity[j]),  # Envelope theorem: d profit / d cost = -quantity
+                'range': (float(pl['cost'] + t_lo), float(pl['cost'] + t_hi)),
+            }
+
+        t_lo, t_hi = cap['t_range']
+        cell_entries = {}
+        if cells is not None:
+            for i, name in enumerate(names):
+                if name.startswith("cell_capacity_"):
+                    cell = name[len("cell_capacity_"):]
+                    capacity = float(cells.capacities[cells.cell_ids.index(cell)])
+                    cell_entries[cell] = {'capacity': capacity, 'usage': capacity - float(slack[i]),
+                                          'dual': float(mu[i])}
+        return {
+            'status': 'Optimal',
+            'objective': objective,
+            'prices': dict(zip(F, price.tolist())),
+            'capacity': {
+                'capacity': network_capacity,
+                'usage': float(data_limit @ quantity),
+                'dual': float(mu[cap_row]),
+                'dual_slope': float(cap['dmu'][cap_row]),
+                'range': (float(network_capacity + t_lo), float(network_capacity + t_hi)),
+                'price_slope': dict(zip(F, cap['dp'].tolist())),
+            },
+            'order': {name: {'dual': -float(mu[i]), 'slack': float(slack[i])}
+                      for i, name in enumerate(names) if name.startswith("order_")},
+            'costs': costs,
+            'cells': cell_entries,
+            'active': [name for name, binding in zip(names, active_set(G, h, price)) if binding],
+        }
+
+    # --- Column Generation ---
+
+    def _assignment_duals(self, instance, mask, profit, usage, env=None):
+        """
+        Duals of the assignment LP over the candidate columns at fixed prices.
+
+        max sum profit * x  s.t.  sum_f x[f, s] = 1 (single_choice_s),
+        sum usage * x <= capacity (capacity_constr), 0 <= x <= 1.
+
+        Returns:
+            tuple: (pi (S,), lambda), or None if the LP has no optimal solution.
+        """
+        rows, cols = np.nonzero(mask)
+        with gp.Model("TelecomPricingAssignment", env=env) as m:
+            m.setParam('OutputFlag', 0)
+            x = m.addMVar(len(rows), ub=1.0, name="x")
+            by_segment = [[] for _ in range(instance.n_segments)]
+            for k, i in enumerate(rows):
+                by_segment[i].append(k)
+            single = [m.addConstr(gp.quicksum(x[k] for k in ks) == 1,
+                                  name=f"single_choice_{instance.segment_ids[i]}")
+                      for i, ks in enumerate(by_segment)]
+            capacity = m.addConstr(usage[rows, cols] @ x <= instance.capacity, name="capacity_constr")
+            m.setObjective(profit[rows, cols] @ x, GRB.MAXIMIZE)
+            m.optimize()
+            if m.status != GRB.OPTIMAL:
+                return None
+            # For a maximization Pi is d objective / d rhs
+            return np.array([c.Pi for c in single]), float(capacity.Pi)
+
+    def solve_column_generation(self, plans_data, segments_data, network_capacity, cannibalization_margin=5.0,
+                                columns_per_segment=2, max_new_columns=None, max_iter=20, tol=1e-6,
+                                verbose=False, params=None, env=None, time_limit=None, certify=False,
+                                certify_gap=1e-4, certify_time_limit=None):
+        """
+        Solves build_and_solve over a growing set of (plan, segment) columns.
+
+        The restricted master starts from the columns_per_segment best plans of each
+        segment at heuristic prices (models/price_search.py). After each master solve,
+        the duals of single_choice_* and capacity_constr from the assignment LP at the
+        master's prices price out the missing columns; the best one per segment is added
+        while its reduced cost exceeds tol. Once none is left, the columns attaining the
+        Lagrangian bound of models/column_generation.py are added if missing.
+
+        As prices are variables, reduced costs at the master's prices do not prove
+        optimality. The only guarantee of the method itself is the Lagrangian bound,
+        valid for the full formulation but loose when segments share prices
+        ('lagrangian_gap'). certify opts in to one solve of the full |F| x |S| model,
+        warm-started from the column-generation solution and stopped at certify_gap or
+        certify_time_limit: a check for instances where the full model is still
+        tractable, not part of the method. The reported bound is then the better of
+        the two; if the check finds a better solution, that solution is returned.
+
+        Args:
+            plans_data, segments_data, network_capacity, cannibalization_margin, verbose, params, env:
+                As for build_and_solve.
+            columns_per_segment (int): Initial columns per segment.
+            max_new_columns (int): Columns added per iteration at most (default: one per segment).
+            max_iter (int): Maximum number of master solves.
+            tol (float): Reduced cost below which a column is not improving.
+            time_limit (float): Time limit of each master solve, in seconds.
+            certify (bool): Also run the full-model check (off by default: on large menus
+                the full model is what column generation avoids).
+            certify_gap (float): Relative gap at which the check stops.
+            certify_time_limit (float): Time limit of the check (default: none; set one on
+                anything but small instances). Its bound holds when it stops early, only
+                less tight.
+
+        Returns:
+            dict: Results of the last master (build_and_solve format) with
+                  'column_generation': {'converged', 'iterations', 'columns',
+                  'full_columns', 'max_reduced_cost', 'bound', 'bound_lambda',
+                  'lagrangian_bound', 'lagrangian_gap', 'certified_bound', 'improved',
+                  'gap', 'history'}; 'certified_bound' is None without a successful
+                  check. None if a master solve failed.
+        """
+        if not GUROBI_AVAILABLE:
+            self.logger.error("Attempted to solve without Gurobi.")
+            return None
+
+        plans_data = sorted(plans_data, key=lambda x: x['data_limit'])
+        instance = PricingInstance.from_dicts(plans_data, segments_data, network_capacity)
+        F, S = list(instance.plan_ids), list(instance.segment_ids)
+
+        heuristic = search_prices(instance, cannibalization_margin, restarts=4)
+        start_prices = heuristic['prices'] if heuristic is not None else 2 * instance.cost
+        mask = initial_columns(instance, start_prices, columns_per_segment)
+        bound, bound_lambda = lagrangian_bound(instance)
+        rows = np.arange(len(S))
+        history = []
+        results, converged, max_rc = None, False, np.inf
+        for iteration in range(1, max_iter + 1):
+            # f-major order, like the full model
+            columns = [(F[j], S[i]) for j, i in zip(*np.nonzero(mask.T))]
+            results = self.build_and_solve(plans_data, segments_data, network_capacity, cannibalization_margin,
+                                           verbose, params, env, time_limit, columns=columns)
+            if results is None:
+                self.logger.warning(f"Column generation: master {iteration} failed")
+                return None
+
+            profit, usage, sellable = column_values(instance, price_vector(F, results['prices']))
+            duals = self._assignment_duals(instance, mask & sellable, profit, usage, env)
+            if duals is None:
+                self.logger.warning("Column generation: assignment LP not solved; stopping")
+                break
+            rc = reduced_costs(profit, usage, sellable, *duals)
+            rc[mask] = -np.inf
+            best_plan = np.argmax(rc, axis=1)
+            best_rc = rc[rows, best_plan]
+            max_rc = float(best_rc.max(initial=-np.inf))
+            improving = np.flatnonzero(best_rc > tol)
+            if max_new_columns is not None:
+                improving = improving[np.argsort(-best_rc[improving], kind='stable')[:max_new_columns]]
+            if len(improving) == 0:
+                # No improving column at these prices: add the columns the bound relies on
+                best_plan = bound_columns(instance, bound_lambda)
+                improving = np.flatnonzero(~mask[rows, best_plan])
+            history.append({'iteration': iteration, 'objective': results['objective'],
+                            'columns': int(mask.sum()), 'added': int(len(improving)),
+                            'max_reduced_cost': max_rc, 'capacity_dual': duals[1]})
+            self.logger.info(f"Column generation {iteration}: objective {results['objective']:.2f}, "
+                             f"{int(mask.sum())} columns, {len(improving)} improving")
+            if len(improving) == 0:
+                converged = True
+                break
+            mask[improving, best_plan[improving]] = True
+
+        certified_bound, improved = None, False
+        if certify:
+            check_params = dict(params or {}, MIPGap=certify_gap)
+            # Only a record written by the check itself may provide its bound
+            self.last_telemetry = None
+            check = self.build_and_solve(plans_data, segments_data, network_capacity, cannibalization_margin,
+                                         verbose, check_params, env, certify_time_limit, start=results)
+            record = self.last_telemetry or {}
+            if check is not None and record.get('bound') is not None:
+                certified_bound = float(record['bound'])
+            if check is not None and check['objective'] > results['objective'] + tol * max(abs(results['objective']), 1.0):
+                self.logger.info(f"Column generation: full check improved the objective to {check['objective']:.2f}")
+                results, improved = check, True
+            if certified_bound is None:
+                self.logger.warning("Column generation: full check gave no bound; using the Lagrangian bound")
+
+        objective = results['objective']
+        scale = max(abs(objective), 1e-9)
+        best_bound = bound if certified_bound is None else min(bound, certified_bound)
+        results['column_generation'] = {
+            'converged': converged,
+            'iterations': len(history),
+            'columns': int(mask.sum()),
+            'full_columns': len(F) * len(S),
+            'max_reduced_cost': max_rc,
+            'bound': best_bound,
+            'bound_lambda': bound_lambda,
+            'lagrangian_bound': bound,
+            'lagrangian_gap': max(bound - objective, 0.0) / scale,
+            'certified_bound': certified_bound,
+            'improved': improved,
+            'gap': max(best_bound - objective, 0.0) / scale,
+            'history': history,
+        }
+        return results
+
+    # --- Sample-Average (Stochastic) Model ---
+
+    def build_and_solve_saa(self, plans_data, scenarios, network_capacity, capacity_level=1.0,
+                            probabilities=None, cannibalization_margin=5.0, verbose=True, params=None):
+        """
+        Builds and solves the sample-average (extensive form) stochastic model.
+
+        Prices are shared by all scenarios; segment choices and quantities are
+        chosen per scenario. The objective is the expected profit. Capacity must
+        hold in scenarios with total probability >= capacity_level.
+
+        Args:
+            plans_data (list of dict): Plans, as for build_and_solve.
+            scenarios (list of list of dict): One segments_data list per demand scenario.
+            network_capacity (float): Total network capacity.
+            capacity_level (float): Probability with which capacity must hold (1.0 = every scenario).
+            probabilities (list of float): Scenario probabilities (default: uniform).
+            cannibalization_margin (float): Min price difference between ordered plans.
+            verbose (bool): Whether to print Gurobi logs.
+            params (dict): Gurobi parameters overriding the size-class profile.
+
+        Returns:
+            dict: 'status', 'objective' (expected profit), 'prices' and per-scenario
+                  'scenario_results' (as returned by build_and_solve), or None if failed.
+        """
+        if not GUROBI_AVAILABLE:
+            self.logger.error("Attempted to solve without Gurobi.")
+            return None
+
+        K = len(scenarios)
+        probs = [1.0 / K] * K if probabilities is None else list(probabilities)
+
+        try:
+            plans_data = sorted(plans_data, key=lambda x: x['data_limit'])
+            F = [pl['id'] for pl in plans_data]
+
+            n_segments = sum(len(seg) for seg in scenarios)
+            timer = self._start_timer("saa", len(F), n_segments)
+            m = gp.Model("TelecomPricingSAA")
+            m.setParam('OutputFlag', 1 if verbose else 0)
+            applied = self._apply_params(m, len(F), n_segments, params)
+
+            p = self._add_prices(m, F, cannibalization_margin)
+
+            handles = []
+            for k, segments_data in enumerate(scenarios):
+                tag = f"_k{k}"
+                handles.append(self._add_segment_choices(m, plans_data, segments_data, p, tag=tag))
+
+            # Capacity: hard in every scenario, or a chance constraint with violation indicators z_k
+            z = None
+            if capacity_level < 1.0:
+                z = m.addVars(K, vtype=GRB.BINARY, name="cap_violated")
+                m.addConstr(gp.quicksum(probs[k] * z[k] for k in range(K)) <= 1.0 - capacity_level,
+                            name="capacity_chance")
+            for k, segments_data in enumerate(scenarios):
+                usage = handles[k][3]
+                if z is None:
+                    m.addConstr(usage <= network_capacity, name=f"capacity_constr_k{k}")
+                else:
+                    # Usage can never exceed Σ_s max_f a * data_limit (q <= a since p >= 0)
+                    max_usage = sum(
+                        max([s['params'].get(pl['id'], {'a': 0})['a'] * pl['data_limit'] for pl in plans_data] + [0])
+                        for s in segments_data
+                    )
+                    M_cap = max(max_usage - network_capacity, 0.0)
+                    m.addConstr(usage <= network_capacity + M_cap * z[k], name=f"capacity_constr_k{k}")
+
+            m.setObjective(gp.quicksum(probs[k] * handles[k][4] for k in range(K)), GRB.MAXIMIZE)
+            timer.lap('build')
+            m.optimize(timer.callback)
+            timer.lap('optimize')
+
+            if m.status != GRB.OPTIMAL:
+                self._record_telemetry(timer, m, applied)
+                self.logger.warning(f"SAA optimization ended with status {m.status}")
+                return None
+
+            scenario_results = []
+            for k, segments_data in enumerate(scenarios):
+                x, y, q_vars, usage, profit = handles[k]
+                S = [s['id'] for s in segments_data]
+                scenario_results.append({
+                    'status': 'Optimal',
+                    'objective': profit.getValue(),
+                    'prices': {f: p[f].X for f in F},
+                    'quantities': {(f, s): q_vars[f, s].X for f in F for s in S},
+                    'choices': {(f, s): x[f, s].X for f in F for s in S},
+                    'active': {f: y[f].X for f in F},
+                    'total_usage': usage.getValue(),
+                })
+
+            timer.lap('extract')
+            self._record_telemetry(timer, m, applied)
+            return {
+                'status': 'Optimal',
+                'objective': m.objVal,
+                'prices': {f: p[f].X for f in F},
+                'probabilities': probs,
+                'scenario_results': scenario_results,
+                'capacity_violations': [r['total_usage'] > network_capacity + 1e-6 for r in scenario_results],
+            }
+
+        except gp.GurobiError as e:
+            self.logger.error(f"Gurobi Error: {e}")
+            return None
+        except Exception as e:
+            self.logger.exception("Unexpected error in SAA optimization")
+            return None
+
+    def solve_scenario_subproblem(self, plans_data, segments_data, network_capacity, cannibalization_margin=5.0,
+                                  w=None, rho=None, p_bar=None, fixed_prices=None, threads=None):
+        """
+        Solves one scenario of the progressive hedging decomposition.
+
+        Maximizes profit - Σ_f w_f p_f - Σ_f rho_f/2 (p_f - p_bar_f)^2 when w/rho/p_bar
+        are given, the plain scenario profit otherwise. With fixed_prices the prices
+        are fixed and only the segment choices are optimized.
+
+        Returns:
+            dict: Results as from build_and_solve ('objective' is the profit without
+                  the hedging terms), or None if the scenario is infeasible.
+        """
+        if not GUROBI_AVAILABLE:
+            self.logger.error("Attempted to solve without Gurobi.")
+            return None
+
+        plans_data = sorted(plans_data, key=lambda x: x['data_limit'])
+        F = [pl['id'] for pl in plans_data]
+        S = [s['id'] for s in segments_data]
+
+        timer = self._start_timer("scenario", len(F), len(S))
+        with gp.Env(params={'OutputFlag': 0}) as env, gp.Model("TelecomPricingScenario", env=env) as m:
+            applied = self._apply_params(m, len(F), len(S), None if threads is None else {'Threads': threads})
+            p = self._add_prices(m, F, cannibalization_margin, fixed_prices=fixed_prices)
+            x, y, q_vars, usage, profit = self._add_segment_choices(m, plans_data, segments_data, p)
+            m.addConstr(usage <= network_capacity, name="capacity_constr")
+
+            objective = profit
+            if w is not None and fixed_prices is None:
+                objective = profit - gp.quicksum(w[f] * p[f] for f in F) \
+                    - gp.quicksum(0.5 * rho[f] * (p[f] - p_bar[f]) * (p[f] - p_bar[f]) for f in F)
+            m.setObjective(objective, GRB.MAXIMIZE)
+            timer.lap('build')
+            m.optimize(timer.callback)
+            timer.lap('optimize')
+
+            if m.status != GRB.OPTIMAL:
+                self._record_telemetry(timer, m, applied)
+                return None
+            results = {
+                'status': 'Optimal',
+                'objective': profit.getValue(),
+                'prices': {f: p[f].X for f in F},
+                'quantities': {(f, s): q_vars[f, s].X for f in F for s in S},
+                'choices': {(f, s): x[f, s].X for f in F for s in S},
+                'active': {f: y[f].X for f in F},
+                'total_usage': usage.getValue(),
+            }
+            timer.lap('extract')
+            self._record_telemetry(timer, m, applied)
+            return results
+
+    def solve_progressive_hedging(self, plans_data, scenarios, network_capacity, probabilities=None,
+                                  cannibalization_margin=5.0, rho=None, max_iter=50, tol=0.01,
+                                  workers=None, verbose=False):
+        """
+        Solves the sample-average model by progressive hedging (scenario decomposition).
+
+        Every iteration solves the K scenario subproblems independently, in parallel
+        worker processes, then pulls their prices towards the probability-weighted
+        average p_bar. Capacity is enforced in every scenario (capacity_level = 1);
+        chance constraints couple the scenarios and need build_and_solve_saa.
+        As the subproblems are non-convex, the consensus is a heuristic solution.
+
+        Args:
+            plans_data (list of dict): Plans, as for build_and_solve.
+            scenarios (list of list of dict): One segments_data list per demand scenario.
+            network_capacity (float): Total network capacity.
+            probabilities (list of float): Scenario probabilities (default: uniform).
+            cannibalization_margin (float): Min price difference between ordered plans.
+            rho (float or dict): Penalty per plan. Default: 2 * mean slope b of the plan,
+                                 i.e. the profit curvature of a typical segment.
+            max_iter (int): Max hedging iterations.
+            tol (float): Stop when every scenario price is within tol of p_bar.
+            workers (int): Worker processes (default: CPU count); 1 solves in-process.
+            verbose (bool): Log the convergence per iteration.
+
+        Returns:
+            dict: 'status' ('Converged', 'MaxIterations', or 'CapacityViolated' if some
+                  scenario cannot meet capacity at the consensus prices), 'objective'
+                  (expected profit at the consensus prices, conditional on the feasible
+                  scenarios; None if there are none), 'feasible_probability' (their
+                  probability mass), 'prices', 'iterations', 'history' (max price
+                  deviation per iteration), 'scenario_results' (choices at the consensus
+                  prices, None if infeasible there) and 'capacity_violations'.
+        """
+        if not GUROBI_AVAILABLE:
+            self.logger.error("Attempted to solve without Gurobi.")
+            return None
+
+        K = len(scenarios)
+        probs = [1.0 / K] * K if probabilities is None else list(probabilities)
+        F = [pl['id'] for pl in sorted(plans_data, key=lambda x: x['data_limit'])]
+
+        if rho is None:
+            rho = {}
+            for f in F:
+                slopes = [s['params'].get(f, {'b': 0})['b'] for seg in scenarios for s in seg]
+                rho[f] = max(2.0 * sum(slopes) / max(len(slopes), 1), 1.0)
+        elif not isinstance(rho, dict):
+            rho = {f: float(rho) for f in F}
+
+        workers = min(workers or os.cpu_count() or 1, K)
+        threads = 1 if workers > 1 else None
+        base = (plans_data, network_capacity, cannibalization_margin)
+
+        executor = None
+        if workers > 1:
+            # 'spawn' gives each worker a clean process with its own Gurobi environment
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        run = executor.map if executor else map
+
+        try:
+            # Iteration 0: independent scenario solutions
+            jobs = [base + (seg, None, None, None, None, threads) for seg in scenarios]
+            sols = list(run(_solve_scenario_job, jobs))
+            if any(sol is None for sol in sols):
+                self.logger.warning("Progressive hedging: a scenario subproblem is infeasible.")
+                return None
+
+            p_bar = {f: sum(probs[k] * sols[k]['prices'][f] for k in range(K)) for f in F}
+            w = [{f: rho[f] * (sols[k]['prices'][f] - p_bar[f]) for f in F} for k in range(K)]
+            history = []
+            iterations = 0
+
+            for iterations in range(1, max_iter + 1):
+                deviation = max(abs(sol['prices'][f] - p_bar[f]) for sol in sols for f in F)
+                history.append(deviation)
+                if verbose:
+                    self.logger.info(f"PH iteration {iterations - 1}: max price deviation {deviation:.4f}")
+                if deviation <= tol:
+                    break
+
+                jobs = [base + (scenarios[k], w[k], rho, p_bar, None, threads) for k in range(K)]
+                sols = list(run(_solve_scenario_job, jobs))
+                if any(sol is None for sol in sols):
+                    self.logger.warning("Progressive hedging: a scenario subproblem is infeasible.")
+                    return None
+
+                p_bar = {f: sum(probs[k] * sols[k]['prices'][f] for k in range(K)) for f in F}
+                for k in range(K):
+                    for f in F:
+                        w[k][f] += rho[f] * (sols[k]['prices'][f] - p_bar[f])
+
+            # Evaluate the consensus prices: optimal choices per scenario at fixed p_bar
+            # (ordering holds for p_bar as it is a convex combination of ordered prices)
+            jobs = [base + (seg, None, None, None, p_bar, threads) for seg in scenarios]
+            final = list(run(_solve_scenario_job, jobs))
+        finally:
+            if executor:
+                executor.shutdown()
+
+        objective, feasible_probability = _conditional_objective(probs, final)
+        converged = bool(history) and history[-1] <= tol
+        if feasible_probability < sum(probs) - 1e-12:
+            status = 'CapacityViolated'
+            self.logger.warning(f"Progressive hedging: consensus prices violate capacity in "
+                                f"{sum(r is None for r in final)} of {K} scenarios.")
+        else:
+            status = 'Converged' if converged else 'MaxIterations'
+        return {
+            'status': status,
+            'objective': objective,
+            'feasible_probability': feasible_probability,
+            'prices': p_bar,
+            'probabilities': probs,
+            'iterations': iterations,
+            'history': history,
+            'scenario_results': final,
+            # Infeasible at p_bar means capacity cannot be met whatever the segments choose
+            'capacity_violations': [final[k] is None for k in range(K)],
+        }
+
+    # --- Portfolio Racing ---
+
+    def solve_race(self, plans_data, segments_data, network_capacity, cannibalization_margin=5.0,
+                   configurations=None, workers=None, time_limit=None, mip_gap=1e-4, log_path=None):
+        """
+        Races several solver configurations in parallel processes on one instance.
+
+        Racers share the best objective found so far. A racer stops as soon as its
+        bound shows it cannot beat the shared best by more than mip_gap, which also
+        proves the shared incumbent optimal and ends the race for everyone.
+        With workers=1 the racers run one after the other, each starting with the
+        shared best as Cutoff.
+
+        Args:
+            plans_data, segments_data, network_capacity, cannibalization_margin: As for build_and_solve.
+            configurations (list of dict): Racers (default: RACE_CONFIGURATIONS). Keys: 'name',
+                'params' (Gurobi parameters), 'formulation' (one of FORMULATIONS), or
+                'heuristic': True for the solver-free price search ('search' holds its options).
+            workers (int): Racer processes (default: CPU count).
+            time_limit (float): Time limit per racer in seconds.
+            mip_gap (float): Relative gap at which the race is decided.
+            log_path (str): Optional JSON-lines file; one line per race is appended.
+
+        Returns:
+            dict: Results of the winning racer, as returned by build_and_solve, with
+                  'status' 'Optimal' if the race was decided ('Feasible' otherwise) and a
+                  'race' record ('winner', 'proved_by', 'wall_time', per-racer 'racers').
+                  None if no racer found a solution.
+        """
+        if not GUROBI_AVAILABLE:
+            self.logger.error("Attempted to solve without Gurobi.")
+            return None
+
+        configurations = RACE_CONFIGURATIONS if configurations is None else configurations
+        workers = min(workers or os.cpu_count() or 1, len(configurations))
+        threads = max(1, (os.cpu_count() or 1) // workers) if workers > 1 else None
+
+        # 'spawn' gives each racer a clean process with its own Gurobi environment
+        ctx = multiprocessing.get_context('spawn')
+        best = ctx.Value('d', -math.inf)
+        stop = ctx.Event()
+        jobs = [(config, plans_data, segments_data, network_capacity, cannibalization_margin,
+                 time_limit, mip_gap, threads, self.profiles) for config in configurations]
+
+        start = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                     initializer=_init_racer, initargs=(best, stop)) as pool:
+                racers = list(pool.map(_race_job, jobs))
+        else:
+            _init_racer(best, stop)
+            try:
+                racers = [_race_job(job) for job in jobs]
+            finally:
+                _init_racer(None, None)
+        wall_time = time.perf_counter() - start
+
+        finished = [r for r in racers if r['results'] is not None]
+        if not finished:
+            self.logger.warning("Race ended without a solution.")
+            return None
+
+        # Best objective wins; among equal objectives a racer that proved it, then the fastest
+        top = max(r['objective'] for r in finished)
+        tol = mip_gap * max(abs(top), 1.0)
+        winner = min((r for r in finished if r['objective'] >= top - tol),
+                     key=lambda r: (not r['proved'], r['runtime']))
+        proved_by = [r['name'] for r in racers if r['proved']]
+
+        results = dict(winner['results'])
+        results['status'] = 'Optimal' if proved_by else 'Feasible'
+        results['race'] = {
+            'winner': winner['name'],
+            'proved_by': proved_by,
+            'wall_time': wall_time,
+            'racers': [{k: v for k, v in r.items() if k != 'results'} for r in racers],
+        }
+        self.logger.info(f"Race won by '{winner['name']}' in {wall_time:.2f}s (proved by {proved_by or 'none'})")
+
+        if log_path:
+            record = {'timestamp': time.time(), 'n_plans': len(plans_data), 'n_segments': len(segments_data)}
+            record.update({k: v for k, v in results['race'].items()})
+            with open(log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        return results
+
+    def _run_racer(self, config, plans_data, segments_data, network_capacity, cannibalization_margin,
+                   time_limit, mip_gap, threads=None):
+        """
+        Runs one racer against the shared state set by _init_racer.
+
+        Returns:
+            dict: 'name', 'status', 'objective', 'bound', 'runtime', 'proved' (the racer's
+                  bound proved the shared best) and 'results' (None without a solution).
+        """
+        start = time.perf_counter()
+        record = {'name': config['name'], 'params': config.get('params', {}),
+                  'formulation': config.get('formulation', 'bigm'), 'heuristic': bool(config.get('heuristic')),
+                  'status': 'Skipped', 'objective': None, 'bound': None, 'proved': False, 'results': None}
+        if _race_stop.is_set():
+            record['runtime'] = 0.0
+            return record
+
+        if config.get('heuristic'):
+            instance = PricingInstance.from_dicts(plans_data, segments_data, network_capacity)
+            found = search_prices(instance, cannibalization_margin, time_limit=time_limit,
+                                  should_stop=_race_stop.is_set,
+                                  on_improve=lambda profit, prices: _publish_incumbent(profit),
+                                  **config.get('search', {}))
+            record['status'] = 'Heuristic' if found else 'NoSolution'
+            if found:
+                record['objective'] = found['objective']
+                record['results'] = to_results(instance, found['evaluation'], status='Heuristic')
+            record['runtime'] = time.perf_counter() - start
+            return record
+
+        plans_data = sorted(plans_data, key=lambda x: x['data_limit'])
+        F = [pl['id'] for pl in plans_data]
+        S = [s['id'] for s in segments_data]
+        state = {'proved': False, 'stopped': False}
+        timer = self._start_timer("racer", len(F), len(S))
+
+        def callback(model, where):
+            timer.callback(model, where)
+            if where == GRB.Callback.MIPSOL:
+                _publish_incumbent(model.cbGet(GRB.Callback.MIPSOL_OBJ))
+            elif where == GRB.Callback.MIP:
+                if _race_stop.is_set():
+                    state['stopped'] = True
+                    model.terminate()
+                elif _race_decided(model.cbGet(GRB.Callback.MIP_OBJBND), mip_gap):
+                    # Nothing this racer could still find beats the shared best
+                    state['proved'] = True
+                    _race_stop.set()
+                    model.terminate()
+
+        with gp.Env(params={'OutputFlag': 0}) as env, gp.Model("TelecomPricingRacer", env=env) as m:
+            params = {} if threads is None else {'Threads': threads}
+            params.update(config.get('params', {}))
+            applied = self._apply_params(m, len(F), len(S), params)
+            m.setParam('MIPGap', mip_gap)
+            if time_limit is not None:
+                m.setParam('TimeLimit', time_limit)
+            if _race_best.value > -math.inf:
+                m.setParam('Cutoff', _race_best.value)
+
+            formulation = config.get('formulation', 'bigm')
+            p = self._add_prices(m, F, cannibalization_margin)
+            if formulation == 'indicator':
+                for f, ub in self._price_upper_bounds(plans_data, segments_data, cannibalization_margin).items():
+                    p[f].UB = ub
+            x, y, q_vars, total_data_usage, obj_expr = self._add_segment_choices(
+                m, plans_data, segments_data, p, formulation=formulation)
+            m.addConstr(total_data_usage <= network_capacity, name="capacity_constr")
+            m.setObjective(obj_expr, GRB.MAXIMIZE)
+            timer.lap('build')
+            m.optimize(callback)
+            timer.lap('optimize')
+
+            if m.status in (GRB.OPTIMAL, GRB.CUTOFF):
+                # Own incumbent proven, or no solution better than the shared best exists
+                state['proved'] = True
+                _race_stop.set()
+            record['status'] = {GRB.OPTIMAL: 'Optimal', GRB.CUTOFF: 'Cutoff', GRB.TIME_LIMIT: 'TimeLimit',
+                                GRB.INTERRUPTED: 'Proved' if state['proved'] else 'Stopped'
+                                }.get(m.status, f"Status {m.status}")
+            record['proved'] = state['proved']
+            if m.SolCount > 0:
+                record['objective'] = m.objVal
+                record['bound'] = m.ObjBound
+                record['results'] = {
+                    'status': 'Optimal' if m.status == GRB.OPTIMAL else 'Feasible',
+                    'objective': m.objVal,
+                    'prices': {f: p[f].X for f in F},
+                    'quantities': {(f,s): q_vars[f,s].X for f in F for s in S},
+                    'choices': {(f,s): x[f,s].X for f in F for s in S},
+                    'active': {f: y[f].X for f in F},
+                    'total_usage': total_data_usage.getValue()
+                }
+                timer.lap('extract')
+            applied.update(config=config['name'], formulation=formulation)
+            self._record_telemetry(timer, m, applied)
+        record['runtime'] = time.perf_counter() - start
+        return record
+
+
+def _conditional_objective(probs, results):
+    """
+    Expected objective over the scenarios with a result (None = infeasible), conditional on
+    them: their probabilities are rescaled to the total probability mass.
+
+    Returns:
+        tuple: (objective or None if no scenario is feasible, feasible probability mass).
+    """
+    mass = sum(p for p, r in zip(probs, results) if r is not None)
+    if mass <= 0:
+        return None, 0.0
+    total = sum(p * r['objective'] for p, r in zip(probs, results) if r is not None)
+    return total / mass * sum(probs), mass
+
+
+def _solve_scenario_job(job):
+    """Process-pool entry point: solves one progressive hedging subproblem."""
+    plans_data, network_capacity, margin, segments_data, w, rho, p_bar, fixed_prices, threads = job
+    return PricingModel().solve_scenario_subproblem(plans_data, segments_data, network_capacity, margin,
+                                                    w=w, rho=rho, p_bar=p_bar, fixed_prices=fixed_prices,
+                                                    threads=threads)
+
+
+# Racer configurations of solve_race: cheap heuristic first, then diverse MIP settings
+RACE_CONFIGURATIONS = [
+    {'name': 'heuristic', 'heuristic': True},
+    {'name': 'default'},
+    {'name': 'mipfocus1', 'params': {'MIPFocus': 1}},
+    {'name': 'mipfocus3', 'params': {'MIPFocus': 3}},
+    {'name': 'indicator', 'formulation': 'indicator'},
+    {'name': 'seed1', 'params': {'Seed': 1}},
+]
+
+# Race state shared by the racer processes (set by _init_racer)
+_race_best = None   # multiprocessing.Value('d'): best objective found by any racer
+_race_stop = None   # multiprocessing.Event: set once the race is decided
+
+
+def _init_racer(best, stop):
+    global _race_best, _race_stop
+    _race_best, _race_stop = best, stop
+
+
+def _publish_incumbent(objective):
+    with _race_best.get_lock():
+        if objective > _race_best.value:
+            _race_best.value = objective
+
+
+def _race_decided(bound, mip_gap):
+    """True if a racer with this (upper) bound cannot beat the shared best by more than mip_gap."""
+    best = _race_best.value
+    return best > -math.inf and bound - best <= mip_gap * abs(best)
+
+
+def _race_job(job):
+    """Process-pool entry point: runs one racer of solve_race."""
+    config, plans_data, segments_data, network_capacity, margin, time_limit, mip_gap, threads, profiles = job
+    return PricingModel(profiles=profiles)._run_racer(config, plans_data, segments_data, network_capacity,
+                                                      margin, time_limit, mip_gap, threads)
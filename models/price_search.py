@@ -0,0 +1,131 @@
+"""
+Solver-free heuristic search over price menus.
+
+Coordinate ascent on the prices: one plan at a time, every candidate price
+(segment reservation prices a/b and monopoly prices (a/b + cost)/2) is
+evaluated in one vectorized batch with models.evaluator, and the best one is
+kept. Segments choose plans with the 'profit' rule, which is the assignment
+build_and_solve makes when capacity is not binding, so a menu is feasible for
+the MIQP when every segment can buy a plan and total usage fits the capacity.
+"""
+import time
+
+import numpy as np
+
+from models.evaluator import evaluate_arrays, evaluate_prices, NO_PLAN
+
+
+def _violation(ev, capacity):
+    """Infeasibility per candidate: unserved segments plus relative capacity excess."""
+    unserved = (ev['choice'] == NO_PLAN).sum(axis=-1)
+    excess = np.maximum(ev['usage'].sum(axis=-1) - capacity, 0.0) / max(capacity, 1.0)
+    return unserved + excess
+
+
+def _candidate_prices(instance, max_candidates):
+    """Sorted candidate prices per plan (at most max_candidates, spread over the quantiles)."""
+    candidates = []
+    for j in range(instance.n_plans):
+        b = instance.b[:, j]
+        reservation = instance.a[b > 0, j] / b[b > 0]
+        values = np.unique(np.concatenate([reservation, (reservation + instance.cost[j]) / 2, [instance.cost[j]]]))
+        values = values[values >= 0]
+        if values.size > max_candidates:
+            values = np.unique(np.quantile(values, np.linspace(0, 1, max_candidates)))
+        candidates.append(values)
+    return candidates
+
+
+def _order_prices(prices, order, margin):
+    """Raise prices along the data-limit order so p_next >= p_prev + margin."""
+    prices = prices.copy()
+    for prev, nxt in zip(order, order[1:]):
+        prices[nxt] = max(prices[nxt], prices[prev] + margin)
+    return prices
+
+
+def search_prices(instance, cannibalization_margin=5.0, restarts=10, max_rounds=50, max_candidates=256,
+                  time_limit=None, seed=0, should_stop=None, on_improve=None):
+    """
+    Search for a good feasible price menu without the solver.
+
+    Args:
+        instance (PricingInstance): Instance to price.
+        cannibalization_margin (float): Min price difference between plans ordered by data_limit.
+        restarts (int): Random restarts after the first (deterministic) start.
+        max_rounds (int): Max coordinate-ascent rounds per start.
+        max_candidates (int): Max candidate prices tried per plan and step.
+        time_limit (float): Wall-clock limit in seconds (None = no limit).
+        seed (int): Seed of the random restarts.
+        should_stop (callable): Polled between steps; the search ends when it returns True.
+        on_improve (callable): Called with (profit, prices) for every new best feasible menu.
+
+    Returns:
+        dict: 'prices' (array aligned with instance.plan_ids), 'objective' and
+              'evaluation' (from evaluate_prices) of the best feasible menu, plus
+              'starts' (number of starts run); None if no feasible menu was found.
+    """
+    start_time = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    order = list(np.argsort(instance.data_limit, kind='stable'))
+    position = {j: k for k, j in enumerate(order)}
+    candidates = _candidate_prices(instance, max_candidates)
+    margin = cannibalization_margin
+
+    def out_of_time():
+        if should_stop is not None and should_stop():
+            return True
+        return time_limit is not None and time.perf_counter() - start_time > time_limit
+
+    best_prices, best_profit = None, -np.inf
+    starts = 0
+    for restart in range(restarts + 1):
+        if out_of_time():
+            break
+        starts += 1
+        if restart == 0:
+            prices = np.array([np.median(c) if c.size else 0.0 for c in candidates])
+        else:
+            prices = np.array([rng.choice(c) if c.size else 0.0 for c in candidates])
+        prices = _order_prices(prices, order, margin)
+        ev = evaluate_arrays(prices, instance.cost, instance.data_limit, instance.a, instance.b)
+        current = (_violation(ev, instance.capacity), ev['profit'].sum())
+
+        for _ in range(max_rounds):
+            improved = False
+            for j in order:
+                if out_of_time():
+                    break
+                # Keep the ordering with the neighbouring plans
+                k = position[j]
+                lo = prices[order[k - 1]] + margin if k > 0 else 0.0
+                hi = prices[order[k + 1]] - margin if k + 1 < len(order) else np.inf
+                trial = candidates[j][(candidates[j] >= lo) & (candidates[j] <= hi)]
+                trial = np.unique(np.concatenate([trial, [lo], [hi] if np.isfinite(hi) else []]))
+                batch = np.repeat(prices[None, :], trial.size, axis=0)
+                batch[:, j] = trial
+                ev = evaluate_arrays(batch, instance.cost, instance.data_limit, instance.a, instance.b)
+                violation, profit = _violation(ev, instance.capacity), ev['profit'].sum(axis=-1)
+                i = np.lexsort((-profit, violation))[0]
+                less_violation = violation[i] < current[0] - 1e-12
+                more_profit = violation[i] <= current[0] + 1e-12 and profit[i] > current[1] + 1e-9
+                if less_violation or more_profit:
+                    prices = batch[i]
+                    current = (violation[i], profit[i])
+                    improved = True
+            if not improved:
+                break
+
+        if current[0] == 0 and current[1] > best_profit:
+            best_prices, best_profit = prices.copy(), float(current[1])
+            if on_improve is not None:
+                on_improve(best_profit, best_prices)
+
+    if best_prices is None:
+        return None
+    return {
+        'prices': best_prices,
+        'objective': best_profit,
+        'evaluation': evaluate_prices(instance, best_prices),
+        'starts': starts,
+    }
@@ -0,0 +1,116 @@
+"""
+Counterfactual regret of segment choices.
+
+For every (segment, plan) pair, the quantity, revenue, profit and network
+usage the segment would produce if it were assigned that plan at fixed prices,
+and the regret: how much more (positive) or less (negative) profit that plan
+would have earned from the segment than the plan it actually chose. All pairs
+are computed at once as (S, F) arrays, so this scales to instances with tens
+of thousands of segments.
+
+Positive regret at the optimum means the optimizer deliberately gave up
+profit on that segment, e.g. to respect the network capacity.
+"""
+import numpy as np
+import pandas as pd
+
+from models.evaluator import NO_PLAN, evaluate_arrays, price_vector
+
+
+def choice_from_results(instance, results):
+    """
+    Chosen plan index per segment from a build_and_solve results dict.
+
+    Returns:
+        array: Shape (S,), plan index into instance.plan_ids or NO_PLAN.
+    """
+    plan_index = {str(pid): j for j, pid in enumerate(instance.plan_ids)}
+    segment_index = {str(sid): i for i, sid in enumerate(instance.segment_ids)}
+    choice = np.full(instance.n_segments, NO_PLAN, dtype=np.int64)
+    for (f, s), value in results['choices'].items():
+        if value > 0.5 and str(f) in plan_index and str(s) in segment_index:
+            choice[segment_index[str(s)]] = plan_index[str(f)]
+    return choice
+
+
+def regret_matrix(instance, prices, choice=None, rule='profit'):
+    """
+    Counterfactual outcomes of every segment under every plan at fixed prices.
+
+    A plan whose demand a - b*p is negative at its price sells nothing to the
+    segment (quantity 0), as in the evaluator.
+
+    Args:
+        instance (PricingInstance): Instance to analyze.
+        prices (dict or array): {plan_id: price} or prices aligned with instance.plan_ids.
+        choice (array): Actual plan index per segment (NO_PLAN for none), e.g. from
+            choice_from_results. Defaults to the choice of `rule` at these prices.
+        rule (str): Choice rule of models.evaluator, used when choice is None.
+
+    Returns:
+        dict: 'prices' (F,), 'choice' and 'best_plan' (S,), and (S, F) arrays
+              'quantity', 'revenue', 'profit', 'usage' and 'regret'.
+    """
+    p = price_vector(instance.plan_ids, prices)
+    if choice is None:
+        choice = evaluate_arrays(p, instance.cost, instance.data_limit, instance.a, instance.b, rule)['choice']
+    choice = np.asarray(choice, dtype=np.int64)
+
+    quantity = np.maximum(instance.a - instance.b * p, 0.0)   # (S, F)
+    revenue = quantity * p
+    profit = quantity * (p - instance.cost)
+    usage = quantity * instance.data_limit
+
+    rows = np.arange(instance.n_segments)
+    actual = np.where(choice != NO_PLAN, profit[rows, np.maximum(choice, 0)], 0.0)
+    regret = profit - actual[:, None]
+
+    return {
+        'prices': p,
+        'choice': choice,
+        'best_plan': np.argmax(profit, axis=1) if instance.n_plans else np.full(instance.n_segments, NO_PLAN),
+        'quantity': quantity,
+        'revenue': revenue,
+        'profit': profit,
+        'usage': usage,
+        'regret': regret,
+    }
+
+
+def regret_frame(instance, matrix):
+    """
+    Long-format DataFrame of a regret matrix, one row per (segment, plan).
+
+    Columns: segment, plan, price, chosen, quantity, revenue, profit, usage, regret.
+    """
+    n_s, n_f = matrix['profit'].shape
+    return pd.DataFrame({
+        'segment': np.repeat(instance.segment_ids, n_f),
+        'plan': np.tile(instance.plan_ids, n_s),
+        'price': np.tile(matrix['prices'], n_s),
+        'chosen': (matrix['choice'][:, None] == np.arange(n_f)).ravel(),
+        'quantity': matrix['quantity'].ravel(),
+        'revenue': matrix['revenue'].ravel(),
+        'profit': matrix['profit'].ravel(),
+        'usage': matrix['usage'].ravel(),
+        'regret': matrix['regret'].ravel(),
+    })
+
+
+def regret_summary(instance, matrix):
+    """
+    Per-plan aggregates: how many segments chose each plan, how many would have
+    been more profitable on it, and the total profit forgone on those.
+
+    Returns:
+        DataFrame indexed by plan with columns segments_chosen, segments_better
+        and forgone_profit.
+    """
+    regret = matrix['regret']
+    better = regret > 1e-9
+    return pd.DataFrame({
+        'segments_chosen': np.bincount(matrix['choice'][matrix['choice'] != NO_PLAN],
+                                       minlength=instance.n_plans),
+        'segments_better': better.sum(axis=0),
+        'forgone_profit': np.where(better, regret, 0.0).sum(axis=0),
+    }, index=pd.Index(instance.plan_ids, name='plan'))
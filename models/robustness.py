@@ -0,0 +1,215 @@
+"""
+Monte Carlo robustness analysis of a fixed price menu under demand uncertainty.
+
+Usage (demo data, needs Gurobi for the optimal prices):
+    python -m models.robustness [--draws 100000] [--sigma 0.1] [--workers 1]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.evaluator import evaluate_arrays, price_vector, NO_PLAN
+from models.instance import PricingInstance
+from models.optimization_model import PricingModel
+from utils.data_generator import generate_demo_data
+
+# Elements (draws x segments x plans) per chunk; bounds peak memory to a few hundred MB
+DEFAULT_CHUNK_ELEMENTS = 4000000
+
+
+def perturb_demand(a, b, n_draws, rng, a_sigma=0.1, b_sigma=0.1, common_sigma=0.0):
+    """
+    Draw perturbed demand matrices around the estimates.
+
+    Every (segment, plan) parameter is scaled by an independent, mean-preserving
+    lognormal factor. An optional common factor per draw shifts all intercepts
+    together (a market-wide demand shock). Zero parameters stay zero.
+
+    Returns:
+        (a_draws, b_draws): arrays of shape (n_draws, S, F).
+    """
+    shape = (n_draws,) + a.shape
+    a_factor = np.exp(a_sigma * rng.standard_normal(shape) - a_sigma ** 2 / 2)
+    b_factor = np.exp(b_sigma * rng.standard_normal(shape) - b_sigma ** 2 / 2)
+    if common_sigma > 0:
+        common = np.exp(common_sigma * rng.standard_normal((n_draws, 1, 1)) - common_sigma ** 2 / 2)
+        a_factor = a_factor * common
+    return a * a_factor, b * b_factor
+
+
+def sample_scenarios(instance, n_scenarios, a_sigma=0.1, b_sigma=0.1, common_sigma=0.0, seed=0):
+    """
+    Draw demand scenarios for the stochastic model (build_and_solve_saa and
+    solve_progressive_hedging).
+
+    Returns:
+        list of list of dict: One segments_data list per scenario.
+    """
+    rng = np.random.default_rng(seed)
+    a_draws, b_draws = perturb_demand(instance.a, instance.b, n_scenarios, rng, a_sigma, b_sigma, common_sigma)
+    scenarios = []
+    for a, b in zip(a_draws, b_draws):
+        scenario = PricingInstance(instance.plan_ids, instance.plan_names, instance.data_limit, instance.cost,
+                                   instance.segment_ids, instance.segment_names, instance.size,
+                                   a, b, instance.capacity)
+        scenarios.append(scenario.to_dicts()[1])
+    return scenarios
+
+
+def _simulate_chunk(seed, n_draws, prices, cost, data_limit, a, b, fixed_choice,
+                    a_sigma, b_sigma, common_sigma, rule):
+    """Evaluate one chunk of draws. Returns per-draw (profit, revenue, usage)."""
+    rng = np.random.default_rng(seed)
+    a_draws, b_draws = perturb_demand(a, b, n_draws, rng, a_sigma, b_sigma, common_sigma)
+
+    if fixed_choice is None:
+        # Segments re-choose their plan under each draw
+        ev = evaluate_arrays(prices, cost, data_limit, a_draws, b_draws, rule)
+        return ev['profit'].sum(axis=1), ev['revenue'].sum(axis=1), ev['usage'].sum(axis=1)
+
+    # Segments keep the nominal assignment; demand is clipped at zero
+    bought = fixed_choice != NO_PLAN
+    seg = np.flatnonzero(bought)
+    plan = fixed_choice[bought]
+    q = np.maximum(a_draws[:, seg, plan] - b_draws[:, seg, plan] * prices[plan], 0.0)
+    revenue = q @ prices[plan]
+    profit = q @ (prices[plan] - cost[plan])
+    usage = q @ data_limit[plan]
+    return profit, revenue, usage
+
+
+def simulate_robustness(instance, prices, n_draws=100000, a_sigma=0.1, b_sigma=0.1, common_sigma=0.0,
+                        seed=0, reassign=True, rule='profit', workers=1, chunk_size=None):
+    """
+    Evaluate a fixed price menu on many perturbed demand matrices.
+
+    Args:
+        instance (PricingInstance): Nominal instance (demand estimates and capacity).
+        prices (dict or array): Price menu, e.g. the 'prices' output of build_and_solve.
+        n_draws (int): Number of demand draws.
+        a_sigma, b_sigma (float): Relative noise on intercepts and slopes.
+        common_sigma (float): Relative market-wide shock on intercepts (0 = none).
+        seed (int): Random seed. Results do not depend on `workers`.
+        reassign (bool): If True, segments re-choose their plan in every draw
+                         (with `rule`); if False they keep the nominal choice.
+        rule (str): Segment choice rule (see models.evaluator.CHOICE_RULES).
+        workers (int): Processes to spread the draw chunks over.
+        chunk_size (int): Draws per chunk (default: from DEFAULT_CHUNK_ELEMENTS).
+
+    Returns:
+        dict: Per-draw arrays 'profit', 'revenue', 'usage', 'violation'
+              (usage - capacity) and the summary from summarize().
+    """
+    p = price_vector(instance.plan_ids, prices)
+    a, b = np.asarray(instance.a), np.asarray(instance.b)
+    fixed_choice = None
+    if not reassign:
+        fixed_choice = evaluate_arrays(p, instance.cost, instance.data_limit, a, b, rule)['choice']
+
+    if chunk_size is None:
+        chunk_size = max(1, DEFAULT_CHUNK_ELEMENTS // max(1, a.size))
+    counts = [min(chunk_size, n_draws - start) for start in range(0, n_draws, chunk_size)]
+    # One child seed per chunk, so the draws are identical for any number of workers
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    args = (p, instance.cost, instance.data_limit, a, b, fixed_choice, a_sigma, b_sigma, common_sigma, rule)
+
+    if workers > 1 and len(counts) > 1:
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            parts = list(pool.map(_simulate_chunk_star, [(s, n) + args for s, n in zip(seeds, counts)]))
+    else:
+        parts = [_simulate_chunk(s, n, *args) for s, n in zip(seeds, counts)]
+
+    profit = np.concatenate([part[0] for part in parts]) if parts else np.zeros(0)
+    revenue = np.concatenate([part[1] for part in parts]) if parts else np.zeros(0)
+    usage = np.concatenate([part[2] for part in parts]) if parts else np.zeros(0)
+
+    sim = {
+        'profit': profit,
+        'revenue': revenue,
+        'usage': usage,
+        'violation': usage - instance.capacity,
+    }
+    sim['summary'] = summarize(sim, instance.capacity)
+    return sim
+
+
+def _simulate_chunk_star(args):
+    return _simulate_chunk(*args)
+
+
+def summarize(sim, capacity, quantiles=(0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)):
+    """Summary statistics of the profit and capacity-violation distributions."""
+    profit, usage = sim['profit'], sim['usage']
+    if profit.size == 0:
+        return {}
+    excess = np.maximum(usage - capacity, 0.0)
+    var_5 = np.quantile(profit, 0.05)
+    return {
+        'n_draws': int(profit.size),
+        'expected_profit': float(profit.mean()),
+        'profit_std': float(profit.std()),
+        'profit_quantiles': {q: float(v) for q, v in zip(quantiles, np.quantile(profit, quantiles))},
+        # Mean profit over the worst 5% of draws
+        'profit_cvar_5': float(profit[profit <= var_5].mean()),
+        'expected_usage': float(usage.mean()),
+        'usage_quantiles': {q: float(v) for q, v in zip(quantiles, np.quantile(usage, quantiles))},
+        'violation_probability': float((excess > 0).mean()),
+        'expected_excess': float(excess.mean()),
+    }
+
+
+def format_summary(summary):
+    lines = [
+        f"Draws: {summary['n_draws']}",
+        f"Expected profit: ${summary['expected_profit']:,.2f} (std ${summary['profit_std']:,.2f})",
+        f"Profit 5% / 50% / 95%: ${summary['profit_quantiles'][0.05]:,.2f} / "
+        f"${summary['profit_quantiles'][0.5]:,.2f} / ${summary['profit_quantiles'][0.95]:,.2f}",
+        f"Profit CVaR(5%): ${summary['profit_cvar_5']:,.2f}",
+        f"Expected usage: {summary['expected_usage']:,.0f} GB "
+        f"(99% quantile {summary['usage_quantiles'][0.99]:,.0f} GB)",
+        f"Capacity violation probability: {100 * summary['violation_probability']:.2f}% "
+        f"(expected excess {summary['expected_excess']:,.0f} GB)",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Robustness of the optimal demo prices under demand noise.")
+    parser.add_argument("--draws", type=int, default=100000)
+    parser.add_argument("--sigma", type=float, default=0.1, help="Relative noise on a and b")
+    parser.add_argument("--common-sigma", type=float, default=0.0, help="Market-wide shock on a")
+    parser.add_argument("--capacity", type=float, default=None, help="Override the network capacity")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    model = PricingModel()
+    if not model.check_solver():
+        print("Gurobi not found.")
+        return
+
+    plans, segments, capacity = generate_demo_data()
+    if args.capacity is not None:
+        capacity = args.capacity
+    results = model.build_and_solve(plans, segments, capacity, verbose=False)
+    if not results:
+        print("Optimization failed.")
+        return
+
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    start = time.perf_counter()
+    sim = simulate_robustness(instance, results['prices'], n_draws=args.draws, a_sigma=args.sigma,
+                              b_sigma=args.sigma, common_sigma=args.common_sigma,
+                              workers=min(args.workers, os.cpu_count() or 1))
+    elapsed = time.perf_counter() - start
+    print(f"Nominal profit: ${results['objective']:,.2f}")
+    print(format_summary(sim['summary']))
+    print(f"Simulation time: {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Persistent store of optimization runs in a single SQLite file.
+
+Tables:
+    runs        one row per run: time, label, status, objective, capacity,
+                usage, sizes, options and telemetry (JSON)
+    run_plans   one row per (run, plan): price, active flag, segments,
+                quantity, revenue and usage
+    payloads    one row per (run, array): the inputs (a, b, size, cost,
+                data_limit, ids, names) and the per-segment solution
+                (choice, quantity), referencing a blob by digest
+    blobs       .npy bytes (dtype and shape included; ids and names are
+                stored as strings) keyed by their SHA-1, so runs of the
+                same instance share the input arrays
+
+Comparisons across many runs (price trajectories, profit versus capacity)
+only read the two scalar tables with one query each and pivot them into
+aligned frames; the array payloads are read only when a run is reloaded or
+an array is requested explicitly.
+"""
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.evaluator import NO_PLAN
+from models.instance import PricingInstance
+from models.regret import choice_from_results
+
+STORE_ENV = "PRICING_RUN_STORE"
+DEFAULT_STORE_PATH = "runs.sqlite"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    label TEXT,
+    status TEXT,
+    objective REAL,
+    capacity REAL,
+    total_usage REAL,
+    n_plans INTEGER,
+    n_segments INTEGER,
+    total_time REAL,
+    options TEXT,
+    telemetry TEXT
+);
+CREATE TABLE IF NOT EXISTS run_plans (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    plan_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    price REAL,
+    active REAL,
+    segments INTEGER,
+    quantity REAL,
+    revenue REAL,
+    usage REAL,
+    PRIMARY KEY (run_id, plan_id)
+);
+CREATE TABLE IF NOT EXISTS payloads (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+# Arrays kept per run (see save_run)
+INPUT_ARRAYS = ('plan_ids', 'plan_names', 'data_limit', 'cost', 'segment_ids', 'segment_names', 'size', 'a', 'b')
+SOLUTION_ARRAYS = ('prices', 'choice', 'quantity')
+
+
+def _to_blob(array):
+    array = np.asarray(array)
+    if array.dtype == object:
+        array = array.astype(str)
+    buf = io.BytesIO()
+    np.save(buf, array, allow_pickle=False)
+    return buf.getvalue()
+
+
+def _from_blob(blob):
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+class RunStore:
+    """
+    SQLite-backed history of optimization runs.
+
+    Use one RunStore per thread (SQLite connections are not shared across threads).
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Args:
+            path (str): SQLite file (created if needed), or ":memory:".
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def env_path():
+        """The path in PRICING_RUN_STORE, default runs.sqlite in the working directory."""
+        return os.environ.get(STORE_ENV) or DEFAULT_STORE_PATH
+
+    @classmethod
+    def from_env(cls):
+        """A store at env_path()."""
+        return cls(cls.env_path())
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Writing ---
+
+    def save_run(self, instance, results, options=None, telemetry=None, label=None):
+        """
+        Record one run.
+
+        Args:
+            instance (PricingInstance): The solved instance (inputs).
+            results (dict): Results of build_and_solve (or evaluator.to_results).
+            options (dict): Solve options, e.g. {'cannibalization_margin': 5.0}.
+            telemetry (dict): Telemetry record of the solve (PricingModel.last_telemetry).
+            label (str): Optional name of the run.
+
+        Returns:
+            int: The run id.
+        """
+        plan_ids = [str(pid) for pid in instance.plan_ids]
+        result_prices = {str(f): v for f, v in results['prices'].items()}
+        active = {str(f): v for f, v in results.get('active', {}).items()}
+        prices = np.array([result_prices.get(pid, np.nan) for pid in plan_ids], dtype=float)
+        choice = choice_from_results(instance, results)
+
+        # Quantity of each segment on its chosen plan
+        plan_index = {pid: j for j, pid in enumerate(plan_ids)}
+        segment_index = {str(sid): i for i, sid in enumerate(instance.segment_ids)}
+        quantity = np.zeros(instance.n_segments)
+        for (f, s), q in results['quantities'].items():
+            i, j = segment_index.get(str(s)), plan_index.get(str(f))
+            if i is not None and j is not None and choice[i] == j:
+                quantity[i] = q
+
+        bought = choice != NO_PLAN
+        idx = choice[bought]
+        n_f = instance.n_plans
+        segments = np.bincount(idx, minlength=n_f)
+        plan_quantity = np.bincount(idx, weights=quantity[bought], minlength=n_f)
+        plan_revenue = plan_quantity * prices
+        plan_usage = plan_quantity * instance.data_limit
+
+        total_time = (telemetry or {}).get('total_time')
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (created, label, status, objective, capacity, total_usage, n_plans, n_segments, "
+                "total_time, options, telemetry) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), label, results.get('status'), results.get('objective'), float(instance.capacity),
+                 results.get('total_usage'), n_f, instance.n_segments, total_time,
+                 json.dumps(options or {}), json.dumps(telemetry) if telemetry is not None else None))
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO run_plans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, pid, j, float(prices[j]), float(active.get(pid, 0.0)), int(segments[j]),
+                  float(plan_quantity[j]), float(plan_revenue[j]), float(plan_usage[j]))
+                 for j, pid in enumerate(plan_ids)])
+            arrays = {
+                'plan_ids': instance.plan_ids, 'plan_names': instance.plan_names,
+                'data_limit': instance.data_limit, 'cost': instance.cost,
+                'segment_ids': instance.segment_ids, 'segment_names': instance.segment_names,
+                'size': instance.size, 'a': instance.a, 'b': instance.b,
+                'prices': prices, 'choice': choice.astype(np.int32), 'quantity': quantity,
+            }
+            blobs = {name: _to_blob(array) for name, array in arrays.items()}
+            digests = {name: hashlib.sha1(blob).hexdigest() for name, blob in blobs.items()}
+            self.conn.executemany("INSERT OR IGNORE INTO blobs VALUES (?, ?)",
+                                  [(digests[name], blob) for name, blob in blobs.items()])
+            self.conn.executemany("INSERT INTO payloads VALUES (?, ?, ?)",
+                                  [(run_id, name, digest) for name, digest in digests.items()])
+        return run_id
+
+    def delete_run(self, run_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM payloads)")
+
+    # --- Queries (scalar tables, no payloads) ---
+
+    def runs(self, limit=None):
+        """
+        DataFrame of the runs table indexed by run_id, oldest first.
+
+        Args:
+            limit (int): Only the latest `limit` runs.
+        """
+        query = "SELECT * FROM runs ORDER BY run_id"
+        if limit is not None:
+            query = f"SELECT * FROM ({query} DESC LIMIT {int(limit)}) ORDER BY run_id"
+        frame = pd.read_sql_query(query, self.conn, index_col='run_id')
+        frame['created'] = pd.to_datetime(frame['created'], unit='s')
+        return frame
+
+    def plan_table(self, column='price', run_ids=None):
+        """
+        One per-plan column across runs, as a (runs x plans) DataFrame.
+
+        Plans are the union over the runs, in first-seen position order; a plan
+        missing from a run is NaN.
+
+        Args:
+            column (str): One of price, active, segments, quantity, revenue, usage.
+            run_ids (list): Runs to include (default: all).
+        """
+        if column not in ('price', 'active', 'segments', 'quantity', 'revenue', 'usage'):
+            raise ValueError(f"Unknown plan column '{column}'.")
+        query = f"SELECT run_id, plan_id, position, {column} FROM run_plans"
+        params = ()
+        if run_ids is not None:
+            run_ids = [int(r) for r in run_ids]
+            query += f" WHERE run_id IN ({','.join('?' * len(run_ids))})"
+            params = tuple(run_ids)
+        long = pd.read_sql_query(query, self.conn, params=params)
+        order = long.groupby('plan_id')['position'].min().sort_values(kind='stable').index
+        table = long.pivot(index='run_id', columns='plan_id', values=column).reindex(columns=order)
+        table.columns.name = 'plan'
+        return table
+
+    def profit_vs_capacity(self, run_ids=None):
+        """
+        Objective, usage and utilization against capacity, sorted by capacity.
+
+        Returns:
+            DataFrame indexed by run_id with columns capacity, objective, total_usage, utilization.
+        """
+        frame = self.runs()[['capacity', 'objective', 'total_usage', 'status']]
+        if run_ids is not None:
+            frame = frame.loc[list(run_ids)]
+        frame = frame.assign(utilization=frame['total_usage'] / frame['capacity'].where(frame['capacity'] > 0))
+        return frame.sort_values('capacity', kind='stable')
+
+    # --- Payloads ---
+
+    def array(self, name, run_ids=None):
+        """
+        One payload array for many runs, loaded with a single query.
+
+        Returns:
+            tuple: (run_ids, arrays). arrays is an (n_runs, ...) ndarray when the
+                   shapes agree (e.g. runs of the same instance), else a list.
+        """
+        if name not in INPUT_ARRAYS + SOLUTION_ARRAYS:
+            raise ValueError(f"Unknown payload '{name}'.")
+        query = "SELECT run_id, data FROM payloads JOIN blobs USING (digest) WHERE name = ?"
+        params = [name]
+        if run_ids is not None:
+            run_ids = [int(r) for r in run_ids]
+            query += f" AND run_id IN ({','.join('?' * len(run_ids))})"
+            params += run_ids
+        rows = self.conn.execute(query + " ORDER BY run_id", params).fetchall()
+        ids = [r[0] for r in rows]
+        arrays = [_from_blob(r[1]) for r in rows]
+        if arrays and all(a.shape == arrays[0].shape for a in arrays):
+            return ids, np.stack(arrays)
+        return ids, arrays
+
+    def load_run(self, run_id):
+        """
+        Reload one run.
+
+        Returns:
+            dict: The runs row ('options' and 'telemetry' decoded), 'instance'
+                  (PricingInstance) and the solution arrays 'prices', 'choice' and
+                  'quantity' aligned with the instance; None if the run does not exist.
+        """
+        cur = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        run = dict(zip([d[0] for d in cur.description], row))
+        run['options'] = json.loads(run['options']) if run['options'] else {}
+        run['telemetry'] = json.loads(run['telemetry']) if run['telemetry'] else None
+        payload = {name: _from_blob(data) for name, data in
+                   self.conn.execute(
+                       "SELECT name, data FROM payloads JOIN blobs USING (digest) WHERE run_id = ?", (run_id,))}
+        run['instance'] = PricingInstance(
+            payload['plan_ids'].astype(object), payload['plan_names'].astype(object), payload['data_limit'],
+            payload['cost'], payload['segment_ids'].astype(object), payload['segment_names'].astype(object),
+            payload['size'], payload['a'], payload['b'], run['capacity'])
+        for name in SOLUTION_ARRAYS:
+            run[name] = payload[name]
+        return run
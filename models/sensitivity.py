@@ -0,0 +1,185 @@
+"""
+Sensitivity analysis of the pricing model at a fixed segment assignment.
+
+With the choices x fixed, build_and_solve reduces to a concave QP in the
+prices. With A_f and B_f the sums of a and b over the segments choosing f:
+
+    max  sum_f (p_f - c_f) * (A_f - B_f * p_f)
+    s.t. p_next - p_f >= margin                         (order_*)
+         sum_f d_f * (A_f - B_f * p_f) <= capacity      (capacity_constr)
+         a_fs - b_fs * p_f >= 0 for chosen (f, s)       (demand_*)
+         per-cell usage <= cell capacity                (cell_capacity_*, optional)
+         p >= 0
+
+PricingModel.analyze_sensitivity solves it with Gurobi for the duals; this
+module holds the parametric (active-set) ranging. Along a parameter t that
+shifts the gradient and right-hand sides linearly, the KKT system of the
+active constraints gives dp/dt and dmu/dt; the range ends where a multiplier
+reaches 0 or an inactive constraint becomes binding (ratio test). Within the
+range the same constraints stay binding and the prices move linearly; the
+assignment itself is held fixed, so a large move may make another
+assignment better (re-solve the MIQP to check).
+"""
+import numpy as np
+
+# Constraints with a slack below this (relative to the right-hand side) count as binding
+ACTIVE_TOL = 1e-6
+
+
+def fixed_assignment_qp(plans_data, segments_data, network_capacity, choices, cannibalization_margin=5.0,
+                        cells=None):
+    """
+    The fixed-assignment QP in the form max g.p - 1/2 p'Hp + const, s.t. G p <= h.
+
+    Args:
+        plans_data (list of dict): Plans sorted by data_limit.
+        segments_data (list of dict): Segments with their demand params.
+        network_capacity (float): Capacity (GB).
+        choices (dict): {(plan_id, segment_id): x} as in build_and_solve results.
+        cannibalization_margin (float): Min price difference between ordered plans.
+        cells (CellCoverage): Optional per-cell capacities (models/cells.py).
+
+    Returns:
+        dict: 'F', 'H' (F, F), 'g' (F,), 'const', 'G' (m, F), 'h' (m,), 'names' (m,),
+              'A', 'B' (F,) and 'dg_dcost' (F,), the gradient change per unit cost.
+    """
+    F = [pl['id'] for pl in plans_data]
+    n_f = len(F)
+    # Demand of the chosen (segment, plan) pairs, zero elsewhere: (S, F)
+    xa, xb = np.zeros((len(segments_data), n_f)), np.zeros((len(segments_data), n_f))
+    demand_rows = []
+    for j, f in enumerate(F):
+        for i, seg in enumerate(segments_data):
+            if choices.get((f, seg['id']), 0) > 0.5:
+                param = seg['params'].get(f, {'a': 0, 'b': 0})
+                xa[i, j], xb[i, j] = param['a'], param['b']
+                demand_rows.append((f"demand_{f}_{seg['id']}", j, param['a'], param['b']))
+    A, B = xa.sum(axis=0), xb.sum(axis=0)
+    cost = np.array([pl['cost'] for pl in plans_data], dtype=float)
+    data_limit = np.array([pl['data_limit'] for pl in plans_data], dtype=float)
+
+    rows, rhs, names = [], [], []
+    for j in range(n_f - 1):
+        row = np.zeros(n_f)
+        row[j], row[j + 1] = 1.0, -1.0          # p_f - p_next <= -margin
+        rows.append(row)
+        rhs.append(-cannibalization_margin)
+        names.append(f"order_{F[j]}_{F[j + 1]}")
+    rows.append(-data_limit * B)                 # -sum d B p <= cap - sum d A
+    rhs.append(network_capacity - float(data_limit @ A))
+    names.append("capacity_constr")
+    if cells is not None:
+        S = [seg['id'] for seg in segments_data]
+        cell_a, cell_b = cells.plan_rows(S, xa), cells.plan_rows(S, xb)   # (cells, F)
+        for c, cell in enumerate(cells.cell_ids):
+            rows.append(-data_limit * cell_b[c])
+            rhs.append(cells.capacities[c] - float(data_limit @ cell_a[c]))
+            names.append(f"cell_capacity_{cell}")
+    for name, j, a_val, b_val in demand_rows:
+        row = np.zeros(n_f)
+        row[j] = b_val                           # b p <= a
+        rows.append(row)
+        rhs.append(a_val)
+        names.append(name)
+    for j, f in enumerate(F):
+        row = np.zeros(n_f)
+        row[j] = -1.0                            # -p <= 0
+        rows.append(row)
+        rhs.append(0.0)
+        names.append(f"nonneg_{f}")
+
+    return {
+        'F': F,
+        'H': np.diag(2 * B),
+        'g': A + cost * B,
+        'const': -float(cost @ A),
+        'G': np.array(rows).reshape(len(rows), n_f),
+        'h': np.array(rhs, dtype=float),
+        'names': names,
+        'A': A,
+        'B': B,
+        'dg_dcost': B.copy(),
+    }
+
+
+def active_set(G, h, p, tol=ACTIVE_TOL):
+    """Boolean mask of the rows of G p <= h that are binding at p."""
+    slack = h - G @ p
+    return slack <= tol * (1.0 + np.abs(h))
+
+
+def parametric_direction(H, G, active, dg, dh):
+    """
+    Solve the KKT system of the active constraints for (dp/dt, dmu/dt).
+
+    Degenerate systems (singular Hessian rows or dependent active rows) are
+    solved in the least-squares sense.
+    """
+    n = H.shape[0]
+    G_w = G[active]
+    k = G_w.shape[0]
+    K = np.block([[H, G_w.T], [G_w, np.zeros((k, k))]])
+    rhs = np.concatenate([dg, dh[active]])
+    sol = np.linalg.lstsq(K, rhs, rcond=None)[0]
+    return sol[:n], sol[n:]
+
+
+def ratio_test(G, h, p, mu, active, dp, dmu, dh):
+    """
+    Largest interval [t_lo, t_hi] around 0 over which the active set is unchanged.
+
+    Args:
+        mu (array): Multipliers (>= 0) of the active rows, in row order.
+        dp, dmu (array): Directions from parametric_direction.
+        dh (array): Change of the right-hand sides per unit t (all rows).
+
+    Returns:
+        tuple: (t_lo, t_hi), possibly infinite.
+    """
+    t_lo, t_hi = -np.inf, np.inf
+    mu = np.maximum(mu, 0.0)
+    # Multipliers of active rows must stay non-negative
+    for m_i, d_i in zip(mu, dmu):
+        if d_i < -1e-12:
+            t_hi = min(t_hi, m_i / -d_i)
+        elif d_i > 1e-12:
+            t_lo = max(t_lo, -m_i / d_i)
+    # Inactive rows must stay feasible: G_j (p + t dp) <= h_j + t dh_j
+    inactive = ~active
+    slack = (h - G @ p)[inactive]
+    rate = (G @ dp - dh)[inactive]
+    for s_j, r_j in zip(slack, rate):
+        if r_j > 1e-12:
+            t_hi = min(t_hi, s_j / r_j)
+        elif r_j < -1e-12:
+            t_lo = max(t_lo, s_j / r_j)
+    return min(t_lo, 0.0), max(t_hi, 0.0)
+
+
+def parameter_range(qp, p, mu, dg, dh):
+    """
+    Ranging along one parameter direction at the optimum p with multipliers mu (all rows).
+
+    Returns:
+        dict: 't_range' (t_lo, t_hi), 'dp' (F,) and 'dmu' (all rows, 0 off the active set).
+    """
+    active = active_set(qp['G'], qp['h'], p)
+    dp, dmu_w = parametric_direction(qp['H'], qp['G'], active, dg, dh)
+    t_range = ratio_test(qp['G'], qp['h'], p, mu[active], active, dp, dmu_w, dh)
+    dmu = np.zeros(len(qp['h']))
+    dmu[active] = dmu_w
+    return {'t_range': t_range, 'dp': dp, 'dmu': dmu}
+
+
+def capacity_gain(sensitivity, delta):
+    """
+    Exact profit change from adding `delta` GB of capacity at the fixed assignment.
+
+    Inside the capacity range the dual varies linearly, so the change is
+    dual * delta + slope * delta^2 / 2. Returns None outside the range.
+    """
+    cap = sensitivity['capacity']
+    lo, hi = cap['range']
+    if not lo - 1e-9 <= cap['capacity'] + delta <= hi + 1e-9:
+        return None
+    return cap['dual'] * delta + 0.5 * cap['dual_slope'] * delta * delta
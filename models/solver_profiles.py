@@ -0,0 +1,57 @@
+"""
+Solver parameter profiles per instance size class.
+
+A profile file (JSON) holds an ordered list of size classes. Each class has
+an upper bound on the number of (segment, plan) pairs, i.e. binary choice
+variables, and the Gurobi parameters that performed best on instances of that
+size (see models/tuning.py, which writes these files):
+
+    {
+      "version": 1,
+      "size_classes": [
+        {"name": "small", "max_pairs": 16, "params": {"MIPFocus": 1}},
+        {"name": "large", "max_pairs": null, "params": {}}
+      ]
+    }
+
+The last class should have "max_pairs": null so every instance size is covered.
+"""
+import json
+import os
+
+PROFILE_VERSION = 1
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solver_profiles.json")
+
+
+def load_profiles(path=DEFAULT_PROFILE_PATH):
+    """Load a profile file. Returns an empty profile if the file does not exist."""
+    if not os.path.exists(path):
+        return {'version': PROFILE_VERSION, 'size_classes': []}
+    with open(path) as f:
+        profiles = json.load(f)
+    if profiles.get('version') != PROFILE_VERSION:
+        raise ValueError(f"Unsupported profile version: {profiles.get('version')}")
+    return profiles
+
+
+def save_profiles(profiles, path=DEFAULT_PROFILE_PATH):
+    with open(path, "w") as f:
+        json.dump(profiles, f, indent=2)
+        f.write("\n")
+
+
+def size_class(profiles, n_plans, n_segments):
+    """Return the first size class that fits the instance, or None if there are none."""
+    pairs = n_plans * n_segments
+    classes = profiles.get('size_classes', [])
+    for cls in classes:
+        if cls.get('max_pairs') is None or pairs <= cls['max_pairs']:
+            return cls
+    # Larger than every bounded class: use the largest one
+    return classes[-1] if classes else None
+
+
+def select_params(profiles, n_plans, n_segments):
+    """Return the Gurobi parameters ({name: value}) of the matching size class."""
+    cls = size_class(profiles, n_plans, n_segments)
+    return dict(cls['params']) if cls else {}
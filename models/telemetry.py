@@ -0,0 +1,228 @@
+"""
+Structured telemetry of solves, exported as JSON lines and Prometheus text.
+
+PricingModel fills one record per solve (build_and_solve, the stochastic
+models and racers) and keeps the latest in PricingModel.last_telemetry. When a
+TelemetryLog is configured, either explicitly or through the PRICING_TELEMETRY
+environment variable (path of a .jsonl file), every record is appended to it.
+Worker processes inherit the variable, so pooled solves are recorded too.
+
+Record fields:
+    timestamp, solve, n_plans, n_segments, size_class, num_vars, num_bin_vars,
+    num_constrs, num_qconstrs, num_genconstrs, params,
+    build_time, presolve_time (part of optimize_time), optimize_time,
+    extract_time, total_time (s),
+    solver_runtime (s, Gurobi Runtime), work (work units), node_count,
+    iter_count, mip_gap, objective, bound, status
+    error (failed solves only; their status is ERROR and solver fields are null)
+
+Usage (histograms for the Prometheus node-exporter textfile collector):
+    python -m models.telemetry telemetry.jsonl metrics.prom
+"""
+import argparse
+import json
+import math
+import os
+import time
+
+from utils.profiling import tracer
+
+TELEMETRY_ENV = "PRICING_TELEMETRY"
+PHASES = ('build', 'presolve', 'optimize', 'extract')
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+try:
+    from gurobipy import GRB
+    _STATUS_NAMES = {getattr(GRB.Status, name): name for name in dir(GRB.Status) if name.isupper()}
+except ImportError:
+    GRB = None
+    _STATUS_NAMES = {}
+
+
+class SolveTimer:
+    """
+    Times the phases of one solve.
+
+    Call lap('build') once the model is built, pass callback to optimize()
+    (it notes when presolve ends), lap('optimize') after it and lap('extract')
+    once the results are read. finish() returns the record. The phases are
+    also recorded as spans when tracing (utils.profiling) is enabled.
+    """
+
+    def __init__(self, solve, n_plans, n_segments, size_class=None):
+        self.record = {'timestamp': time.time(), 'solve': solve, 'n_plans': n_plans,
+                       'n_segments': n_segments, 'size_class': size_class}
+        self.start = self._last = time.perf_counter()
+        self.presolve_end = None
+        self.optimize_start = None
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.record[f"{phase}_time"] = now - self._last
+        if phase == 'optimize':
+            self.optimize_start = self._last
+        tracer.complete(f"{self.record['solve']}.{phase}", self._last, now, cat="solve")
+        self._last = now
+
+    def callback(self, model, where):
+        # The first callback after presolve (simplex, MIP, barrier...) marks its end
+        if self.presolve_end is None and where not in (GRB.Callback.POLLING, GRB.Callback.PRESOLVE,
+                                                       GRB.Callback.MESSAGE):
+            self.presolve_end = model.cbGet(GRB.Callback.RUNTIME)
+
+    def finish(self, m, params=None):
+        """Complete the record from the solved model and return it."""
+        record = self.record
+        record['total_time'] = time.perf_counter() - self.start
+        record['params'] = params or {}
+        record['status'] = _STATUS_NAMES.get(m.status, str(m.status))
+        for key, attr in (('num_vars', 'NumVars'), ('num_bin_vars', 'NumBinVars'), ('num_constrs', 'NumConstrs'),
+                          ('num_qconstrs', 'NumQConstrs'), ('num_genconstrs', 'NumGenConstrs'),
+                          ('solver_runtime', 'Runtime'), ('work', 'Work'), ('node_count', 'NodeCount'),
+                          ('iter_count', 'IterCount')):
+            record[key] = _attr(m, attr)
+        has_solution = (_attr(m, 'SolCount') or 0) > 0
+        record['objective'] = _attr(m, 'ObjVal') if has_solution else None
+        record['bound'] = _attr(m, 'ObjBound')
+        record['mip_gap'] = _attr(m, 'MIPGap') if has_solution else None
+        if record['mip_gap'] is not None and math.isinf(record['mip_gap']):
+            record['mip_gap'] = None
+        runtime = record['solver_runtime'] or 0.0
+        record['presolve_time'] = runtime if self.presolve_end is None else self.presolve_end
+        if self.optimize_start is not None:
+            tracer.complete(f"{record['solve']}.presolve", self.optimize_start,
+                            self.optimize_start + record['presolve_time'], cat="solve")
+        for phase in PHASES:
+            record.setdefault(f"{phase}_time", None)
+        return record
+
+
+    def fail(self, error, params=None):
+        """Record of a solve that raised (Gurobi or model errors) instead of finishing."""
+        record = self.record
+        record['total_time'] = time.perf_counter() - self.start
+        record['params'] = params or {}
+        record['status'] = 'ERROR'
+        record['error'] = str(error)
+        for key in ('num_vars', 'num_bin_vars', 'num_constrs', 'num_qconstrs', 'num_genconstrs', 'solver_runtime',
+                    'work', 'node_count', 'iter_count', 'objective', 'bound', 'mip_gap'):
+            record.setdefault(key, None)
+        for phase in PHASES:
+            record.setdefault(f"{phase}_time", None)
+        return record
+
+
+def _attr(m, name):
+    try:
+        value = getattr(m, name)
+    except Exception:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class TelemetryLog:
+    """Appends telemetry records to a JSON-lines file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def from_env(cls):
+        """A log at the path in PRICING_TELEMETRY, or None if it is not set."""
+        path = os.environ.get(TELEMETRY_ENV)
+        return cls(path) if path else None
+
+    def record(self, record):
+        # One write per record, so concurrent worker processes do not interleave lines
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _labels(**labels):
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def _histogram(lines, name, samples, buckets):
+    """Append the bucket/sum/count lines of one histogram per label set."""
+    for labels, values in sorted(samples.items()):
+        for bound in buckets:
+            count = sum(1 for v in values if v <= bound)
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {len(values)}')
+        lines.append(f"{name}_sum{{{labels}}} {sum(values):.6f}")
+        lines.append(f"{name}_count{{{labels}}} {len(values)}")
+
+
+def prometheus_text(records, buckets=DEFAULT_BUCKETS):
+    """Render telemetry records as Prometheus text-format histograms and counters."""
+    totals, phases, solves, nodes, iterations = {}, {}, {}, {}, {}
+    for r in records:
+        size_class = r.get('size_class') or "unclassified"
+        by_status = _labels(solve=r['solve'], size_class=size_class, status=r['status'])
+        by_class = _labels(solve=r['solve'], size_class=size_class)
+        totals.setdefault(by_status, []).append(r['total_time'])
+        solves[by_status] = solves.get(by_status, 0) + 1
+        nodes[by_class] = nodes.get(by_class, 0) + (r.get('node_count') or 0)
+        iterations[by_class] = iterations.get(by_class, 0) + (r.get('iter_count') or 0)
+        for phase in PHASES:
+            if r.get(f"{phase}_time") is not None:
+                key = _labels(solve=r['solve'], size_class=size_class, phase=phase)
+                phases.setdefault(key, []).append(r[f"{phase}_time"])
+
+    lines = ["# HELP pricing_solve_seconds Wall time of a solve, build to extracted results.",
+             "# TYPE pricing_solve_seconds histogram"]
+    _histogram(lines, "pricing_solve_seconds", totals, buckets)
+    lines += ["# HELP pricing_solve_phase_seconds Wall time per solve phase.",
+              "# TYPE pricing_solve_phase_seconds histogram"]
+    _histogram(lines, "pricing_solve_phase_seconds", phases, buckets)
+    for name, help_text, values in (
+            ("pricing_solves_total", "Solves by final status.", solves),
+            ("pricing_solve_nodes_total", "Branch-and-bound nodes explored.", nodes),
+            ("pricing_solve_iterations_total", "Simplex iterations.", iterations)):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{{{labels}}} {value:g}" for labels, value in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(records, path, buckets=DEFAULT_BUCKETS):
+    """Write the metrics atomically, as the textfile collector expects."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text(records, buckets))
+    os.replace(tmp, path)
+
+
+def latency_percentiles(records, quantiles=(0.5, 0.95, 0.99)):
+    """{size_class: {quantile: total_time}} over the records."""
+    by_class = {}
+    for r in records:
+        by_class.setdefault(r.get('size_class') or "unclassified", []).append(r['total_time'])
+    summary = {}
+    for size_class, values in by_class.items():
+        values.sort()
+        summary[size_class] = {q: values[min(len(values) - 1, int(q * len(values)))] for q in quantiles}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export solve telemetry as Prometheus metrics.")
+    parser.add_argument("telemetry", help="JSON-lines telemetry file")
+    parser.add_argument("metrics", help="Prometheus text file to write")
+    args = parser.parse_args(argv)
+
+    records = read_records(args.telemetry)
+    write_prometheus(records, args.metrics)
+    for size_class, quantiles in sorted(latency_percentiles(records).items()):
+        print(f"{size_class}: " + ", ".join(f"p{int(q * 100)} {v:.3f}s" for q, v in quantiles.items()))
+    print(f"{len(records)} records exported to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Tuning harness for the solver parameter profiles (models/solver_profiles.py).
+
+For every size class, random instances (utils.data_generator.generate_random_instance)
+are solved with each candidate parameter set. The set with the lowest shifted
+geometric mean of Gurobi work units wins; runs that hit the time limit count
+double. Optionally Gurobi's own tuner (model.tune()) proposes one more candidate
+per class, and that candidate is then scored like the others.
+
+Usage (needs Gurobi):
+    python -m models.tuning [--out models/solver_profiles.json] [--instances 3]
+        [--time-limit 10] [--gurobi-tune 0]
+"""
+import argparse
+import math
+import os
+import tempfile
+
+from models.optimization_model import PricingModel, GUROBI_AVAILABLE, gp, GRB
+from models.solver_profiles import PROFILE_VERSION, DEFAULT_PROFILE_PATH, save_profiles
+from utils.data_generator import generate_random_instance
+
+# Instances are generated at the upper end of each class. The defaults stay
+# within the size-limited Gurobi license (about 200 variables for quadratic models).
+SIZE_CLASSES = [
+    {'name': 'small', 'max_pairs': 16, 'n_plans': 4, 'n_segments': 4},
+    {'name': 'medium', 'max_pairs': 40, 'n_plans': 4, 'n_segments': 10},
+    {'name': 'large', 'max_pairs': None, 'n_plans': 4, 'n_segments': 20},
+]
+
+CANDIDATES = [
+    {},
+    {'MIPFocus': 1},
+    {'MIPFocus': 2},
+    {'MIPFocus': 3},
+    {'Presolve': 2},
+    {'Heuristics': 0.2},
+    {'Cuts': 2},
+    {'NonConvex': 2},
+]
+
+# A candidate must beat the defaults by this factor to be selected
+MIN_IMPROVEMENT = 0.95
+# Shift of the geometric mean, in work units, so trivial solves do not dominate
+WORK_SHIFT = 0.01
+# Parameters that control logging or the harness itself, never stored in a profile
+_IGNORED_PARAMS = {'outputflag', 'logtoconsole', 'logfile', 'timelimit', 'seed'}
+
+
+def build_tuning_model(instance, cannibalization_margin=5.0):
+    """Build (but do not solve) the pricing model of a PricingInstance."""
+    plans, segments, capacity = instance.to_dicts()
+    plans = sorted(plans, key=lambda x: x['data_limit'])
+    pricing = PricingModel(profiles={})
+
+    m = gp.Model("TelecomPricingTuning")
+    m.setParam('OutputFlag', 0)
+    p = pricing._add_prices(m, [pl['id'] for pl in plans], cannibalization_margin)
+    _, _, _, usage, obj_expr = pricing._add_segment_choices(m, plans, segments, p)
+    m.addConstr(usage <= capacity, name="capacity_constr")
+    m.setObjective(obj_expr, GRB.MAXIMIZE)
+    return m
+
+
+def run_candidate(instance, params, time_limit):
+    """
+    Solve one instance with the given parameters.
+
+    Returns:
+        dict: 'work' (work units), 'runtime' (s), 'solved' and 'objective'.
+    """
+    m = build_tuning_model(instance)
+    try:
+        m.setParam('TimeLimit', time_limit)
+        for name, value in params.items():
+            m.setParam(name, value)
+        m.optimize()
+        return {
+            'work': m.Work,
+            'runtime': m.Runtime,
+            'solved': m.status == GRB.OPTIMAL,
+            'objective': m.objVal if m.SolCount else None,
+        }
+    finally:
+        m.dispose()
+
+
+def score_candidate(instances, params, time_limit):
+    """Shifted geometric mean of the work units over the instances (unsolved runs count double)."""
+    runs = [run_candidate(instance, params, time_limit) for instance in instances]
+    logs = [math.log(r['work'] * (1 if r['solved'] else 2) + WORK_SHIFT) for r in runs]
+    return {
+        'params': params,
+        'score': math.exp(sum(logs) / len(logs)) - WORK_SHIFT,
+        'solved': sum(r['solved'] for r in runs),
+        'runtime': sum(r['runtime'] for r in runs),
+    }
+
+
+def gurobi_tune(instance, tune_time_limit, time_limit):
+    """
+    Run Gurobi's tuner on one instance.
+
+    Returns:
+        dict: The non-default parameters of the best tuning result ({} if none).
+    """
+    m = build_tuning_model(instance)
+    try:
+        m.setParam('TuneTimeLimit', tune_time_limit)
+        m.setParam('TuneOutput', 0)
+        m.setParam('TimeLimit', time_limit)
+        m.tune()
+        if m.TuneResultCount == 0:
+            return {}
+        m.getTuneResult(0)
+        # A .prm file lists exactly the parameters that differ from their defaults
+        fd, path = tempfile.mkstemp(suffix=".prm")
+        os.close(fd)
+        try:
+            m.write(path)
+            return _read_prm(path)
+        finally:
+            os.remove(path)
+    finally:
+        m.dispose()
+
+
+def _read_prm(path):
+    params = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 2 or line.startswith('#') or parts[0].lower() in _IGNORED_PARAMS:
+                continue
+            if parts[0].lower().startswith('tune'):
+                continue
+            value = float(parts[1])
+            params[parts[0]] = int(value) if value.is_integer() else value
+    return params
+
+
+def tune_size_class(size_cls, candidates=None, n_instances=3, time_limit=10.0, gurobi_tune_time=0.0,
+                    seed=0, log=print):
+    """
+    Score the candidates on random instances of one size class.
+
+    Returns:
+        dict: The profile entry ('name', 'max_pairs', 'params') plus a 'tuning'
+              record with the instance size, the default score and all scores.
+    """
+    candidates = list(CANDIDATES if candidates is None else candidates)
+    if {} not in candidates:
+        candidates.insert(0, {})
+    if (os.cpu_count() or 1) > 1 and {'Threads': 1} not in candidates:
+        # Small models often solve fastest single-threaded
+        candidates.append({'Threads': 1})
+
+    instances = [generate_random_instance(size_cls['n_plans'], size_cls['n_segments'], seed=seed + i)
+                 for i in range(n_instances)]
+    if gurobi_tune_time > 0:
+        tuned = gurobi_tune(instances[0], gurobi_tune_time, time_limit)
+        if tuned and tuned not in candidates:
+            log(f"[{size_cls['name']}] Gurobi tuner proposed {tuned}")
+            candidates.append(tuned)
+
+    results = []
+    for params in candidates:
+        result = score_candidate(instances, params, time_limit)
+        log(f"[{size_cls['name']}] {params or 'defaults'}: score {result['score']:.4f} work units, "
+            f"{result['solved']}/{n_instances} solved")
+        results.append(result)
+
+    baseline = results[candidates.index({})]
+    best = min(results, key=lambda r: (-r['solved'], r['score']))
+    if best['solved'] == baseline['solved'] and best['score'] > MIN_IMPROVEMENT * baseline['score']:
+        best = baseline
+
+    return {
+        'name': size_cls['name'],
+        'max_pairs': size_cls['max_pairs'],
+        'params': best['params'],
+        'tuning': {
+            'n_plans': size_cls['n_plans'],
+            'n_segments': size_cls['n_segments'],
+            'instances': n_instances,
+            'time_limit': time_limit,
+            'default_score': baseline['score'],
+            'best_score': best['score'],
+            'scores': [{'params': r['params'], 'score': r['score'], 'solved': r['solved']} for r in results],
+        },
+    }
+
+
+def tune_profiles(size_classes=None, candidates=None, n_instances=3, time_limit=10.0, gurobi_tune_time=0.0,
+                  seed=0, log=print):
+    """Tune every size class and return a profile dict (see solver_profiles.save_profiles)."""
+    size_classes = SIZE_CLASSES if size_classes is None else size_classes
+    return {
+        'version': PROFILE_VERSION,
+        'gurobi_version': ".".join(str(v) for v in gp.gurobi.version()),
+        'size_classes': [tune_size_class(cls, candidates, n_instances, time_limit, gurobi_tune_time, seed, log)
+                         for cls in size_classes],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune Gurobi parameters per instance size class.")
+    parser.add_argument("--out", default=DEFAULT_PROFILE_PATH, help="Profile file to write")
+    parser.add_argument("--instances", type=int, default=3, help="Random instances per size class")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="Time limit per solve (s)")
+    parser.add_argument("--gurobi-tune", type=float, default=0.0,
+                        help="Seconds of Gurobi tuning per size class (0 = skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if not GUROBI_AVAILABLE or not PricingModel().check_solver():
+        print("Gurobi not found.")
+        return
+
+    profiles = tune_profiles(n_instances=args.instances, time_limit=args.time_limit,
+                             gurobi_tune_time=args.gurobi_tune, seed=args.seed)
+    save_profiles(profiles, args.out)
+    for cls in profiles['size_classes']:
+        print(f"{cls['name']}: {cls['params'] or 'defaults'} "
+              f"({cls['tuning']['best_score']:.4f} vs {cls['tuning']['default_score']:.4f} work units)")
+    print(f"Profiles written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+Coordinator/worker pool for large scenario grids.
+
+The coordinator holds a queue of scenario jobs and serves it over TCP, one JSON
+object per line. Workers (separate processes, on this or other hosts) lease
+jobs, solve them with their own Gurobi environment and send the results back:
+
+    worker -> {"op": "get", "worker": "host:pid"}
+    coord  -> {"op": "job", "job_id": .., "lease": .., "lease_timeout": .., "payload": {..}}
+              {"op": "wait", "retry_after": 0.5}    (every open job is leased)
+              {"op": "done"}                        (every job completed or failed)
+    worker -> {"op": "heartbeat", "job_id": .., "lease": ..}
+    worker -> {"op": "result", "job_id": .., "lease": .., "result": {..}}
+    worker -> {"op": "fail", "job_id": .., "lease": .., "error": ".."}
+    coord  -> {"op": "ack", "duplicate": false}
+
+A lease that is not renewed within lease_timeout (crashed or disconnected
+worker) puts its job back in the queue, up to max_attempts times. Results are
+deduplicated: the first result of a job is kept, later ones (from an expired
+lease, or re-sent after a dropped connection) are acknowledged and ignored.
+
+A job payload holds 'plans', 'segments', 'capacity' and optionally
+'cannibalization_margin' and 'params', as for build_and_solve.
+
+Usage:
+    python -m models.worker_pool coordinator scenarios.json results.json [--host 0.0.0.0] [--port 5555]
+    python -m models.worker_pool worker HOST:PORT
+    python -m models.worker_pool local scenarios.json results.json [--workers 4]
+
+scenarios.json holds {job_id: payload}. An existing results.json is resumed:
+its completed jobs are not run again.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+
+from models.optimization_model import PricingModel, GUROBI_AVAILABLE, gp
+from utils.serialization import to_jsonable, from_jsonable
+
+DEFAULT_PORT = 5555
+DEFAULT_LEASE_TIMEOUT = 60.0
+WAIT_INTERVAL = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                reply = {'op': 'error', 'error': 'invalid JSON'}
+            else:
+                reply = self.server.coordinator.handle(message)
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class Coordinator:
+    """Serves a job queue to workers and collects their results."""
+
+    def __init__(self, jobs, host='127.0.0.1', port=0, lease_timeout=DEFAULT_LEASE_TIMEOUT, max_attempts=3,
+                 completed=None):
+        """
+        Args:
+            jobs (dict): {job_id: payload}, with JSON-serializable payloads.
+            host, port (str, int): Address to listen on (port 0 picks a free port).
+            lease_timeout (float): Seconds a worker may hold a job without a heartbeat.
+            max_attempts (int): Leases per job before it is recorded as failed.
+            completed (dict): {job_id: result} from an earlier run; not handed out again.
+        """
+        self.jobs = {str(job_id): payload for job_id, payload in jobs.items()}
+        self.results = {str(job_id): to_jsonable(r) for job_id, r in (completed or {}).items()}
+        self.failures = {}
+        self.attempts = {job_id: 0 for job_id in self.jobs}
+        self.pending = deque(job_id for job_id in self.jobs if job_id not in self.results)
+        self.leases = {}  # job_id -> {'lease', 'worker', 'deadline'}
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._server = _Server((host, port), _Handler)
+        self._server.coordinator = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.address
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Queue state (callers hold self._lock) ---
+
+    def _finished(self):
+        return all(job_id in self.results or job_id in self.failures for job_id in self.jobs)
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for job_id, lease in list(self.leases.items()):
+            if lease['deadline'] < now:
+                del self.leases[job_id]
+                logger.warning(f"Lease of job {job_id} held by {lease['worker']} expired")
+                self._retry(job_id, "lease expired")
+
+    def _retry(self, job_id, error):
+        if self.attempts[job_id] >= self.max_attempts:
+            self.failures[job_id] = error
+            self._changed.notify_all()
+        else:
+            self.pending.append(job_id)
+
+    def _holds_lease(self, job_id, lease):
+        return job_id in self.leases and self.leases[job_id]['lease'] == lease
+
+    # --- Protocol ---
+
+    def handle(self, message):
+        """Process one worker message and return the reply."""
+        if not isinstance(message, dict):
+            return {'op': 'error', 'error': 'message must be a JSON object'}
+        op = message.get('op')
+        with self._lock:
+            self._expire_leases()
+            job_id = str(message.get('job_id'))
+            if op in ('result', 'fail', 'heartbeat') and job_id not in self.jobs:
+                return {'op': 'error', 'error': f"unknown job {job_id}"}
+
+            if op == 'get':
+                while self.pending:
+                    job_id = self.pending.popleft()
+                    if job_id in self.results or job_id in self.failures:
+                        continue
+                    self.attempts[job_id] += 1
+                    lease = uuid.uuid4().hex
+                    self.leases[job_id] = {'lease': lease, 'worker': message.get('worker'),
+                                           'deadline': time.monotonic() + self.lease_timeout}
+                    return {'op': 'job', 'job_id': job_id, 'lease': lease, 'attempt': self.attempts[job_id],
+                            'lease_timeout': self.lease_timeout, 'payload': self.jobs[job_id]}
+                if self._finished():
+                    return {'op': 'done'}
+                return {'op': 'wait', 'retry_after': WAIT_INTERVAL}
+
+            if op == 'heartbeat':
+                if not self._holds_lease(job_id, message.get('lease')):
+                    return {'op': 'ack', 'valid': False}
+                self.leases[job_id]['deadline'] = time.monotonic() + self.lease_timeout
+                return {'op': 'ack', 'valid': True}
+
+            if op == 'result':
+                if job_id in self.results:
+                    return {'op': 'ack', 'duplicate': True}
+                # The first result wins, even from an expired lease
+                self.results[job_id] = message.get('result')
+                self.failures.pop(job_id, None)
+                self.leases.pop(job_id, None)
+                self._changed.notify_all()
+                return {'op': 'ack', 'duplicate': False}
+
+            if op == 'fail':
+                if job_id in self.results or not self._holds_lease(job_id, message.get('lease')):
+                    return {'op': 'ack', 'duplicate': True}
+                del self.leases[job_id]
+                logger.warning(f"Job {job_id} failed on {message.get('worker')}: {message.get('error')}")
+                self._retry(job_id, message.get('error', 'failed'))
+                return {'op': 'ack', 'duplicate': False}
+
+        return {'op': 'error', 'error': f"unknown op {op}"}
+
+    def wait(self, timeout=None):
+        """Block until every job completed or failed. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while not self._finished():
+                # Wake up regularly so leases of silent workers expire
+                self._changed.wait(WAIT_INTERVAL)
+                self._expire_leases()
+                if deadline is not None and time.monotonic() > deadline:
+                    return False
+        return True
+
+    def fail_remaining(self, error):
+        """Record every job without a result as failed (e.g. when no worker is left)."""
+        with self._lock:
+            for job_id in self.jobs:
+                if job_id not in self.results and job_id not in self.failures:
+                    self.failures[job_id] = error
+            self.pending.clear()
+            self.leases.clear()
+            self._changed.notify_all()
+
+    def get_results(self):
+        """Return {job_id: result} with results restored by utils.serialization."""
+        with self._lock:
+            return {job_id: from_jsonable(r) for job_id, r in self.results.items()}
+
+    def save(self, path):
+        with self._lock:
+            data = {'results': self.results, 'failures': self.failures}
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+
+class _Connection:
+    """JSON-lines client that reconnects with exponential backoff."""
+
+    def __init__(self, address, retries=5, backoff=0.5, timeout=30.0):
+        self.address = tuple(address)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._file = self._sock.makefile("rwb")
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def request(self, message):
+        """Send a message and return the reply, re-sending after connection errors."""
+        data = (json.dumps(message) + "\n").encode()
+        for attempt in range(self.retries + 1):
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._file.write(data)
+                self._file.flush()
+                line = self._file.readline()
+                if not line:
+                    raise ConnectionError("connection closed by coordinator")
+                return json.loads(line)
+            except (OSError, ValueError) as e:
+                # ValueError: truncated or garbled reply; reconnect and re-send
+                self.close()
+                if attempt == self.retries:
+                    raise ConnectionError(f"coordinator unreachable at {self.address}: {e}")
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+class _Heartbeat(threading.Thread):
+    """Renews a job lease from a separate connection while the job runs."""
+
+    def __init__(self, address, job_id, lease, interval):
+        super().__init__(daemon=True)
+        self.connection = _Connection(address, retries=1)
+        self.message = {'op': 'heartbeat', 'job_id': job_id, 'lease': lease}
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.connection.request(self.message)
+            except ConnectionError:
+                pass
+        self.connection.close()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def execute_job(model, payload, env=None):
+    """
+    Solve one job payload with build_and_solve.
+
+    Raises:
+        RuntimeError: If the solve returns no solution (infeasible, solver or license
+            error), so that the coordinator records a failure and retries the job.
+    """
+    model.last_telemetry = None
+    result = model.build_and_solve(payload['plans'], payload['segments'], payload['capacity'],
+                                   payload.get('cannibalization_margin', 5.0), verbose=False,
+                                   params=payload.get('params'), env=env)
+    if result is None:
+        status = (model.last_telemetry or {}).get('status', 'error')
+        raise RuntimeError(f"solve failed: status {status}")
+    return result
+
+
+def run_worker(address, worker_id=None, max_jobs=None, retries=5, backoff=0.5):
+    """
+    Pull and solve jobs until the coordinator reports that all jobs are done.
+
+    Args:
+        address (tuple): Coordinator (host, port).
+        worker_id (str): Name reported to the coordinator (default: host:pid).
+        max_jobs (int): Stop after this many jobs (default: no limit).
+        retries, backoff: Reconnection attempts and initial backoff (s) per request.
+
+    Returns:
+        int: Number of jobs processed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    model = PricingModel()
+    connection = _Connection(address, retries, backoff)
+    done = 0
+    # One Gurobi environment per worker, reused for all its jobs
+    with gp.Env(params={'OutputFlag': 0}) as env:
+        try:
+            while max_jobs is None or done < max_jobs:
+                reply = connection.request({'op': 'get', 'worker': worker_id})
+                if reply['op'] == 'done':
+                    break
+                if reply['op'] != 'job':
+                    time.sleep(reply.get('retry_after', WAIT_INTERVAL))
+                    continue
+
+                job_id, lease = reply['job_id'], reply['lease']
+                heartbeat = _Heartbeat(address, job_id, lease, reply['lease_timeout'] / 3)
+                heartbeat.start()
+                try:
+                    result = execute_job(model, reply['payload'], env)
+                    message = {'op': 'result', 'result': to_jsonable(result)}
+                except Exception as e:
+                    logger.exception(f"Job {job_id} failed")
+                    message = {'op': 'fail', 'error': repr(e)}
+                finally:
+                    heartbeat.stop()
+                message.update(job_id=job_id, lease=lease, worker=worker_id)
+                connection.request(message)
+                done += 1
+        except ConnectionError as e:
+            logger.error(f"Worker {worker_id} stopping: {e}")
+        finally:
+            connection.close()
+    return done
+
+
+def run_local(jobs, n_workers=None, lease_timeout=DEFAULT_LEASE_TIMEOUT, max_attempts=3, completed=None,
+              timeout=None):
+    """
+    Run jobs on a coordinator with local worker processes.
+
+    If every worker process exits while jobs are left, those jobs are recorded as failed.
+
+    Returns:
+        (dict, dict): Results {job_id: result} and failures {job_id: error}.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    with Coordinator(jobs, lease_timeout=lease_timeout, max_attempts=max_attempts, completed=completed) as coordinator:
+        # 'spawn' avoids forking a process that holds the server threads
+        ctx = multiprocessing.get_context('spawn')
+        workers = [ctx.Process(target=run_worker, args=(coordinator.address,)) for _ in range(n_workers)]
+        for worker in workers:
+            worker.start()
+        _wait_for_workers(coordinator, workers, timeout)
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        return coordinator.get_results(), dict(coordinator.failures)
+
+
+def _wait_for_workers(coordinator, workers, timeout=None):
+    """
+    Wait for the coordinator while checking that local workers are alive.
+
+    If every worker has exited with jobs left (e.g. Gurobi environment or license
+    errors at start-up), the remaining jobs are recorded as failed.
+
+    Returns:
+        bool: True if every job completed or failed, False on timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not coordinator.wait(WAIT_INTERVAL):
+        if not any(worker.is_alive() for worker in workers):
+            # A last check: the final result may have arrived as the workers exited
+            if coordinator.wait(WAIT_INTERVAL):
+                break
+            codes = sorted({worker.exitcode for worker in workers}, key=str)
+            logger.error(f"All workers exited (exit codes {codes}) with jobs left")
+            coordinator.fail_remaining(f"no live workers (exit codes {codes})")
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+    return True
+
+
+def _load_completed(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return from_jsonable(json.load(f).get('results', {}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed solving of scenario grids.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    coord = sub.add_parser("coordinator", help="Serve the jobs of a scenario file")
+    coord.add_argument("scenarios", help="JSON file with {job_id: payload}")
+    coord.add_argument("results", help="Results file (resumed if it exists)")
+    coord.add_argument("--host", default="0.0.0.0")
+    coord.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coord.add_argument("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT)
+    worker = sub.add_parser("worker", help="Solve jobs from a coordinator")
+    worker.add_argument("address", help="HOST:PORT of the coordinator")
+    local = sub.add_parser("local", help="Coordinator plus local worker processes")
+    local.add_argument("scenarios")
+    local.add_argument("results")
+    local.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.mode == "worker":
+        if not GUROBI_AVAILABLE:
+            print("Gurobi not found.")
+            return
+        host, port = args.address.rsplit(":", 1)
+        print(f"Processed {run_worker((host, int(port)))} jobs")
+        return
+
+    with open(args.scenarios) as f:
+        jobs = json.load(f)
+    completed = _load_completed(args.results)
+    if args.mode == "local":
+        results, failures = run_local(jobs, args.workers, completed=completed)
+        with open(args.results, "w") as f:
+            json.dump({'results': to_jsonable(results), 'failures': failures}, f)
+    else:
+        with Coordinator(jobs, args.host, args.port, args.lease_timeout, completed=completed) as coordinator:
+            print(f"Serving {len(jobs)} jobs on {coordinator.address[0]}:{coordinator.address[1]}")
+            coordinator.wait()
+            coordinator.save(args.results)
+            # Let polling workers receive 'done' before the server goes away
+            time.sleep(2 * WAIT_INTERVAL)
+            failures = coordinator.failures
+    print(f"{len(jobs) - len(failures)} jobs completed, {len(failures)} failed; results in {args.results}")
+
+
+if __name__ == "__main__":
+    main()
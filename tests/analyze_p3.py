@@ -1,14 +1,17 @@
-
 import sys
 import os
+import argparse
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from models.instance import PricingInstance
 from models.optimization_model import PricingModel
+from models.regret import choice_from_results, regret_matrix, regret_frame, regret_summary
 from utils.data_generator import generate_demo_data
 
-def analyze_p3():
+def analyze_plan(plan='P3'):
+    """Would `plan` have been more profitable for the segments that chose another plan?"""
     model = PricingModel()
     if not model.check_solver():
         print("Gurobi not found.")
@@ -22,46 +25,31 @@ def analyze_p3():
         print("Optimization failed.")
         return
 
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    matrix = regret_matrix(instance, results['prices'], choice_from_results(instance, results))
+    frame = regret_frame(instance, matrix)
+
     print("\n--- RESULTS ANALYSIS ---")
-    prices = results['prices']
     print("Optimal Prices:")
-    for pid, p in prices.items():
+    for pid, p in results['prices'].items():
         print(f"  {pid}: ${p:.2f}")
 
     print("\nSegment Choices:")
-    for s in segments:
-        sid = s['id']
-        # Find which plan this segment chose
-        choice = None
-        for pid in plans:
-            if results['choices'].get((pid['id'], sid), 0) > 0.5:
-                choice = pid['id']
-                break
-        
+    chosen = frame[frame['chosen']].set_index('segment')
+    for sid in instance.segment_ids:
+        choice = chosen['plan'].get(sid)
         print(f"  Segment {sid} chose: {choice}")
-        
-        # Calculate theoretical profit for P3 for this segment at current P3 price
-        # vs Chosen Plan
-        if choice and choice != 'P3':
-            p3_price = prices['P3']
-            chosen_price = prices[choice]
-            
-            # P3 calc
-            p3_params = s['params'].get('P3', {'a':0, 'b':0})
-            p3_q = p3_params['a'] - p3_params['b'] * p3_price
-            p3_cost = next(p for p in plans if p['id']=='P3')['cost']
-            p3_profit = p3_q * (p3_price - p3_cost)
-            
-            # Chosen calc
-            c_params = s['params'].get(choice, {'a':0, 'b':0})
-            c_q = c_params['a'] - c_params['b'] * chosen_price
-            c_cost = next(p for p in plans if p['id']==choice)['cost']
-            c_profit = c_q * (chosen_price - c_cost)
-            
-            print(f"    - Profit if P3 (${p3_price:.2f}): {p3_profit:.2f}")
-            print(f"    - Profit if {choice} (${chosen_price:.2f}): {c_profit:.2f}")
-            if p3_profit < c_profit:
-                print("    -> P3 is less profitable.")
+        if choice is None or choice == plan:
+            continue
+        row = frame[(frame['segment'] == sid) & (frame['plan'] == plan)].iloc[0]
+        print(f"    - Profit if {plan} (${row['price']:.2f}): {row['profit']:.2f}")
+        print(f"    - Profit if {choice} (${chosen.loc[sid, 'price']:.2f}): {chosen.loc[sid, 'profit']:.2f}")
+        print(f"    -> {plan} is {'more' if row['regret'] > 0 else 'less'} profitable ({row['regret']:+.2f}).")
+
+    print("\nPer-plan summary:")
+    print(regret_summary(instance, matrix).to_string())
 
 if __name__ == "__main__":
-    analyze_p3()
+    parser = argparse.ArgumentParser(description="Counterfactual profit of one plan for every segment.")
+    parser.add_argument("--plan", default="P3")
+    analyze_plan(parser.parse_args().plan)
@@ -0,0 +1,121 @@
+import sys
+import os
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.data_generator import generate_random_instance
+from utils.data_io import read_instance, write_instance
+from models.instance_store import InstanceStoreWriter, InstanceStore
+from models.evaluator import evaluate_prices
+from models.instance import PricingInstance
+from utils.data_generator import generate_demo_data
+
+def _timeit(func, repeat=3):
+    """Best wall time of `repeat` calls, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_data_io(n_segments=100000, n_plans=4):
+    print(f"--- Data I/O: {n_segments} segments x {n_plans} plans ---")
+    instance = generate_random_instance(n_plans=n_plans, n_segments=n_segments)
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ('.csv', '.parquet'):
+            path = os.path.join(tmp, f"demand{ext}")
+            try:
+                write_instance(instance, path)
+            except ImportError:
+                print(f"  {ext}: skipped (pyarrow not available)")
+                continue
+            t = _timeit(lambda: read_instance(path))
+            print(f"  load {ext}: {t * 1000:.1f} ms")
+    t = _timeit(instance.to_dicts)
+    print(f"  to_dicts (solver hand-off): {t * 1000:.1f} ms")
+
+def bench_instance_store(n_segments=1000000, n_plans=8, chunk_size=100000):
+    print(f"--- Instance store: {n_segments} segments x {n_plans} plans ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store")
+        start = time.perf_counter()
+        writer = None
+        for i in range(0, n_segments, chunk_size):
+            chunk = generate_random_instance(n_plans=n_plans, n_segments=min(chunk_size, n_segments - i), seed=i)
+            if writer is None:
+                writer = InstanceStoreWriter(path, chunk.plan_dicts(), chunk.capacity)
+            writer.append(chunk)
+        writer.close()
+        print(f"  generate + write: {time.perf_counter() - start:.2f} s")
+
+        store = InstanceStore(path)
+        t = _timeit(lambda: sum(chunk.a.sum() for _, chunk in store.iter_chunks(chunk_size)), repeat=1)
+        print(f"  stream all chunks: {t * 1000:.1f} ms")
+        t = _timeit(lambda: store.aggregate(n_bins=20, chunk_size=chunk_size), repeat=1)
+        print(f"  aggregate (2 passes): {t * 1000:.1f} ms")
+
+def bench_evaluator():
+    print("--- Vectorized price evaluation ---")
+    plans, segments, capacity = generate_demo_data()
+    demo = PricingInstance.from_dicts(plans, segments, capacity)
+    t = _timeit(lambda: evaluate_prices(demo, demo.cost * 2), repeat=100)
+    print(f"  demo (3 x 4): {t * 1e6:.1f} us")
+    for n_segments in (10000, 100000):
+        instance = generate_random_instance(n_plans=8, n_segments=n_segments)
+        t = _timeit(lambda: evaluate_prices(instance, instance.cost * 2), repeat=10)
+        print(f"  {n_segments} x 8: {t * 1000:.2f} ms")
+
+def bench_charts(n_updates=20):
+    print("--- Chart redraw latency (Agg canvas) ---")
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from views.chart_builders import ResultsDashboard, evaluation_chart_data
+
+    for n_segments in (3, 1000, 50000):
+        instance = generate_random_instance(n_plans=4, n_segments=n_segments)
+        figure = Figure(figsize=(8, 6), dpi=100)
+        dashboard = ResultsDashboard(figure, FigureCanvasAgg(figure))
+        data = evaluation_chart_data(instance, evaluate_prices(instance, instance.cost * 2))
+        dashboard.update(data)
+
+        # Full rebuild, as the old plot_results did on every update
+        def rebuild():
+            dashboard._build(data)
+            dashboard.update(data)
+        t_full = _timeit(rebuild, repeat=5)
+
+        timings, full_draws = [], 0
+        for k in range(n_updates):
+            evaluation = evaluate_prices(instance, instance.cost * (2 + 0.005 * k))
+            start = time.perf_counter()
+            full_draws += dashboard.update(evaluation_chart_data(instance, evaluation,
+                                                                 previous=dashboard.top_segments()))
+            timings.append(time.perf_counter() - start)
+        print(f"  {n_segments} segments: rebuild {t_full * 1000:.1f} ms | "
+              f"incremental median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms "
+              f"({full_draws}/{n_updates} full draws)")
+
+def bench_reports(n_scenarios=40):
+    print(f"--- Batch report rendering: {n_scenarios} scenarios, PNG ---")
+    from models.evaluator import to_results
+    from utils.report_renderer import render_reports
+
+    instance = generate_random_instance(n_plans=4, n_segments=200)
+    scenarios = [(f"s{k}", to_results(instance, evaluate_prices(instance, instance.cost * (1.5 + 0.02 * k))))
+                 for k in range(n_scenarios)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in sorted({1, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            render_reports(scenarios, tmp, formats=('png',), workers=workers)
+            print(f"  {workers} worker(s): {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    bench_data_io()
+    bench_instance_store()
+    bench_evaluator()
+    bench_charts()
+    bench_reports()
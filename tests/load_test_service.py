@@ -0,0 +1,103 @@
+"""
+Load test for the pricing service (controllers/pricing_service.py).
+
+Sends --requests solve requests from --concurrency concurrent clients, cycling
+through --distinct problems (the demo data with different capacities), and
+reports throughput, latency percentiles and the status codes received.
+
+Usage:
+    python tests/load_test_service.py [--address HOST:PORT] [--requests 200] [--concurrency 16]
+        [--distinct 8] [--budget 10]
+
+Without --address an in-process service is started (--workers, --max-queue).
+"""
+import sys
+import os
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from controllers.pricing_service import PricingService, ServiceClient
+from utils.data_generator import generate_demo_data
+
+
+def make_problems(n_distinct, budget):
+    plans, segments, capacity = generate_demo_data()
+    return [{'plans': plans, 'segments': segments, 'capacity': capacity * (0.3 + 0.7 * i / max(n_distinct - 1, 1)),
+             'time_budget': budget} for i in range(n_distinct)]
+
+
+async def run_load(host, port, problems, n_requests, concurrency):
+    """Returns (latencies in s, Counter of status codes, coalesced count, wall time)."""
+    queue = asyncio.Queue()
+    for i in range(n_requests):
+        queue.put_nowait(problems[i % len(problems)])
+    latencies, statuses = [], Counter()
+    coalesced = 0
+
+    async def client():
+        nonlocal coalesced
+        conn = ServiceClient(host, port)
+        while not queue.empty():
+            problem = queue.get_nowait()
+            start = time.perf_counter()
+            status, body = await conn.request("POST", "/solve", problem)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if status == 200 and body['coalesced']:
+                coalesced += 1
+        await conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies), statuses, coalesced, time.perf_counter() - start
+
+
+def report(latencies, statuses, coalesced, wall):
+    ok = statuses.get(200, 0)
+    print(f"Requests: {len(latencies)} in {wall:.2f} s -> {len(latencies) / wall:.1f} req/s "
+          f"({ok / wall:.1f} successful/s)")
+    print(f"Status codes: {dict(sorted(statuses.items()))}; coalesced: {coalesced}")
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"Latency ms: p50 {p50:.1f} | p95 {p95:.1f} | p99 {p99:.1f} | max {latencies.max() * 1000:.1f}")
+
+
+async def main_async(args):
+    problems = make_problems(args.distinct, args.budget)
+    service = None
+    if args.address:
+        host, port = args.address.rsplit(":", 1)
+        port = int(port)
+    else:
+        service = PricingService(port=0, workers=args.workers, max_queue=args.max_queue)
+        host, port = service.host, await service.start()
+    try:
+        report(*await run_load(host, port, problems, args.requests, args.concurrency))
+        if service is not None:
+            print(f"Service counters: {service.counters}")
+    finally:
+        if service is not None:
+            await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the pricing service.")
+    parser.add_argument("--address", default=None, help="HOST:PORT of a running service")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=8, help="Distinct problems to cycle through")
+    parser.add_argument("--budget", type=float, default=10.0, help="Time budget per request (s)")
+    parser.add_argument("--workers", type=int, default=None, help="Workers of the in-process service")
+    parser.add_argument("--max-queue", type=int, default=16, help="Queue of the in-process service")
+    asyncio.run(main_async(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.cells import CellCoverage
+from models.optimization_model import PricingModel
+from utils.data_generator import generate_demo_data
+
+def test_usage_matrix():
+    coverage = CellCoverage.from_triplets([0, 0, 1, 1], [0, 1, 1, 2], [1.0, 0.5, 0.5, 1.0], [10.0, 20.0],
+                                          ["north", "south"], ["S1", "S2", "S3"])
+    # Columns follow the requested segment order, not the coverage order
+    usage = coverage.usage_matrix(["S3", "S1", "S2"], [1.0, 10.0])
+    dense = usage.toarray() if hasattr(usage, "toarray") else usage
+    expected = np.array([[0, 0, 1, 10, 0.5, 5],
+                         [1, 10, 0, 0, 0.5, 5]], dtype=float)
+    np.testing.assert_allclose(dense, expected)
+    np.testing.assert_allclose(coverage.cell_usage(["S1", "S2", "S3"], [2.0, 4.0, 8.0]), [4.0, 10.0])
+    try:
+        coverage.usage_matrix(["S1", "S4"], [1.0])
+        assert False, "unknown segment accepted"
+    except ValueError:
+        pass
+
+def test_single_cell_matches_global_capacity():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    ids = [s['id'] for s in segments]
+    coverage = CellCoverage(np.ones((1, len(ids))), [40000.0], ids, ["all"])
+    by_cell = model.build_and_solve(plans, segments, capacity, verbose=False, cells=coverage, sensitivity=True)
+    by_global = model.build_and_solve(plans, segments, 40000.0, verbose=False, sensitivity=True)
+    assert abs(by_cell['objective'] - by_global['objective']) < 1e-6 * by_global['objective']
+    assert abs(by_cell['cell_usage']['all'] - 40000.0) < 1e-3
+    cell = by_cell['sensitivity']['cells']['all']
+    assert abs(cell['dual'] - by_global['sensitivity']['capacity']['dual']) < 1e-6
+
+def test_cell_capacities_respected():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    ids = [s['id'] for s in segments]
+    shares = np.array([[1.0, 0.5, 0.0],
+                       [0.0, 0.5, 1.0]])
+    coverage = CellCoverage(shares, [30000.0, 15000.0], ids, ["north", "south"])
+    unconstrained = model.build_and_solve(plans, segments, capacity, verbose=False)
+    results = model.build_and_solve(plans, segments, capacity, verbose=False, cells=coverage, sensitivity=True)
+    assert results['objective'] < unconstrained['objective']
+    for c, cell in enumerate(coverage.cell_ids):
+        assert results['cell_usage'][cell] <= coverage.capacities[c] + 1e-3
+    assert abs(sum(results['cell_usage'].values()) - results['total_usage']) < 1e-3
+    cells = results['sensitivity']['cells']
+    assert cells['south']['dual'] > 0 and cells['north']['dual'] < 1e-9
+
+def test_large_coverage_build():
+    if not PricingModel().check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    import gurobipy as gp
+    rng = np.random.default_rng(0)
+    n_cells, n_segments, n_plans = 2000, 20000, 4
+    segment_index = np.repeat(np.arange(n_segments), 3)
+    coverage = CellCoverage.from_triplets(rng.integers(0, n_cells, len(segment_index)), segment_index,
+                                          np.full(len(segment_index), 1 / 3), np.full(n_cells, 1e4),
+                                          [f"C{c}" for c in range(n_cells)], [f"S{s}" for s in range(n_segments)])
+    plans = [{'id': f"P{j}", 'data_limit': 10.0 * (j + 1)} for j in range(n_plans)]
+    S = coverage.segment_ids
+    start = time.perf_counter()
+    with gp.Model() as m:
+        q = m.addVars([p['id'] for p in plans], S)
+        PricingModel()._add_cell_capacity(m, coverage, plans, S, q)
+        m.update()
+        assert m.NumConstrs == n_cells
+        assert m.NumNZs <= len(segment_index) * n_plans
+    assert time.perf_counter() - start < 30
+
+if __name__ == "__main__":
+    test_usage_matrix()
+    test_single_cell_matches_global_capacity()
+    test_cell_capacities_respected()
+    test_large_coverage_build()
+    print("Cell capacity tests passed.")
@@ -0,0 +1,132 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.cells import CellCoverage
+from models.column_generation import bound_columns, initial_columns, lagrangian_bound, reduced_costs, column_values
+from models.instance import PricingInstance
+from models.optimization_model import PricingModel
+from utils.data_generator import generate_demo_data, generate_random_instance
+
+def test_columns_and_reduced_costs():
+    plans, segments, capacity = generate_demo_data()
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    prices = np.array([13.5, 21.25, 26.25, 62.5])
+    mask = initial_columns(instance, prices, per_segment=2)
+    assert mask.shape == (instance.n_segments, instance.n_plans)
+    assert (mask.sum(axis=1) == 2).all()
+    profit, usage, sellable = column_values(instance, prices)
+    rc = reduced_costs(profit, usage, sellable, np.zeros(instance.n_segments), 0.0)
+    np.testing.assert_allclose(rc[sellable], profit[sellable])
+    assert np.isneginf(rc[~sellable]).all()
+    # The bound columns are a plan per segment
+    assert bound_columns(instance, 0.0).shape == (instance.n_segments,)
+
+def test_demo_matches_full_model():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    for cap in (capacity, 40000.0):
+        full = model.build_and_solve(plans, segments, cap, verbose=False)
+        results = model.solve_column_generation(plans, segments, cap, columns_per_segment=1)
+        cg = results['column_generation']
+        assert cg['converged']
+        assert cg['columns'] < cg['full_columns']
+        assert abs(results['objective'] - full['objective']) < 1e-6 * full['objective']
+        assert cg['bound'] >= results['objective'] - 1e-6
+        assert cg['gap'] < 1e-6
+        # Pairs outside the candidate set are reported as unchosen
+        assert len(results['choices']) == len(plans) * len(segments)
+
+def test_bound_is_valid():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    instance = generate_random_instance(n_plans=8, n_segments=10, seed=2)
+    plans, segments, capacity = instance.to_dicts()
+    full = model.build_and_solve(plans, segments, capacity, verbose=False, time_limit=60)
+    bound, lam = lagrangian_bound(instance)
+    assert lam >= 0
+    assert bound >= full['objective'] - 1e-6
+    results = model.solve_column_generation(plans, segments, capacity)
+    cg = results['column_generation']
+    assert cg['converged']
+    assert results['objective'] <= full['objective'] + 1e-6 * abs(full['objective'])
+    assert cg['columns'] < cg['full_columns']
+    assert results['total_usage'] <= capacity + 1e-3
+    # Without the full check only the (loose) Lagrangian bound certifies the result
+    assert cg['certified_bound'] is None and cg['bound'] == bound
+    assert cg['gap'] == cg['lagrangian_gap'] > 0
+
+def test_certified_gap():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    instance = generate_random_instance(n_plans=8, n_segments=10, seed=2)
+    plans, segments, capacity = instance.to_dicts()
+    full = model.build_and_solve(plans, segments, capacity, verbose=False, time_limit=60)
+    results = model.solve_column_generation(plans, segments, capacity, certify=True, certify_gap=1e-4,
+                                            certify_time_limit=60)
+    cg = results['column_generation']
+    assert cg['converged']
+    assert cg['certified_bound'] is not None and cg['bound'] <= cg['lagrangian_bound']
+    assert cg['bound'] >= full['objective'] - 1e-6 * abs(full['objective'])
+    assert cg['gap'] <= 2e-4
+    assert abs(results['objective'] - full['objective']) <= 2e-4 * abs(full['objective'])
+
+class _FailingCheckModel(PricingModel):
+    """The full-model check (the only solve with a MIP start) fails without writing telemetry."""
+
+    def build_and_solve(self, *args, start=None, **kwargs):
+        if start is not None:
+            return None
+        return super().build_and_solve(*args, **kwargs)
+
+def test_failed_check_gives_no_certificate():
+    model = _FailingCheckModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    instance = generate_random_instance(n_plans=8, n_segments=10, seed=2)
+    plans, segments, capacity = instance.to_dicts()
+    results = model.solve_column_generation(plans, segments, capacity, certify=True, max_iter=1)
+    cg = results['column_generation']
+    # The last master's bound must not be reported as the full model's
+    assert cg['certified_bound'] is None and not cg['improved']
+    assert cg['bound'] == cg['lagrangian_bound'] and cg['gap'] == cg['lagrangian_gap'] > 0
+
+def test_columns_with_cells():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    ids = [s['id'] for s in segments]
+    coverage = CellCoverage(np.array([[1.0, 0.5, 0.0], [0.0, 0.5, 1.0]]), [30000.0, 15000.0], ids,
+                            ["north", "south"])
+    # Every plan for the first segment, the two largest plans for the others
+    names = [pl['id'] for pl in sorted(plans, key=lambda pl: pl['data_limit'])]
+    columns = [(f, ids[0]) for f in names] + [(f, s) for s in ids[1:] for f in names[-2:]]
+    results = model.build_and_solve(plans, segments, capacity, verbose=False, cells=coverage, columns=columns)
+    assert results is not None
+    for c, cell in enumerate(coverage.cell_ids):
+        assert results['cell_usage'][cell] <= coverage.capacities[c] + 1e-3
+    assert abs(sum(results['cell_usage'].values()) - results['total_usage']) < 1e-3
+    assert all(results['choices'][key] == 0.0 for key in results['choices'] if key not in set(columns))
+
+if __name__ == "__main__":
+    test_columns_and_reduced_costs()
+    test_demo_matches_full_model()
+    test_bound_is_valid()
+    test_certified_gap()
+    test_failed_check_gives_no_certificate()
+    test_columns_with_cells()
+    print("Column generation tests passed.")
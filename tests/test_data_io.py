@@ -0,0 +1,64 @@
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.instance import PricingInstance
+from utils.data_generator import generate_demo_data, generate_random_instance
+from utils.data_io import read_instance, write_instance, plans_path_for
+
+def test_dict_round_trip():
+    plans, segments, capacity = generate_demo_data()
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    assert instance.a.shape == (3, 4)
+
+    plans2, segments2, capacity2 = instance.to_dicts()
+    assert capacity2 == capacity
+    assert [p['id'] for p in plans2] == [p['id'] for p in plans]
+    for s, s2 in zip(segments, segments2):
+        assert s['params'] == s2['params']
+
+def test_edit_keeps_rows_aligned():
+    plans, segments, capacity = generate_demo_data()
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    instance.remove_segment(0)
+    assert list(instance.segment_ids) == ['S_Med', 'S_High']
+    assert instance.a[0, 1] == 3000 # S_Med / P2
+
+    instance.add_plan('P5', 'Max', 200.0, 40.0)
+    assert instance.a.shape == (2, 5)
+    instance.remove_plan(0)
+    assert list(instance.plan_ids) == ['P2', 'P3', 'P4', 'P5']
+    assert instance.b[1, 2] == 10 # S_High / P4
+
+def test_file_round_trip():
+    instance = generate_random_instance(n_plans=3, n_segments=50, seed=1)
+    extensions = ['.csv']
+    try:
+        import pyarrow # noqa: F401
+        extensions.append('.parquet')
+    except ImportError:
+        print("SKIP: pyarrow not available, Parquet not tested.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in extensions:
+            path = os.path.join(tmp, f"demand{ext}")
+            write_instance(instance, path)
+            assert os.path.exists(plans_path_for(path))
+
+            loaded = read_instance(path, capacity=instance.capacity)
+            assert list(loaded.plan_ids) == list(instance.plan_ids)
+            assert list(loaded.segment_ids) == list(instance.segment_ids)
+            np.testing.assert_allclose(loaded.a, instance.a)
+            np.testing.assert_allclose(loaded.b, instance.b)
+            np.testing.assert_allclose(loaded.cost, instance.cost)
+
+if __name__ == "__main__":
+    test_dict_round_trip()
+    test_edit_keeps_rows_aligned()
+    test_file_round_trip()
+    print("Data I/O tests passed.")
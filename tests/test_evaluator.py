@@ -0,0 +1,66 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.instance import PricingInstance
+from models.evaluator import evaluate_prices, evaluate_arrays, to_results, NO_PLAN
+from models.optimization_model import PricingModel
+from utils.data_generator import generate_demo_data, generate_random_instance
+
+def _scalar_profit_choice(instance, prices):
+    """Reference implementation with plain loops (as in analyze_p3.py)."""
+    choices, profits = [], []
+    for i in range(instance.n_segments):
+        best_j, best = NO_PLAN, -np.inf
+        for j in range(instance.n_plans):
+            q = instance.a[i, j] - instance.b[i, j] * prices[j]
+            if q >= 0 and (prices[j] - instance.cost[j]) * q > best:
+                best_j, best = j, (prices[j] - instance.cost[j]) * q
+        choices.append(best_j)
+        profits.append(best if best_j != NO_PLAN else 0.0)
+    return np.array(choices), np.array(profits)
+
+def test_matches_scalar_reference():
+    instance = generate_random_instance(n_plans=5, n_segments=300, seed=5)
+    prices = instance.cost * 2.5
+    ev = evaluate_prices(instance, prices)
+    choices, profits = _scalar_profit_choice(instance, prices)
+    np.testing.assert_array_equal(ev['choice'], choices)
+    np.testing.assert_allclose(ev['profit'], profits)
+
+def test_batched_draws_broadcast():
+    instance = generate_random_instance(n_plans=3, n_segments=40, seed=6)
+    prices = instance.cost * 2.0
+    a = np.stack([instance.a, instance.a * 1.1])
+    b = np.stack([instance.b, instance.b])
+    ev = evaluate_arrays(prices, instance.cost, instance.data_limit, a, b)
+    assert ev['profit'].shape == (2, 40)
+    single = evaluate_prices(instance, prices)
+    np.testing.assert_allclose(ev['profit'][0], single['profit'])
+
+def test_matches_optimal_solution():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+
+    plans, segments, capacity = generate_demo_data()
+    results = model.build_and_solve(plans, segments, capacity, verbose=False)
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    ev = evaluate_prices(instance, results['prices'])
+
+    # Capacity is not binding on the demo data, so the assignment is the profit-maximizing one
+    assert abs(ev['total_profit'] - results['objective']) < 1e-3 * max(1.0, abs(results['objective']))
+    converted = to_results(instance, ev)
+    for key, chosen in results['choices'].items():
+        assert round(chosen) == converted['choices'][key]
+
+if __name__ == "__main__":
+    test_matches_scalar_reference()
+    test_batched_draws_broadcast()
+    test_matches_optimal_solution()
+    print("Evaluator tests passed.")
@@ -0,0 +1,99 @@
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.instance_store import InstanceStore, InstanceStoreWriter, write_store
+from utils.data_generator import generate_random_instance
+from utils.data_io import write_instance, convert_to_store
+
+def test_store_chunks_match_instance():
+    instance = generate_random_instance(n_plans=3, n_segments=1050, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = write_store(instance, os.path.join(tmp, "store"), chunk_size=400)
+        store = InstanceStore(store.path) # Reopen from disk
+        assert store.n_segments == 1050 and store.n_plans == 3
+
+        starts = []
+        a_parts = []
+        for start, chunk in store.iter_chunks(chunk_size=300):
+            starts.append(start)
+            a_parts.append(np.array(chunk.a))
+            assert chunk.segment_ids[0] == instance.segment_ids[start]
+        assert starts == [0, 300, 600, 900]
+        np.testing.assert_array_equal(np.vstack(a_parts), instance.a)
+        np.testing.assert_array_equal(store.load().b, instance.b)
+
+def test_aggregate_preserves_total_demand():
+    instance = generate_random_instance(n_plans=4, n_segments=2000, seed=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = write_store(instance, os.path.join(tmp, "store"))
+        agg = store.aggregate(n_bins=5, chunk_size=700)
+        assert agg.n_segments <= 4 * 5
+        np.testing.assert_allclose(agg.a.sum(axis=0), instance.a.sum(axis=0))
+        np.testing.assert_allclose(agg.b.sum(axis=0), instance.b.sum(axis=0))
+        np.testing.assert_allclose(agg.size.sum(), instance.size.sum())
+
+def test_convert_csv_to_store():
+    instance = generate_random_instance(n_plans=2, n_segments=500, seed=4)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "demand.csv")
+        write_instance(instance, csv_path)
+        store = convert_to_store(csv_path, os.path.join(tmp, "store"), chunk_size=128)
+        assert store.n_segments == 500
+        np.testing.assert_allclose(store.a, instance.a)
+
+def test_long_ids_rejected_and_failed_write_incomplete():
+    instance = generate_random_instance(n_plans=2, n_segments=3, seed=5)
+    instance.segment_ids[:] = ["customer-segment-" + "x" * 20 + str(i) for i in range(3)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store")
+        try:
+            with InstanceStoreWriter(path, instance.plan_dicts(), instance.capacity, id_width=32) as writer:
+                writer.append(instance)
+            assert False, "ids longer than id_width accepted"
+        except ValueError:
+            pass
+        # The failed write left no meta.json, so the store does not open
+        try:
+            InstanceStore(path)
+            assert False, "partial store opened"
+        except FileNotFoundError:
+            pass
+        with InstanceStoreWriter(path, instance.plan_dicts(), instance.capacity, id_width=64) as writer:
+            writer.append(instance)
+        assert list(InstanceStore(path).segment_ids) == list(instance.segment_ids)
+
+def test_failed_rewrite_invalidates_existing_store():
+    instance = generate_random_instance(n_plans=2, n_segments=300, seed=6)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store")
+        write_store(instance, path)
+        # Rewriting the same directory fails in the second chunk (id too long)
+        csv_path = os.path.join(tmp, "demand.csv")
+        bad = instance.copy()
+        bad.segment_ids[-1] = "x" * 40
+        write_instance(bad, csv_path)
+        try:
+            convert_to_store(csv_path, path, chunk_size=128)
+            assert False, "ids longer than id_width accepted"
+        except ValueError:
+            pass
+        # The old meta.json no longer describes the truncated columns
+        try:
+            InstanceStore(path)
+            assert False, "store with partial columns opened"
+        except FileNotFoundError:
+            pass
+
+if __name__ == "__main__":
+    test_store_chunks_match_instance()
+    test_aggregate_preserves_total_demand()
+    test_convert_csv_to_store()
+    test_long_ids_rejected_and_failed_write_incomplete()
+    test_failed_rewrite_invalidates_existing_store()
+    print("Instance store tests passed.")
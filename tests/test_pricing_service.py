@@ -0,0 +1,130 @@
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from controllers.pricing_service import PricingService, ServiceClient, request_key
+from models.optimization_model import PricingModel
+from utils.data_generator import generate_demo_data, generate_random_instance
+from utils.serialization import from_jsonable
+
+def _problem(capacity_scale=1.0, budget=30.0):
+    plans, segments, capacity = generate_demo_data()
+    return {'plans': plans, 'segments': segments, 'capacity': capacity * capacity_scale, 'time_budget': budget}
+
+async def _with_service(coro, **kwargs):
+    service = PricingService(port=0, **kwargs)
+    port = await service.start()
+    try:
+        return await coro(service, port)
+    finally:
+        await service.stop()
+
+def test_request_key_ignores_budget():
+    assert request_key(_problem(budget=1)) == request_key(_problem(budget=5))
+    assert request_key(_problem(0.5)) != request_key(_problem())
+
+def test_validation_and_routes():
+    async def run(service, port):
+        client = ServiceClient(service.host, port)
+        assert (await client.request("GET", "/health"))[0] == 200
+        assert (await client.request("POST", "/solve", {'plans': []}))[0] == 400
+        assert (await client.request("POST", "/solve", dict(_problem(), time_budget=-1)))[0] == 400
+        assert (await client.request("GET", "/nowhere"))[0] == 404
+        await client.close()
+        # A malformed Content-Length gets a 400, not a dropped connection
+        for length in ("abc", "-5"):
+            reader, writer = await asyncio.open_connection(service.host, port)
+            writer.write(f"POST /solve HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            await writer.drain()
+            assert (await reader.readline()).split()[1] == b"400"
+            writer.close()
+    asyncio.run(_with_service(run, workers=1))
+
+def test_coalescing_and_back_pressure():
+    if not PricingModel().check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+
+    async def run(service, port):
+        clients = [ServiceClient(service.host, port) for _ in range(5)]
+        # Four identical requests and one distinct one; one worker and no queue.
+        # The first request is sent alone, so it is the one that occupies the worker.
+        problems = [_problem()] * 4 + [_problem(0.5)]
+        first = asyncio.ensure_future(clients[0].request("POST", "/solve", problems[0]))
+        while not service._inflight:
+            await asyncio.sleep(0.01)
+        rest = await asyncio.gather(*(c.request("POST", "/solve", p) for c, p in zip(clients[1:], problems[1:])))
+        replies = [await first] + rest
+        for client in clients:
+            await client.close()
+        return replies, dict(service.counters)
+
+    replies, counters = asyncio.run(_with_service(run, workers=1, max_queue=0))
+    statuses = [status for status, _ in replies]
+    assert statuses[:4] == [200] * 4
+    assert statuses[4] == 503
+    assert counters['solves'] == 1 and counters['coalesced'] == 3 and counters['rejected'] == 1
+    assert sum(body['coalesced'] for _, body in replies[:4]) == 3
+
+    plans, segments, capacity = generate_demo_data()
+    reference = PricingModel().build_and_solve(plans, segments, capacity, verbose=False)
+    results = from_jsonable(replies[0][1]['results'])
+    assert abs(results['objective'] - reference['objective']) < 1e-3 * abs(reference['objective'])
+    assert results['quantities'].keys() == reference['quantities'].keys()
+
+def _slow_problem(budget):
+    # Takes about 4 s to prove optimal; an incumbent is found within 0.5 s
+    plans, segments, capacity = generate_random_instance(n_plans=4, n_segments=20, seed=1).to_dicts()
+    return {'plans': plans, 'segments': segments, 'capacity': capacity, 'time_budget': budget}
+
+def test_time_budget_returns_incumbent():
+    if not PricingModel().check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    budget = 2.5
+
+    async def run(service, port):
+        client = ServiceClient(service.host, port)
+        reply = await client.request("POST", "/solve", _slow_problem(budget))
+        await client.close()
+        return reply
+
+    status, body = asyncio.run(_with_service(run, workers=1))
+    assert status == 200
+    assert body['results']['status'] == 'TimeLimit'
+    # Queueing (worker start-up) and solving together use the budget
+    assert abs(body['queue_time'] + body['solve_time'] - budget) < 0.5
+
+def test_coalesced_request_keeps_its_budget():
+    if not PricingModel().check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+
+    async def run(service, port):
+        clients = [ServiceClient(service.host, port) for _ in range(2)]
+        long = asyncio.ensure_future(clients[0].request("POST", "/solve", _slow_problem(30.0)))
+        while not service._inflight:
+            await asyncio.sleep(0.01)
+        start = asyncio.get_running_loop().time()
+        short = await clients[1].request("POST", "/solve", _slow_problem(1.0))
+        waited = asyncio.get_running_loop().time() - start
+        replies = [await long, short]
+        for client in clients:
+            await client.close()
+        return replies, waited, dict(service.counters)
+
+    (long, short), waited, counters = asyncio.run(_with_service(run, workers=1))
+    assert short[0] == 504 and waited < 2.0
+    assert long[0] == 200 and long[1]['results']['status'] == 'Optimal'
+    assert counters['solves'] == 1 and counters['coalesced'] == 1 and counters['timeouts'] == 1
+
+if __name__ == "__main__":
+    test_request_key_ignores_budget()
+    test_validation_and_routes()
+    test_coalescing_and_back_pressure()
+    test_time_budget_returns_incumbent()
+    test_coalesced_request_keeps_its_budget()
+    print("Pricing service tests passed.")
@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.profiling import Tracer, tracer
+from utils.data_generator import generate_demo_data
+
+def test_tracer_events():
+    t = Tracer()
+    assert not t.enabled
+    with t.span("ignored"):
+        pass
+    assert t.events == [] and t.flow_start("flow") is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        t.enable(path, cprofile=True)
+        with t.span("outer", size=3):
+            flow_id = t.flow_start("handoff")
+            with t.span("inner"):
+                time.sleep(0.01)
+
+        def worker():
+            t.name_thread("worker")
+            with t.span("worker.run"):
+                t.flow_step("handoff", flow_id)
+                time.sleep(0.05)
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        with t.span("finish"):
+            t.flow_end("handoff", flow_id)
+        assert t.save() == path
+
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        spans = {e['name']: e for e in events if e['ph'] == 'X'}
+        assert set(spans) == {"outer", "inner", "worker.run", "finish"}
+        outer, inner = spans["outer"], spans["inner"]
+        assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur'] + 1
+        assert outer['args']['size'] == 3
+        assert spans["worker.run"]['tid'] != outer['tid']
+        assert [e['ph'] for e in events if e.get('cat') == 'flow'] == ['s', 't', 'f']
+        assert {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': spans["worker.run"]['tid'],
+                'args': {'name': 'worker'}} in events
+        # The slowest top-level span carries its profile
+        assert spans["worker.run"]['args']['cprofile'] == os.path.join(tmp, "trace.prof")
+        assert os.path.exists(os.path.join(tmp, "trace.prof"))
+        assert 'cprofile' not in outer['args']
+
+def test_pipeline_trace():
+    from models.optimization_model import PricingModel
+    if not PricingModel().check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from controllers.app_controller import AppController
+    from models.run_store import RunStore
+    from views.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        tracer.enable(path)
+        try:
+            controller = AppController(run_store=RunStore(os.path.join(tmp, "runs.sqlite")))
+            window = MainWindow(controller)
+            controller.set_view(window)
+            window.input_tab.load_data(*generate_demo_data())
+            controller.run_optimization()
+            controller.worker.wait()
+            app.processEvents()  # Delivers the worker's finished signal
+            tracer.save()
+            assert len(controller.run_store.runs()) == 1
+            controller.run_store.close()
+        finally:
+            tracer.enabled = False
+            tracer.events.clear()
+
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+    names = {e['name'] for e in events if e['ph'] == 'X'}
+    for name in ("InputTab.get_instance", "AppController.run_optimization", "OptimizationWorker.run",
+                 "build_and_solve.build", "build_and_solve.presolve", "build_and_solve.optimize",
+                 "build_and_solve.extract", "ResultsTab.display_results", "ChartsTab.plot_results",
+                 "ResultsDashboard.update"):
+        assert name in names, name
+    flow = [e for e in events if e.get('cat') == 'flow']
+    assert [e['ph'] for e in flow] == ['s', 't', 'f']
+    assert flow[0]['tid'] == flow[2]['tid'] != flow[1]['tid']
+
+if __name__ == "__main__":
+    test_tracer_events()
+    test_pipeline_trace()
+    print("Profiling tests passed.")
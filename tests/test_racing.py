@@ -0,0 +1,70 @@
+import sys
+import os
+import json
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.instance import PricingInstance
+from models.optimization_model import PricingModel
+from models.price_search import search_prices
+from utils.data_generator import generate_demo_data, generate_random_instance
+
+def test_price_search_feasible():
+    instance = generate_random_instance(n_plans=4, n_segments=200, seed=21)
+    found = search_prices(instance, cannibalization_margin=5.0, restarts=3)
+    assert found is not None
+    ev = found['evaluation']
+    assert ev['capacity_ok']
+    assert (ev['choice'] >= 0).all()
+    ordered = found['prices'][np.argsort(instance.data_limit)]
+    assert np.all(np.diff(ordered) >= 5.0 - 1e-9)
+    assert abs(found['objective'] - ev['total_profit']) < 1e-6
+
+def test_price_search_stops():
+    instance = generate_random_instance(n_plans=4, n_segments=200, seed=22)
+    assert search_prices(instance, should_stop=lambda: True) is None
+
+def test_race_matches_single_solve():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    reference = model.build_and_solve(plans, segments, capacity, verbose=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "race.jsonl")
+        for workers in (1, 2):
+            results = model.solve_race(plans, segments, capacity, workers=workers, log_path=log_path)
+            assert results['status'] == 'Optimal'
+            assert abs(results['objective'] - reference['objective']) < 1e-3 * abs(reference['objective'])
+            race = results['race']
+            assert race['proved_by']
+            assert race['winner'] in [r['name'] for r in race['racers']]
+        with open(log_path) as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 2
+        assert all(record['winner'] for record in records)
+
+def test_indicator_formulation():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    reference = model.build_and_solve(plans, segments, capacity, verbose=False)
+    results = model.solve_race(plans, segments, capacity, workers=1,
+                               configurations=[{'name': 'indicator', 'formulation': 'indicator'}])
+    assert results['race']['winner'] == 'indicator'
+    assert abs(results['objective'] - reference['objective']) < 1e-3 * abs(reference['objective'])
+
+if __name__ == "__main__":
+    test_price_search_feasible()
+    test_price_search_stops()
+    test_race_matches_single_solve()
+    test_indicator_formulation()
+    print("Racing tests passed.")
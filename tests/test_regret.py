@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from models.evaluator import NO_PLAN, evaluate_prices, to_results
+from models.instance import PricingInstance
+from models.regret import choice_from_results, regret_matrix, regret_frame, regret_summary
+from utils.data_generator import generate_demo_data, generate_random_instance
+from views.chart_builders import draw_regret_heatmap, regret_heatmap_order
+
+def test_matches_scalar_reference():
+    plans, segments, capacity = generate_demo_data()
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    prices = {'P1': 13.5, 'P2': 21.25, 'P3': 26.25, 'P4': 62.5}
+    matrix = regret_matrix(instance, prices)
+    for i, s in enumerate(segments):
+        chosen = matrix['choice'][i]
+        for j, plan in enumerate(plans):
+            params = s['params'].get(plan['id'], {'a': 0, 'b': 0})
+            q = max(params['a'] - params['b'] * prices[plan['id']], 0.0)
+            profit = q * (prices[plan['id']] - plan['cost'])
+            assert abs(matrix['quantity'][i, j] - q) < 1e-9
+            assert abs(matrix['profit'][i, j] - profit) < 1e-6
+            assert abs(matrix['usage'][i, j] - q * plan['data_limit']) < 1e-6
+            assert abs(matrix['regret'][i, j] - (profit - matrix['profit'][i, chosen])) < 1e-6
+    # Under the profit rule nobody regrets their choice
+    assert (matrix['regret'] <= 1e-9).all()
+    np.testing.assert_array_equal(matrix['best_plan'], matrix['choice'])
+
+def test_choice_from_results_and_evaluator_agree():
+    instance = generate_random_instance(n_plans=4, n_segments=50, seed=3)
+    evaluation = evaluate_prices(instance, instance.cost * 2)
+    choice = choice_from_results(instance, to_results(instance, evaluation))
+    np.testing.assert_array_equal(choice, evaluation['choice'])
+    matrix = regret_matrix(instance, evaluation['prices'], choice)
+    bought = choice != NO_PLAN
+    rows = np.arange(instance.n_segments)[bought]
+    np.testing.assert_allclose(matrix['profit'][rows, choice[bought]], evaluation['profit'][bought])
+    np.testing.assert_allclose(matrix['regret'][rows, choice[bought]], 0.0)
+
+def test_frame_and_summary():
+    instance = generate_random_instance(n_plans=3, n_segments=20, seed=4)
+    prices = instance.cost * 2
+    # Force every segment onto plan 0 so other plans show positive regret
+    matrix = regret_matrix(instance, prices, np.zeros(instance.n_segments, dtype=np.int64))
+    frame = regret_frame(instance, matrix)
+    assert len(frame) == 60
+    assert frame['chosen'].sum() == 20
+    assert (frame.loc[frame['chosen'], 'plan'] == instance.plan_ids[0]).all()
+    np.testing.assert_allclose(frame['regret'].to_numpy().reshape(20, 3), matrix['regret'])
+    summary = regret_summary(instance, matrix)
+    assert summary.loc[instance.plan_ids[0], 'segments_chosen'] == 20
+    assert summary.loc[instance.plan_ids[0], 'segments_better'] == 0
+    assert summary['forgone_profit'].sum() > 0
+
+def test_large_instance_heatmap():
+    instance = generate_random_instance(n_plans=5, n_segments=20000, seed=5)
+    start = time.perf_counter()
+    matrix = regret_matrix(instance, instance.cost * 2)
+    frame = regret_frame(instance, matrix)
+    assert len(frame) == 100000
+    order = regret_heatmap_order(matrix)
+    assert (np.diff(matrix['choice'][order]) >= 0).all()
+    figure = Figure()
+    ax = draw_regret_heatmap(figure, instance, matrix)
+    assert ax.images[0].get_array().shape == (20000, 5)
+    assert time.perf_counter() - start < 10
+
+if __name__ == "__main__":
+    test_matches_scalar_reference()
+    test_choice_from_results_and_evaluator_agree()
+    test_frame_and_summary()
+    test_large_instance_heatmap()
+    print("Regret tests passed.")
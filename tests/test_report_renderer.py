@@ -0,0 +1,39 @@
+import sys
+import os
+import pickle
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.evaluator import evaluate_prices, to_results
+from utils.data_generator import generate_random_instance
+from utils.report_renderer import render_reports, load_scenarios, main
+
+def _scenarios(n):
+    instance = generate_random_instance(n_plans=3, n_segments=20, seed=9)
+    return [(f"scenario {k}", to_results(instance, evaluate_prices(instance, instance.cost * (1.5 + 0.1 * k))))
+            for k in range(n)]
+
+def test_render_in_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = render_reports(_scenarios(2), tmp, formats=('png', 'svg', 'pdf'), workers=1)
+        assert len(paths) == 6
+        assert all(os.path.getsize(p) > 0 for p in paths)
+        assert os.path.basename(paths[0]) == "scenario_0.png"
+
+def test_render_parallel_from_pickles():
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl = os.path.join(tmp, "sweep.pkl")
+        with open(pkl, 'wb') as f:
+            pickle.dump([r for _, r in _scenarios(4)], f)
+        assert [name for name, _ in load_scenarios([pkl])] == [f"sweep_{k}" for k in range(4)]
+
+        out_dir = os.path.join(tmp, "out")
+        main([out_dir, pkl, "--formats", "png", "--workers", "2"])
+        assert sorted(os.listdir(out_dir)) == [f"sweep_{k}.png" for k in range(4)]
+
+if __name__ == "__main__":
+    test_render_in_process()
+    test_render_parallel_from_pickles()
+    print("Report renderer tests passed.")
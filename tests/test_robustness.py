@@ -0,0 +1,47 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.evaluator import evaluate_prices
+from models.robustness import simulate_robustness
+from utils.data_generator import generate_random_instance
+
+def test_zero_noise_reproduces_nominal():
+    instance = generate_random_instance(n_plans=4, n_segments=30, seed=10)
+    prices = instance.cost * 2
+    nominal = evaluate_prices(instance, prices)
+    for reassign in (True, False):
+        sim = simulate_robustness(instance, prices, n_draws=50, a_sigma=0.0, b_sigma=0.0, reassign=reassign)
+        np.testing.assert_allclose(sim['profit'], nominal['total_profit'])
+        np.testing.assert_allclose(sim['usage'], nominal['total_usage'])
+        assert sim['summary']['violation_probability'] == float(not nominal['capacity_ok'])
+
+def test_noise_statistics():
+    instance = generate_random_instance(n_plans=3, n_segments=20, seed=11)
+    prices = instance.cost * 2
+    sim = simulate_robustness(instance, prices, n_draws=20000, a_sigma=0.2, b_sigma=0.0, reassign=False)
+    nominal = evaluate_prices(instance, prices)
+    summary = sim['summary']
+    assert summary['n_draws'] == 20000
+    assert summary['profit_std'] > 0
+    assert summary['profit_quantiles'][0.05] < summary['profit_quantiles'][0.95]
+    # Noise on a is mean-preserving; clipping demand at zero can only add to it (positive margins)
+    ratio = summary['expected_profit'] / nominal['total_profit']
+    assert 0.99 < ratio < 1.1
+
+def test_results_independent_of_workers():
+    instance = generate_random_instance(n_plans=3, n_segments=10, seed=12)
+    prices = instance.cost * 2
+    serial = simulate_robustness(instance, prices, n_draws=3000, chunk_size=1000, workers=1)
+    parallel = simulate_robustness(instance, prices, n_draws=3000, chunk_size=1000, workers=2)
+    np.testing.assert_array_equal(serial['profit'], parallel['profit'])
+
+if __name__ == "__main__":
+    test_zero_noise_reproduces_nominal()
+    test_noise_statistics()
+    test_results_independent_of_workers()
+    print("Robustness tests passed.")
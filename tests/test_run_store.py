@@ -0,0 +1,120 @@
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from models.evaluator import evaluate_prices, to_results
+from models.instance import PricingInstance
+from models.run_store import INPUT_ARRAYS, RunStore
+from utils.data_generator import generate_demo_data, generate_random_instance
+from views.chart_builders import draw_history
+
+def _sweep(store, instance, n_runs):
+    """Save n_runs evaluated runs of one instance at increasing capacity and prices."""
+    for k in range(n_runs):
+        instance.capacity = 1000.0 * (k + 1)
+        evaluation = evaluate_prices(instance, instance.cost * (2 + 0.1 * k))
+        store.save_run(instance, to_results(instance, evaluation), options={'k': k},
+                       telemetry={'total_time': 0.5 + k})
+    return evaluation
+
+def test_save_and_load_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "runs.sqlite")
+        instance = generate_random_instance(n_plans=3, n_segments=40, seed=11)
+        evaluation = evaluate_prices(instance, instance.cost * 2)
+        results = to_results(instance, evaluation)
+        with RunStore(path) as store:
+            run_id = store.save_run(instance, results, options={'cannibalization_margin': 5.0},
+                                    telemetry={'total_time': 1.5, 'status': 'OPTIMAL'}, label="baseline")
+        with RunStore(path) as store:
+            run = store.load_run(run_id)
+            assert store.load_run(run_id + 1) is None
+        assert run['label'] == "baseline" and run['options'] == {'cannibalization_margin': 5.0}
+        assert run['telemetry']['status'] == 'OPTIMAL' and run['total_time'] == 1.5
+        assert abs(run['objective'] - evaluation['total_profit']) < 1e-9
+        loaded = run['instance']
+        np.testing.assert_array_equal(loaded.a, instance.a)
+        np.testing.assert_array_equal(loaded.segment_ids.astype(str), instance.segment_ids.astype(str))
+        assert loaded.capacity == instance.capacity
+        np.testing.assert_array_equal(run['choice'], evaluation['choice'])
+        np.testing.assert_allclose(run['quantity'], evaluation['quantity'])
+        np.testing.assert_allclose(run['prices'], evaluation['prices'])
+
+def test_aligned_queries():
+    store = RunStore(":memory:")
+    instance = generate_random_instance(n_plans=4, n_segments=200, seed=12)
+    last = _sweep(store, instance, 6)
+    # A run with different plans: the price table aligns on plan ids
+    plans, segments, capacity = generate_demo_data()
+    demo = PricingInstance.from_dicts(plans[:2], segments, capacity)
+    store.save_run(demo, to_results(demo, evaluate_prices(demo, demo.cost * 3)))
+
+    runs = store.runs()
+    assert list(runs.index) == list(range(1, 8))
+    assert list(store.runs(limit=2).index) == [6, 7]
+
+    prices = store.plan_table('price')
+    assert prices.shape == (7, 4)
+    np.testing.assert_allclose(prices.loc[6].to_numpy(), last['prices'])
+    assert prices.loc[7, 'P3'] != prices.loc[7, 'P3']  # NaN: plan absent from the demo subset
+    segments_per_plan = store.plan_table('segments', run_ids=[6])
+    assert segments_per_plan.loc[6].sum() == (last['choice'] >= 0).sum()
+
+    curve = store.profit_vs_capacity(run_ids=range(1, 7))
+    assert (np.diff(curve['capacity'].to_numpy()) > 0).all()
+    np.testing.assert_allclose(curve.loc[6, 'utilization'], last['total_usage'] / 6000.0)
+
+    ids, choices = store.array('choice', run_ids=range(1, 7))
+    assert ids == list(range(1, 7)) and choices.shape == (6, 200)
+    np.testing.assert_array_equal(choices[-1], last['choice'])
+    _, mixed = store.array('a')
+    assert isinstance(mixed, list) and len(mixed) == 7
+
+    figure = Figure()
+    ax_prices, ax_profit = draw_history(figure, runs, prices)
+    assert len(ax_prices.lines) == 4
+
+def test_inputs_are_shared_and_deleted():
+    store = RunStore(":memory:")
+    instance = generate_random_instance(n_plans=3, n_segments=100, seed=13)
+    _sweep(store, instance, 3)
+    n_blobs = store.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+    # Input arrays are stored once; prices, choice and quantity differ per run
+    assert n_blobs == len(INPUT_ARRAYS) + 3 * 3
+    store.delete_run(1)
+    assert store.load_run(1) is None
+    assert store.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == len(INPUT_ARRAYS) + 2 * 3
+    assert store.conn.execute("SELECT COUNT(*) FROM run_plans WHERE run_id = 1").fetchone()[0] == 0
+
+def test_controller_opens_store_lazily():
+    from controllers.app_controller import AppController
+    from models.run_store import STORE_ENV
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "runs.sqlite")
+        previous = os.environ.get(STORE_ENV)
+        os.environ[STORE_ENV] = path
+        try:
+            controller = AppController()
+            controller.refresh_history() # Nothing saved yet: no store is created
+            assert not os.path.exists(path)
+            assert len(controller.run_store.runs()) == 0
+            assert os.path.exists(path)
+            controller.run_store.close()
+        finally:
+            if previous is None:
+                os.environ.pop(STORE_ENV, None)
+            else:
+                os.environ[STORE_ENV] = previous
+
+if __name__ == "__main__":
+    test_save_and_load_round_trip()
+    test_aligned_queries()
+    test_inputs_are_shared_and_deleted()
+    test_controller_opens_store_lazily()
+    print("Run store tests passed.")
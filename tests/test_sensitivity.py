@@ -0,0 +1,72 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.optimization_model import PricingModel
+from models.sensitivity import capacity_gain, parameter_range
+from utils.data_generator import generate_demo_data
+
+# Below the unconstrained usage of the demo data (52800 GB), so capacity binds
+BINDING_CAPACITY = 40000.0
+
+def test_parametric_ranging():
+    # max 3p - p^2/2  s.t. p <= 2, -p <= 0: optimum p = 2 with multiplier 1
+    qp = {'H': np.array([[1.0]]), 'G': np.array([[1.0], [-1.0]]), 'h': np.array([2.0, 0.0])}
+    p, mu = np.array([2.0]), np.array([1.0, 0.0])
+    # Raising the bound: p follows until the multiplier reaches 0 at p = 3;
+    # lowering it: p follows down to 0
+    rng = parameter_range(qp, p, mu, np.zeros(1), np.array([1.0, 0.0]))
+    assert np.allclose(rng['t_range'], (-2.0, 1.0))
+    assert np.allclose(rng['dp'], [1.0]) and np.allclose(rng['dmu'], [-1.0, 0.0])
+
+def test_capacity_dual_matches_resolves():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, _ = generate_demo_data()
+    results = model.build_and_solve(plans, segments, BINDING_CAPACITY, verbose=False, sensitivity=True)
+    sens = results['sensitivity']
+    assert abs(sens['objective'] - results['objective']) < 1e-4 * abs(results['objective'])
+    assert 'capacity_constr' in sens['active']
+    cap = sens['capacity']
+    assert cap['dual'] > 0 and cap['dual_slope'] < 0
+    lo, hi = cap['range']
+    assert lo < BINDING_CAPACITY < hi
+    # Upper end: the capacity at which the constraint stops binding (unconstrained usage)
+    assert abs(hi - 52800.0) < 1.0
+
+    for delta in (-1000.0, 1000.0):
+        resolved = model.build_and_solve(plans, segments, BINDING_CAPACITY + delta, verbose=False)
+        gain = capacity_gain(sens, delta)
+        assert abs(gain - (resolved['objective'] - results['objective'])) < 1e-3
+    assert capacity_gain(sens, hi - BINDING_CAPACITY + 1000.0) is None
+
+def test_cost_marginals():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, _ = generate_demo_data()
+    results = model.build_and_solve(plans, segments, BINDING_CAPACITY, verbose=False, sensitivity=True)
+    sens = results['sensitivity']
+    for plan in plans:
+        entry = sens['costs'][plan['id']]
+        lo, hi = entry['range']
+        assert lo <= plan['cost'] <= hi
+        bumped = [dict(p, cost=p['cost'] + 0.1 if p['id'] == plan['id'] else p['cost']) for p in plans]
+        resolved = model.build_and_solve(bumped, segments, BINDING_CAPACITY, verbose=False)
+        slope = (resolved['objective'] - results['objective']) / 0.1
+        assert abs(slope - entry['marginal']) <= 0.01 * abs(entry['marginal']) + 1e-3
+    for name, entry in sens['order'].items():
+        assert entry['dual'] <= 1e-9 and entry['slack'] >= -1e-6
+
+if __name__ == "__main__":
+    test_parametric_ranging()
+    test_capacity_dual_matches_resolves()
+    test_cost_marginals()
+    print("Sensitivity tests passed.")
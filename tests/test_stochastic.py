@@ -0,0 +1,79 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.instance import PricingInstance
+from models.optimization_model import PricingModel, _conditional_objective
+from models.robustness import sample_scenarios
+from utils.data_generator import generate_demo_data
+
+def _demo_scenarios(n_scenarios, seed=0):
+    plans, segments, capacity = generate_demo_data()
+    instance = PricingInstance.from_dicts(plans, segments, capacity)
+    return plans, sample_scenarios(instance, n_scenarios, a_sigma=0.1, b_sigma=0.1, seed=seed), capacity
+
+def test_single_scenario_matches_deterministic():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    nominal = model.build_and_solve(plans, segments, capacity, verbose=False)
+    saa = model.build_and_solve_saa(plans, [segments], capacity, verbose=False)
+    assert abs(saa['objective'] - nominal['objective']) < 1e-3 * abs(nominal['objective'])
+
+def test_progressive_hedging_close_to_extensive_form():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, scenarios, capacity = _demo_scenarios(2)
+
+    saa = model.build_and_solve_saa(plans, scenarios, capacity, verbose=False)
+    assert saa is not None
+    assert len(saa['scenario_results']) == 2
+    assert not any(saa['capacity_violations'])
+
+    ph = model.solve_progressive_hedging(plans, scenarios, capacity, workers=2, max_iter=30)
+    assert ph is not None
+    # PH is a heuristic for the non-convex model: it cannot beat the extensive form
+    assert ph['objective'] <= saa['objective'] + 1e-3 * abs(saa['objective'])
+    assert ph['objective'] >= 0.95 * saa['objective']
+    assert ph['history'][-1] <= 0.01 or ph['status'] == 'MaxIterations'
+    assert not any(ph['capacity_violations']) and abs(ph['feasible_probability'] - 1.0) < 1e-9
+    prices = list(ph['prices'].values())
+    assert all(hi >= lo for lo, hi in zip(prices, prices[1:]))
+
+def test_chance_constraint_relaxes_capacity():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, scenarios, capacity = _demo_scenarios(2, seed=1)
+    free = model.build_and_solve_saa(plans, scenarios, capacity, verbose=False)
+    # Binding capacity: below the usage of the unconstrained solution in every scenario
+    tight = 0.9 * min(r['total_usage'] for r in free['scenario_results'])
+    hard = model.build_and_solve_saa(plans, scenarios, tight, verbose=False)
+    chance = model.build_and_solve_saa(plans, scenarios, tight, capacity_level=0.5, verbose=False)
+    assert not any(hard['capacity_violations'])
+    assert hard['objective'] < free['objective']
+    assert chance['objective'] >= hard['objective'] - 1e-6
+    assert sum(chance['capacity_violations']) <= 1
+
+def test_conditional_objective_over_feasible_scenarios():
+    # An infeasible scenario (None) is excluded, not counted as zero profit
+    objective, mass = _conditional_objective([0.5, 0.25, 0.25], [{'objective': 100.0}, None, {'objective': 40.0}])
+    assert abs(mass - 0.75) < 1e-12
+    assert abs(objective - 80.0) < 1e-9
+    assert _conditional_objective([0.5, 0.5], [None, None]) == (None, 0.0)
+    objective, mass = _conditional_objective([0.5, 0.5], [{'objective': 10.0}, {'objective': 30.0}])
+    assert abs(objective - 20.0) < 1e-9 and abs(mass - 1.0) < 1e-12
+
+if __name__ == "__main__":
+    test_single_scenario_matches_deterministic()
+    test_progressive_hedging_close_to_extensive_form()
+    test_chance_constraint_relaxes_capacity()
+    test_conditional_objective_over_feasible_scenarios()
+    print("Stochastic tests passed.")
@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.optimization_model import PricingModel
+from models.telemetry import TelemetryLog, latency_percentiles, prometheus_text, read_records, write_prometheus
+from utils.data_generator import generate_demo_data
+
+def _record(solve, size_class, total_time, status="OPTIMAL"):
+    return {'solve': solve, 'size_class': size_class, 'status': status, 'total_time': total_time,
+            'build_time': 0.01, 'presolve_time': 0.02, 'optimize_time': total_time - 0.02,
+            'extract_time': 0.005, 'node_count': 10, 'iter_count': 100}
+
+def test_solve_telemetry():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "telemetry.jsonl")
+        model = PricingModel(telemetry=TelemetryLog(path))
+        if not model.check_solver():
+            print("SKIP: Gurobi not available.")
+            return
+        plans, segments, capacity = generate_demo_data()
+        results = model.build_and_solve(plans, segments, capacity, verbose=False)
+        record = model.last_telemetry
+        assert record['solve'] == "build_and_solve"
+        assert record['status'] == "OPTIMAL"
+        assert record['n_plans'] == len(plans) and record['n_segments'] == len(segments)
+        assert record['num_bin_vars'] > 0 and record['num_vars'] > record['num_bin_vars']
+        assert abs(record['objective'] - results['objective']) < 1e-6
+        for phase in ('build', 'presolve', 'optimize', 'extract'):
+            assert record[f"{phase}_time"] >= 0
+        assert record['presolve_time'] <= record['optimize_time'] + 1e-6
+        assert record['total_time'] >= record['build_time'] + record['optimize_time']
+
+        model.build_and_solve(plans, segments, capacity * 0.5, verbose=False)
+        records = read_records(path)
+        assert len(records) == 2
+        assert records[0] == record
+
+def test_prometheus_export():
+    records = [_record("build_and_solve", "small", t) for t in (0.03, 0.2, 0.4, 4.0)]
+    records.append(_record("racer", None, 12.0, status="TIME_LIMIT"))
+    text = prometheus_text(records)
+    assert "# TYPE pricing_solve_seconds histogram" in text
+    small = 'solve="build_and_solve",size_class="small",status="OPTIMAL"'
+    assert f'pricing_solve_seconds_bucket{{{small},le="0.25"}} 2' in text
+    assert f'pricing_solve_seconds_bucket{{{small},le="+Inf"}} 4' in text
+    assert f'pricing_solve_seconds_count{{{small}}} 4' in text
+    assert 'pricing_solves_total{solve="racer",size_class="unclassified",status="TIME_LIMIT"} 1' in text
+    assert 'pricing_solve_nodes_total{solve="build_and_solve",size_class="small"} 40' in text
+    assert 'phase="presolve"' in text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics.prom")
+        write_prometheus(records, path)
+        with open(path) as f:
+            assert f.read() == text
+
+    summary = latency_percentiles(records)
+    assert summary['small'][0.5] == 0.4
+    assert summary['small'][0.99] == 4.0
+    assert summary['unclassified'][0.5] == 12.0
+
+def test_failed_solve_recorded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "telemetry.jsonl")
+        model = PricingModel(telemetry=TelemetryLog(path))
+        if not model.check_solver():
+            print("SKIP: Gurobi not available.")
+            return
+        import numpy as np
+        from models.cells import CellCoverage
+        plans, segments, capacity = generate_demo_data()
+        model.build_and_solve(plans, segments, capacity, verbose=False)
+        # A coverage without the demo segments makes the build raise
+        coverage = CellCoverage(np.ones((1, 1)), [1000.0], ["unknown"])
+        assert model.build_and_solve(plans, segments, capacity, verbose=False, cells=coverage) is None
+        record = model.last_telemetry
+        assert record['status'] == "ERROR" and "no column" in record['error']
+        assert record['objective'] is None and record['bound'] is None
+        records = read_records(path)
+        assert [r['status'] for r in records] == ["OPTIMAL", "ERROR"]
+        assert 'status="ERROR"' in prometheus_text(records)
+
+if __name__ == "__main__":
+    test_solve_telemetry()
+    test_prometheus_export()
+    test_failed_solve_recorded()
+    print("Telemetry tests passed.")
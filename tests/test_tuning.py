@@ -0,0 +1,72 @@
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.optimization_model import PricingModel
+from models.solver_profiles import load_profiles, save_profiles, select_params, size_class
+from utils.data_generator import generate_demo_data
+
+PROFILES = {
+    'version': 1,
+    'size_classes': [
+        {'name': 'small', 'max_pairs': 16, 'params': {'MIPFocus': 1}},
+        {'name': 'medium', 'max_pairs': 40, 'params': {'Presolve': 2}},
+        {'name': 'large', 'max_pairs': None, 'params': {}},
+    ],
+}
+
+def test_profile_selection():
+    assert select_params(PROFILES, 4, 3) == {'MIPFocus': 1}
+    assert select_params(PROFILES, 4, 4) == {'MIPFocus': 1}
+    assert select_params(PROFILES, 4, 5) == {'Presolve': 2}
+    assert size_class(PROFILES, 10, 1000)['name'] == 'large'
+    assert select_params({'version': 1, 'size_classes': []}, 4, 3) == {}
+
+def test_profile_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiles.json")
+        assert load_profiles(path)['size_classes'] == []
+        save_profiles(PROFILES, path)
+        assert load_profiles(path) == PROFILES
+
+def test_profile_applied_to_solve():
+    model = PricingModel(profiles=PROFILES)
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    untuned = PricingModel(profiles={})
+    default = untuned.build_and_solve(plans, segments, capacity, verbose=False)
+    assert untuned.last_telemetry['params'] == {}
+    tuned = model.build_and_solve(plans, segments, capacity, verbose=False)
+    # The demo (4 plans x 3 segments) is in the 'small' class
+    assert model.last_telemetry['params'] == {'MIPFocus': 1}
+    explicit = model.build_and_solve(plans, segments, capacity, verbose=False, params={'MIPFocus': 3})
+    assert model.last_telemetry['params']['MIPFocus'] == 3
+    for results in (tuned, explicit):
+        assert abs(results['objective'] - default['objective']) < 1e-3 * abs(default['objective'])
+
+def test_tuning_harness():
+    if not PricingModel().check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    from models.tuning import tune_profiles
+
+    size_classes = [{'name': 'tiny', 'max_pairs': None, 'n_plans': 3, 'n_segments': 3}]
+    profiles = tune_profiles(size_classes, candidates=[{}, {'MIPFocus': 1}], n_instances=2,
+                             time_limit=5.0, log=lambda msg: None)
+    cls = profiles['size_classes'][0]
+    assert cls['params'] in ({}, {'MIPFocus': 1})
+    assert cls['tuning']['best_score'] <= cls['tuning']['default_score']
+    assert len(cls['tuning']['scores']) >= 2
+    assert select_params(profiles, 3, 3) == cls['params']
+
+if __name__ == "__main__":
+    test_profile_selection()
+    test_profile_round_trip()
+    test_profile_applied_to_solve()
+    test_tuning_harness()
+    print("Tuning tests passed.")
@@ -0,0 +1,154 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from models.optimization_model import PricingModel
+import multiprocessing
+
+from models.worker_pool import Coordinator, _Connection, _wait_for_workers, execute_job, run_local
+from utils.data_generator import generate_demo_data
+from utils.serialization import dumps, loads
+
+def test_serialization_round_trip():
+    results = {
+        'status': 'Optimal',
+        'objective': np.float64(1.5),
+        'prices': {'P1': 10.0},
+        'quantities': {('P1', 'S1'): 2.0, ('P2', 'S1'): 0.0},
+        'history': np.array([1.0, 0.5]),
+    }
+    restored = loads(dumps(results))
+    assert restored['quantities'] == {('P1', 'S1'): 2.0, ('P2', 'S1'): 0.0}
+    assert restored['objective'] == 1.5
+    assert restored['history'] == [1.0, 0.5]
+    assert restored['prices'] == {'P1': 10.0}
+
+def test_leases_retries_and_dedup():
+    jobs = {'a': {'n': 1}, 'b': {'n': 2}}
+    with Coordinator(jobs, lease_timeout=0.3, max_attempts=2) as coordinator:
+        client = _Connection(coordinator.address)
+        first = client.request({'op': 'get', 'worker': 'w1'})
+        second = client.request({'op': 'get', 'worker': 'w1'})
+        assert {first['job_id'], second['job_id']} == {'a', 'b'}
+        assert client.request({'op': 'get', 'worker': 'w1'})['op'] == 'wait'
+
+        # Job 'a' completes; a re-sent result is acknowledged as duplicate
+        done = {'op': 'result', 'job_id': first['job_id'], 'lease': first['lease'], 'result': {'x': 1}}
+        assert client.request(done)['duplicate'] is False
+        assert client.request(done)['duplicate'] is True
+
+        # The worker holding 'b' goes silent: its lease expires and 'b' is handed out again
+        time.sleep(0.5)
+        retry = client.request({'op': 'get', 'worker': 'w2'})
+        assert retry['job_id'] == second['job_id'] and retry['attempt'] == 2
+        assert client.request({'op': 'heartbeat', 'job_id': 'b', 'lease': second['lease']})['valid'] is False
+
+        # Out of attempts: the job fails instead of being retried
+        client.request({'op': 'fail', 'job_id': 'b', 'lease': retry['lease'], 'error': 'boom'})
+        assert client.request({'op': 'get', 'worker': 'w2'})['op'] == 'done'
+        assert coordinator.wait(timeout=1)
+        assert coordinator.get_results() == {first['job_id']: {'x': 1}}
+        assert coordinator.failures == {'b': 'boom'}
+        client.close()
+
+def test_completed_jobs_not_rerun():
+    with Coordinator({'a': {}, 'b': {}}, completed={'a': {'x': 1}}) as coordinator:
+        client = _Connection(coordinator.address)
+        assert client.request({'op': 'get'})['job_id'] == 'b'
+        client.close()
+
+def test_local_workers_solve_grid():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    jobs = {f"cap_{c}": {'plans': plans, 'segments': segments, 'capacity': c} for c in (20000, 40000, capacity)}
+    results, failures = run_local(jobs, n_workers=2, timeout=120)
+    assert not failures
+    assert set(results) == set(jobs)
+    for job_id, payload in jobs.items():
+        reference = model.build_and_solve(plans, segments, payload['capacity'], verbose=False)
+        assert abs(results[job_id]['objective'] - reference['objective']) < 1e-3 * abs(reference['objective'])
+        assert results[job_id]['quantities'].keys() == reference['quantities'].keys()
+
+def test_unsolvable_job_fails():
+    model = PricingModel()
+    if not model.check_solver():
+        print("SKIP: Gurobi not available.")
+        return
+    plans, segments, capacity = generate_demo_data()
+    # Negative capacity: infeasible even with no plan bought
+    bad = {'plans': plans, 'segments': segments, 'capacity': -1.0}
+    try:
+        execute_job(model, bad)
+        assert False, "infeasible job returned a result"
+    except RuntimeError as e:
+        assert "solve failed" in str(e)
+    jobs = {'bad': bad, 'good': {'plans': plans, 'segments': segments, 'capacity': capacity}}
+    results, failures = run_local(jobs, n_workers=1, max_attempts=2, timeout=120)
+    assert set(results) == {'good'}
+    assert set(failures) == {'bad'} and "solve failed" in failures['bad']
+
+def test_malformed_messages():
+    with Coordinator({'a': {}}) as coordinator:
+        client = _Connection(coordinator.address, retries=0)
+        # Valid JSON that is not an object gets an error reply, and the server keeps serving
+        assert client.request([1, 2])['op'] == 'error'
+        assert client.request("get")['op'] == 'error'
+        assert client.request({'op': 'get'})['job_id'] == 'a'
+        client.close()
+
+def test_client_retries_garbled_reply():
+    import socket
+    import threading
+
+    server = socket.create_server(('127.0.0.1', 0))
+    replies = [b'{"op": "ack", "dupl\n', b'{"op": "ack", "duplicate": false}\n']
+
+    def serve():
+        # One connection per reply: a truncated one, then a valid one
+        for reply in replies:
+            conn, _ = server.accept()
+            with conn, conn.makefile("rwb") as f:
+                f.readline()
+                f.write(reply)
+                f.flush()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    client = _Connection(server.getsockname(), retries=1, backoff=0.01)
+    assert client.request({'op': 'result', 'job_id': 'a'}) == {'op': 'ack', 'duplicate': False}
+    client.close()
+    thread.join(timeout=5)
+    server.close()
+
+def test_dead_workers_fail_remaining_jobs():
+    with Coordinator({'a': {}, 'b': {}}) as coordinator:
+        # Workers that exit at once without taking any job
+        ctx = multiprocessing.get_context('spawn')
+        workers = [ctx.Process(target=time.sleep, args=(0,)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        start = time.monotonic()
+        assert _wait_for_workers(coordinator, workers, timeout=None)
+        assert time.monotonic() - start < 30
+        assert set(coordinator.failures) == {'a', 'b'}
+        for worker in workers:
+            worker.join()
+
+if __name__ == "__main__":
+    test_serialization_round_trip()
+    test_leases_retries_and_dedup()
+    test_completed_jobs_not_rerun()
+    test_local_workers_solve_grid()
+    test_unsolvable_job_fails()
+    test_malformed_messages()
+    test_client_retries_garbled_reply()
+    test_dead_workers_fail_remaining_jobs()
+    print("Worker pool tests passed.")
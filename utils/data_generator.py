@@ -1,3 +1,8 @@
+import numpy as np
+
+from models.instance import PricingInstance
+
+
 def generate_demo_data():
     """
     Generates a dictionary of demo data.
@@ -46,3 +51,43 @@ def generate_demo_data():
     capacity = 100000.0 # big enough default
 
     return plans, segments, capacity
+
+
+def generate_random_instance(n_plans=4, n_segments=1000, seed=0, capacity=None):
+    """
+    Generates a random PricingInstance of the given size.
+
+    Plans get increasing data limits and costs. Each segment has a
+    willingness-to-pay scale, so demand q = a - b*p reaches zero at a
+    reservation price that grows with the plan's data allowance.
+    Roughly 20% of (segment, plan) pairs have no demand at all (a = b = 0).
+    """
+    rng = np.random.default_rng(seed)
+
+    data_limit = np.round(np.geomspace(1.0, 100.0, n_plans), 1)
+    cost = np.round(2.0 + 0.25 * data_limit, 2)
+
+    # Reservation price per (segment, plan): cost * markup, where markup grows with the segment's budget
+    budget = rng.lognormal(mean=0.0, sigma=0.5, size=(n_segments, 1))
+    markup = 1.2 + budget * rng.uniform(0.5, 2.0, size=(n_segments, n_plans))
+    reservation = cost[None, :] * markup
+
+    b = np.round(rng.uniform(10.0, 200.0, size=(n_segments, n_plans)), 1)
+    a = np.round(b * reservation, 1)
+
+    no_demand = rng.random((n_segments, n_plans)) < 0.2
+    a[no_demand] = 0.0
+    b[no_demand] = 0.0
+
+    if capacity is None:
+        # About half of what the segments would use if each one bought its largest plan at half its reservation price
+        capacity = float(np.round(0.5 * np.sum(np.max(0.5 * a * data_limit[None, :], axis=1)), -3))
+
+    plan_ids = [f"P{j+1}" for j in range(n_plans)]
+    plan_names = [f"Plan {dl:g}GB" for dl in data_limit]
+    segment_ids = [f"S{i+1}" for i in range(n_segments)]
+    segment_names = [f"Segment {i+1}" for i in range(n_segments)]
+    size = rng.integers(100, 10000, size=n_segments).astype(float)
+
+    return PricingInstance(plan_ids, plan_names, data_limit, cost,
+                           segment_ids, segment_names, size, a, b, capacity)
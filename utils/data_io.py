@@ -0,0 +1,162 @@
+"""
+Bulk import/export of pricing instances as CSV or Parquet.
+
+Segments are stored in wide format, one row per segment:
+    id, name, size, a_<plan_id>, b_<plan_id>, ...
+Plan attributes live in a sibling file named '<stem>_plans<ext>' with
+columns id, name, data_limit, cost.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.instance import PricingInstance
+
+PLAN_COLUMNS = ['id', 'name', 'data_limit', 'cost']
+SUPPORTED_EXTENSIONS = ('.csv', '.parquet')
+
+
+def plans_path_for(path):
+    """Return the sibling plans file path for a segments/demand file."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_plans{ext}"
+
+
+def _read_table(path, text_columns=()):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return pd.read_csv(path, dtype={c: str for c in text_columns})
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    raise ValueError(f"Unsupported file type '{ext}'. Use one of {SUPPORTED_EXTENSIONS}.")
+
+
+def _write_table(df, path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        df.to_csv(path, index=False)
+    elif ext == '.parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported file type '{ext}'. Use one of {SUPPORTED_EXTENSIONS}.")
+
+
+def _read_plans(path, plans=None):
+    """Return (ids, names, data_limit, cost) from the sibling plans file or the given plans."""
+    p_path = plans_path_for(path)
+    if os.path.exists(p_path):
+        plans_df = _read_table(p_path, text_columns=('id', 'name'))
+        missing = [c for c in PLAN_COLUMNS if c not in plans_df.columns]
+        if missing:
+            raise ValueError(f"Plans file is missing columns: {missing}")
+        return (plans_df['id'].astype(str).to_numpy(dtype=object),
+                plans_df['name'].astype(str).to_numpy(dtype=object),
+                plans_df['data_limit'].to_numpy(dtype=float),
+                plans_df['cost'].to_numpy(dtype=float))
+    if plans:
+        return ([p['id'] for p in plans], [p['name'] for p in plans],
+                [p['data_limit'] for p in plans], [p['cost'] for p in plans])
+    raise ValueError(f"No plans file found at '{p_path}' and no plans defined.")
+
+
+def _frame_to_instance(seg_df, plan_info, capacity):
+    plan_ids, plan_names, data_limit, cost = plan_info
+    if 'id' not in seg_df.columns:
+        raise ValueError("Segments file must have an 'id' column.")
+
+    n_s, n_f = len(seg_df), len(plan_ids)
+    segment_ids = seg_df['id'].astype(str).to_numpy(dtype=object)
+    if 'name' in seg_df.columns:
+        segment_names = seg_df['name'].astype(str).to_numpy(dtype=object)
+    else:
+        segment_names = segment_ids.copy()
+    size = seg_df['size'].to_numpy(dtype=float) if 'size' in seg_df.columns else np.zeros(n_s)
+
+    # Missing demand columns default to zero demand, as in the input tab
+    a = np.zeros((n_s, n_f))
+    b = np.zeros((n_s, n_f))
+    for j, pid in enumerate(plan_ids):
+        if f"a_{pid}" in seg_df.columns:
+            a[:, j] = seg_df[f"a_{pid}"].to_numpy(dtype=float)
+        if f"b_{pid}" in seg_df.columns:
+            b[:, j] = seg_df[f"b_{pid}"].to_numpy(dtype=float)
+
+    return PricingInstance(plan_ids, plan_names, data_limit, cost,
+                           segment_ids, segment_names, size, a, b, capacity)
+
+
+def read_instance(path, plans=None, capacity=0.0):
+    """
+    Load a demand matrix (and its plans file) into a PricingInstance.
+
+    Args:
+        path (str): Segments/demand file (.csv or .parquet).
+        plans (list of dict): Plans to use when no sibling plans file exists.
+        capacity (float): Network capacity to attach to the instance.
+
+    Returns:
+        PricingInstance
+    """
+    plan_info = _read_plans(path, plans)
+    seg_df = _read_table(path, text_columns=('id', 'name'))
+    return _frame_to_instance(seg_df, plan_info, capacity)
+
+
+def iter_instance_chunks(path, plans=None, capacity=0.0, chunk_size=100000):
+    """
+    Yield a demand file as consecutive PricingInstance chunks without loading it whole.
+
+    CSV files are read with pandas' chunked reader; Parquet files by record batch (requires pyarrow).
+    """
+    plan_info = _read_plans(path, plans)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        for seg_df in pd.read_csv(path, dtype={'id': str, 'name': str}, chunksize=chunk_size):
+            yield _frame_to_instance(seg_df, plan_info, capacity)
+    elif ext == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield _frame_to_instance(batch.to_pandas(), plan_info, capacity)
+    else:
+        raise ValueError(f"Unsupported file type '{ext}'. Use one of {SUPPORTED_EXTENSIONS}.")
+
+
+def convert_to_store(path, store_path, plans=None, capacity=0.0, chunk_size=100000):
+    """Stream a CSV/Parquet demand file into a memory-mapped instance store."""
+    # Imported here so plain CSV users do not need the store module
+    from models.instance_store import InstanceStore, InstanceStoreWriter
+
+    chunks = iter_instance_chunks(path, plans, capacity, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError(f"No segments found in '{path}'.")
+    # The writer closes its files on errors too, without writing meta.json
+    with InstanceStoreWriter(store_path, first.plan_dicts(), capacity) as writer:
+        writer.append(first)
+        for chunk in chunks:
+            writer.append(chunk)
+    return InstanceStore(store_path)
+
+
+def write_instance(instance, path):
+    """Write an instance as a segments/demand file plus its sibling plans file."""
+    plans_df = pd.DataFrame({
+        'id': instance.plan_ids.astype(str),
+        'name': instance.plan_names.astype(str),
+        'data_limit': instance.data_limit,
+        'cost': instance.cost,
+    })
+
+    columns = {
+        'id': instance.segment_ids.astype(str),
+        'name': instance.segment_names.astype(str),
+        'size': instance.size,
+    }
+    for j, pid in enumerate(instance.plan_ids):
+        columns[f"a_{pid}"] = instance.a[:, j]
+        columns[f"b_{pid}"] = instance.b[:, j]
+    seg_df = pd.DataFrame(columns)
+
+    _write_table(seg_df, path)
+    _write_table(plans_df, plans_path_for(path))
@@ -0,0 +1,204 @@
+"""
+Opt-in tracing of the end-to-end pipeline as Chrome trace-event JSON.
+
+Set PRICING_TRACE to the path of a .json file before starting the app; the
+trace is written when the app exits and can be opened in chrome://tracing or
+https://ui.perfetto.dev. With PRICING_TRACE_CPROFILE=1 each top-level span also
+runs under cProfile, and the profile of the slowest one is written next to the
+trace (<trace>.prof, readable with pstats or snakeviz) with its top functions
+attached to the span's args.
+
+Instrumented stages: InputTab.get_data, the solve phases of PricingModel
+(build, presolve, optimize, extract), ResultsTab.display_results and
+ChartsTab.plot_results, plus a flow arrow from the UI thread through
+OptimizationWorker and back. When tracing is off a span costs one attribute
+check.
+"""
+import cProfile
+import functools
+import io
+import itertools
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import nullcontext
+
+TRACE_ENV = "PRICING_TRACE"
+CPROFILE_ENV = "PRICING_TRACE_CPROFILE"
+PROFILE_TOP = 15
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.profile = None
+
+    def __enter__(self):
+        tracer = self.tracer
+        if tracer.cprofile and not getattr(tracer._local, 'profiling', False):
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+                tracer._local.profiling = True
+            except ValueError:
+                # Another profiler is active (e.g. the app itself runs under cProfile)
+                self.profile = None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if self.profile is not None:
+            self.profile.disable()
+            self.tracer._local.profiling = False
+        if exc_type is not None:
+            self.args = dict(self.args, error=exc_type.__name__)
+        event = self.tracer.complete(self.name, self.start, end, cat=self.cat, **self.args)
+        if self.profile is not None:
+            self.tracer._offer_profile(event, self.profile)
+        return False
+
+
+class Tracer:
+    """
+    Collects trace events in memory until save().
+
+    Timestamps are microseconds of time.perf_counter() since the tracer was
+    created. Events are appended from any thread; list.append is atomic.
+    """
+
+    def __init__(self, path=None, cprofile=False):
+        self.path = path
+        self.enabled = path is not None
+        self.cprofile = cprofile
+        self.events = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._named_threads = set()
+        self._flow_ids = itertools.count(1)
+        self._slowest = None  # (duration, event, profile)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get(TRACE_ENV) or None, os.environ.get(CPROFILE_ENV, "") not in ("", "0"))
+
+    def enable(self, path, cprofile=False):
+        self.path = path
+        self.cprofile = cprofile
+        self.enabled = True
+
+    def _us(self, t):
+        return (t - self.origin) * 1e6
+
+    def _tid(self):
+        tid = threading.get_ident()
+        if tid not in self._named_threads:
+            self.name_thread(threading.current_thread().name)
+        return tid
+
+    def name_thread(self, name):
+        """Label the calling thread in the trace viewer."""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        self._named_threads.add(tid)
+        self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}})
+
+    def span(self, name, cat="app", **args):
+        """Context manager timing a block as one complete ('X') event."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def complete(self, name, start, end, cat="app", **args):
+        """Record a complete event from perf_counter() start/end times already measured."""
+        if not self.enabled:
+            return None
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': self._us(start), 'dur': (end - start) * 1e6,
+                 'pid': self.pid, 'tid': self._tid(), 'args': args}
+        self.events.append(event)
+        return event
+
+    def _flow(self, ph, name, flow_id):
+        event = {'name': name, 'cat': 'flow', 'ph': ph, 'id': flow_id, 'ts': self._us(time.perf_counter()),
+                 'pid': self.pid, 'tid': self._tid()}
+        if ph == 'f':
+            event['bp'] = 'e'  # bind to the enclosing slice, not the next one
+        self.events.append(event)
+
+    def flow_start(self, name):
+        """Start a flow arrow inside the current span; returns its id (None when disabled)."""
+        if not self.enabled:
+            return None
+        flow_id = next(self._flow_ids)
+        self._flow('s', name, flow_id)
+        return flow_id
+
+    def flow_step(self, name, flow_id):
+        if self.enabled and flow_id is not None:
+            self._flow('t', name, flow_id)
+
+    def flow_end(self, name, flow_id):
+        if self.enabled and flow_id is not None:
+            self._flow('f', name, flow_id)
+
+    def _offer_profile(self, event, profile):
+        with self._lock:
+            if self._slowest is None or event['dur'] > self._slowest[0]:
+                self._slowest = (event['dur'], event, profile)
+
+    def to_dict(self):
+        return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def save(self, path=None):
+        """
+        Write the trace (and the slowest span's profile, if any).
+
+        Args:
+            path (str): Output path; defaults to the path the tracer was enabled with.
+
+        Returns:
+            str: The trace path, or None when tracing is disabled.
+        """
+        path = path or self.path
+        if not self.enabled or path is None:
+            return None
+        if self._slowest is not None:
+            _, event, profile = self._slowest
+            prof_path = os.path.splitext(path)[0] + ".prof"
+            profile.dump_stats(prof_path)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            event['args']['cprofile'] = prof_path
+            event['args']['cprofile_top'] = [line for line in out.getvalue().splitlines() if line.strip()]
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+        return path
+
+
+def traced(name=None, cat="app"):
+    """Decorator recording each call of a function as a span on the global tracer."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Global tracer, configured from the environment at import
+tracer = Tracer.from_env()
@@ -0,0 +1,138 @@
+"""
+Headless, parallel rendering of result charts for scenario batches.
+
+Usage:
+    python -m utils.report_renderer OUT_DIR results.pkl [more.pkl ...] \
+        [--formats png svg pdf] [--workers N]
+
+Each pickle holds one results dict (as returned by build_and_solve), a list
+of them, or a {name: results} dict. One page per scenario and format is
+written to OUT_DIR.
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from views.chart_builders import ResultsDashboard, results_chart_data, TOP_SEGMENTS
+
+SUPPORTED_FORMATS = ('png', 'svg', 'pdf')
+FIGURE_BG = '#2b2b2b'
+
+# One dashboard per worker process, reused across scenarios so figures,
+# axes and artists are only rebuilt when the plans/segments layout changes.
+_dashboard = None
+
+
+def _get_dashboard():
+    global _dashboard
+    if _dashboard is None:
+        figure = Figure(figsize=(11, 8.5), dpi=100)
+        figure.patch.set_facecolor(FIGURE_BG)
+        _dashboard = ResultsDashboard(figure, FigureCanvasAgg(figure), use_blit=False, show_title=True)
+    return _dashboard
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name)) or "scenario"
+
+
+def render_report(name, results, out_dir, formats=('png',), top_n=TOP_SEGMENTS):
+    """
+    Render the four result charts of one scenario to files.
+
+    Returns:
+        list of str: Written file paths.
+    """
+    dashboard = _get_dashboard()
+    title = f"{name} | Status: {results['status']} | Total Profit: ${results['objective']:,.2f}"
+    dashboard.update(results_chart_data(results, top_n=top_n, previous=dashboard.top_segments()),
+                     title=title, draw=False)
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{_safe_name(name)}.{fmt}")
+        dashboard.figure.savefig(path, format=fmt, facecolor=FIGURE_BG)
+        paths.append(path)
+    return paths
+
+
+def _render_batch(batch, out_dir, formats, top_n):
+    paths = []
+    for name, results in batch:
+        paths.extend(render_report(name, results, out_dir, formats, top_n))
+    return paths
+
+
+def render_reports(scenarios, out_dir, formats=('png',), workers=None, top_n=TOP_SEGMENTS):
+    """
+    Render reports for many scenarios in parallel worker processes.
+
+    Args:
+        scenarios (list of (name, results)): Scenario names and results dicts.
+        out_dir (str): Output directory (created if needed).
+        formats (tuple of str): Any of SUPPORTED_FORMATS.
+        workers (int): Worker processes (default: CPU count). 1 renders in-process.
+        top_n (int): Segments shown individually before grouping into "Other".
+
+    Returns:
+        list of str: Written file paths, in scenario order.
+    """
+    unknown = [f for f in formats if f not in SUPPORTED_FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported formats {unknown}. Use any of {SUPPORTED_FORMATS}.")
+    os.makedirs(out_dir, exist_ok=True)
+    scenarios = list(scenarios)
+    workers = min(workers or os.cpu_count() or 1, max(len(scenarios), 1))
+
+    if workers == 1:
+        return _render_batch(scenarios, out_dir, formats, top_n)
+
+    # Contiguous batches keep similar scenarios on the same worker, so its
+    # dashboard template can be updated in place instead of rebuilt.
+    size = -(-len(scenarios) // workers)
+    batches = [scenarios[i:i + size] for i in range(0, len(scenarios), size)]
+    # 'spawn' avoids forking a process that may hold Qt or Gurobi state
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_render_batch, batch, out_dir, formats, top_n) for batch in batches]
+        return [path for f in futures for path in f.result()]
+
+
+def load_scenarios(paths):
+    """Load (name, results) pairs from pickle files."""
+    scenarios = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if isinstance(data, dict) and 'prices' in data:
+            scenarios.append((stem, data))
+        elif isinstance(data, dict):
+            scenarios.extend((f"{stem}_{k}", v) for k, v in data.items())
+        else:
+            scenarios.extend((f"{stem}_{i}", v) for i, v in enumerate(data))
+    return scenarios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render result charts for a batch of scenarios.")
+    parser.add_argument("out_dir", help="Directory for the rendered pages")
+    parser.add_argument("results", nargs="+", help="Pickle files with results dicts")
+    parser.add_argument("--formats", nargs="+", default=['png'], choices=SUPPORTED_FORMATS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--top-n", type=int, default=TOP_SEGMENTS, help="Segments shown before grouping into 'Other'")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.results)
+    paths = render_reports(scenarios, args.out_dir, tuple(args.formats), args.workers, args.top_n)
+    print(f"Rendered {len(scenarios)} scenarios into {len(paths)} files in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+JSON round-tripping of results dicts.
+
+Results from build_and_solve key 'quantities' and 'choices' by (plan, segment)
+tuples, which JSON objects cannot hold. Dicts with tuple keys are written as
+{"__tuple_keys__": [[[plan, segment], value], ...]} and restored by from_jsonable.
+NumPy scalars and arrays become plain numbers and lists.
+"""
+import json
+
+import numpy as np
+
+TUPLE_KEYS = "__tuple_keys__"
+
+
+def to_jsonable(obj):
+    """Return a JSON-serializable copy of obj."""
+    if isinstance(obj, dict):
+        if any(isinstance(k, tuple) for k in obj):
+            return {TUPLE_KEYS: [[list(k) if isinstance(k, tuple) else k, to_jsonable(v)] for k, v in obj.items()]}
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def from_jsonable(obj):
+    """Inverse of to_jsonable (tuple keys are restored; lists stay lists)."""
+    if isinstance(obj, dict):
+        if set(obj) == {TUPLE_KEYS}:
+            return {tuple(k) if isinstance(k, list) else k: from_jsonable(v) for k, v in obj[TUPLE_KEYS]}
+        return {k: from_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [from_jsonable(v) for v in obj]
+    return obj
+
+
+def dumps(obj):
+    return json.dumps(to_jsonable(obj))
+
+
+def loads(text):
+    return from_jsonable(json.loads(text))
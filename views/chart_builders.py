@@ -0,0 +1,387 @@
+"""
+Qt-free builders for the four result charts.
+
+Used by ChartsTab (Qt canvas, with blitting) and by utils.report_renderer
+(Agg canvas, headless), so charts can be drawn without a QApplication.
+"""
+import numpy as np
+from matplotlib.artist import setp
+from matplotlib.patches import Wedge
+
+COLORS = ['#ff8a65', '#ffd54f', '#4db6ac', '#ba68c8', '#90a4ae'] # Palette
+AXES_BG = '#323232'
+SPINE_COLOR = '#505050'
+# Above this many segments, the smallest ones are grouped into "Other"
+TOP_SEGMENTS = 12
+
+
+# --- Chart Data (vectorized aggregation) ---
+
+def _chart_data(plans, prices, qty, segments, top_n, previous=None):
+    """
+    Aggregate a (plans x segments) quantity matrix into the arrays the charts need.
+
+    Segments beyond the top_n - 1 by revenue are merged into one "Other" column.
+    If all `previous` top segments are still within the top 2 * top_n, they are kept,
+    so small price changes do not reshuffle the grouping (and force a full redraw).
+    """
+    positive = np.where(qty > 0, qty, 0.0)
+    revenue = positive * prices[:, None]
+    seg_revenue = revenue.sum(axis=0)
+
+    if len(segments) > top_n:
+        ranking = np.argsort(-seg_revenue, kind='stable')
+        keep = np.sort(ranking[:top_n - 1])
+        if previous:
+            seg_pos = {s: i for i, s in enumerate(segments)}
+            prev = [seg_pos.get(s) for s in previous]
+            if None not in prev and len(prev) == top_n - 1 and set(prev) <= set(ranking[:2 * top_n].tolist()):
+                keep = np.sort(np.array(prev))
+        rest = np.ones(len(segments), dtype=bool)
+        rest[keep] = False
+        qty = np.hstack([qty[:, keep], qty[:, rest].sum(axis=1, keepdims=True)])
+        seg_revenue = np.append(seg_revenue[keep], seg_revenue[rest].sum())
+        segments = [segments[k] for k in keep] + [f"Other ({int(rest.sum())})"]
+
+    return {
+        'plans': list(plans),
+        'prices': prices,
+        'plan_revenue': revenue.sum(axis=1),
+        'segments': list(segments),
+        'segment_qty': qty,
+        'segment_revenue': seg_revenue,
+    }
+
+
+def results_chart_data(results, top_n=TOP_SEGMENTS, previous=None):
+    """Chart data from a build_and_solve results dict."""
+    plans = sorted(results['prices'].keys())
+    prices = np.array([results['prices'][p] for p in plans], dtype=float)
+
+    quantities = results['quantities']
+    q = np.fromiter(quantities.values(), dtype=float, count=len(quantities))
+    f_keys, s_keys = zip(*quantities.keys()) if quantities else ((), ())
+    segments = sorted(set(s_keys))
+
+    plan_pos = {p: i for i, p in enumerate(plans)}
+    seg_pos = {s: i for i, s in enumerate(segments)}
+    flat = np.fromiter((plan_pos[f] * len(segments) + seg_pos[s] for f, s in zip(f_keys, s_keys)),
+                       dtype=np.int64, count=len(q))
+    qty = np.bincount(flat, weights=q, minlength=len(plans) * len(segments)).reshape(len(plans), len(segments))
+    return _chart_data(plans, prices, qty, segments, top_n, previous)
+
+
+def evaluation_chart_data(instance, evaluation, top_n=TOP_SEGMENTS, previous=None):
+    """Chart data from an evaluator result (see models.evaluator)."""
+    order = np.argsort(instance.plan_ids.astype(str))
+    plans = [str(p) for p in instance.plan_ids[order]]
+    prices = np.asarray(evaluation['prices'], dtype=float)[order]
+
+    n_f, n_s = instance.n_plans, instance.n_segments
+    rank = np.empty(n_f, dtype=np.int64)
+    rank[order] = np.arange(n_f) # plan index -> row in sorted order
+
+    choice = evaluation['choice']
+    bought = choice >= 0
+    flat = rank[choice[bought]] * n_s + np.flatnonzero(bought)
+    qty = np.bincount(flat, weights=evaluation['quantity'][bought], minlength=n_f * n_s).reshape(n_f, n_s)
+    return _chart_data(plans, prices, qty, [str(s) for s in instance.segment_ids], top_n, previous)
+
+
+# --- Figure with reusable artists ---
+
+class ResultsDashboard:
+    """
+    Four result charts whose axes and artists are created once and then updated in place.
+
+    A full draw only happens when the plans/segments change or values leave the current
+    axis limits; otherwise the dynamic artists are blitted over a cached background.
+    """
+
+    def __init__(self, figure, canvas, use_blit=True, show_title=False):
+        self.figure = figure
+        self.canvas = canvas
+        self.use_blit = use_blit
+        self.title_text = figure.suptitle("", color='white') if show_title else None
+        self._structure = None
+        self._background = None
+        self._dynamic = []
+        self._setup_axes()
+        if use_blit:
+            self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _style_axes(self, ax, title, ylabel=None):
+        ax.set_facecolor(AXES_BG)
+        ax.set_title(title, color='white', pad=10)
+        if ylabel:
+            ax.set_ylabel(ylabel, color='white')
+        ax.tick_params(colors='white')
+        ax.grid(True, axis='y', linestyle='--', alpha=0.3, color='white')
+        for spine in ax.spines.values(): spine.set_color(SPINE_COLOR)
+
+    def _setup_axes(self):
+        self.ax_prices = self.figure.add_subplot(221)
+        self.ax_revenue = self.figure.add_subplot(222)
+        self.ax_qty = self.figure.add_subplot(223)
+        self.ax_share = self.figure.add_subplot(224)
+
+    def _dyn(self, artist):
+        """Register an artist that changes on every update."""
+        artist.set_animated(self.use_blit)
+        self._dynamic.append(artist)
+        return artist
+
+    # --- Build (only when plans or segments change) ---
+
+    def _build(self, data):
+        self._dynamic = []
+        plans, segments = data['plans'], data['segments']
+        n_f, n_g = len(plans), len(segments)
+        for ax in (self.ax_prices, self.ax_revenue, self.ax_qty, self.ax_share):
+            ax.cla()
+
+        # 1. Prices per Plan (Top-Left)
+        self._style_axes(self.ax_prices, "Optimal Prices per Plan", "Price ($)")
+        self.price_bars = [self._dyn(r) for r in self.ax_prices.bar(plans, np.zeros(n_f), color='#64b5f6')]
+        self.price_texts = [self._dyn(self.ax_prices.text(i, 0, "", color='white', ha='center', va='bottom'))
+                            for i in range(n_f)]
+
+        # 2. Revenue per Plan (Top-Right)
+        self._style_axes(self.ax_revenue, "Total Revenue per Plan", "Revenue ($)")
+        self.revenue_bars = [self._dyn(r) for r in self.ax_revenue.bar(plans, np.zeros(n_f), color='#81c784')]
+        self.revenue_texts = [self._dyn(self.ax_revenue.text(i, 0, "", color='white', ha='center', va='bottom'))
+                              for i in range(n_f)]
+
+        # 3. Quantity by Segment (Bottom-Left): stacked bars, X=Segment, Stack=Plan
+        self._style_axes(self.ax_qty, "Quantity Sold by Segment", "Quantity")
+        self.qty_bars = []
+        for i, p in enumerate(plans):
+            container = self.ax_qty.bar(segments, np.zeros(n_g), label=p, color=COLORS[i % len(COLORS)])
+            self.qty_bars.append([self._dyn(r) for r in container])
+        # Rotate segment labels if many
+        setp(self.ax_qty.xaxis.get_majorticklabels(), rotation=45, ha='right')
+        self.ax_qty.legend(facecolor=AXES_BG, labelcolor='white', edgecolor=SPINE_COLOR, fontsize='small')
+
+        # 4. Revenue Share by Segment (Bottom-Right): wedges are built by hand so they can be updated
+        self.ax_share.set_facecolor(AXES_BG)
+        self.ax_share.set_title("Revenue Share by Segment", color='white', pad=10)
+        self.ax_share.set_xlim(-1.4, 1.4)
+        self.ax_share.set_ylim(-1.3, 1.3)
+        self.ax_share.set_aspect('equal')
+        self.ax_share.axis('off')
+        self.wedges, self.wedge_labels, self.wedge_pcts = [], [], []
+        for i in range(n_g):
+            wedge = Wedge((0, 0), 1.0, 90, 90, facecolor=COLORS[i % len(COLORS)])
+            self.ax_share.add_patch(wedge)
+            self.wedges.append(self._dyn(wedge))
+            self.wedge_labels.append(self._dyn(self.ax_share.text(0, 0, segments[i], color='white', va='center')))
+            self.wedge_pcts.append(self._dyn(self.ax_share.text(0, 0, "", color='white', ha='center', va='center')))
+        self.no_revenue_text = self._dyn(self.ax_share.text(0, 0, "No Revenue Data", color='white',
+                                                            ha='center', va='center'))
+
+        self._structure = (tuple(plans), tuple(segments))
+        # Leave room for the suptitle when one is shown
+        self.figure.tight_layout(rect=(0, 0, 1, 0.95) if self.title_text else None)
+
+    def top_segments(self):
+        """Segments currently shown individually (excluding the "Other" group)."""
+        if self._structure is None:
+            return None
+        return [s for s in self._structure[1] if not s.startswith("Other (")]
+
+    def _relabel(self, segments):
+        self.ax_qty.set_xticks(range(len(segments)), segments)
+        setp(self.ax_qty.xaxis.get_majorticklabels(), rotation=45, ha='right')
+        for label, name in zip(self.wedge_labels, segments):
+            label.set_text(name)
+        self._structure = (self._structure[0], tuple(segments))
+
+    # --- Update ---
+
+    @staticmethod
+    def _fit_ylim(ax, top):
+        """
+        Rescale the y axis if `top` no longer fits. Returns True if limits changed.
+
+        Limits get 50% headroom so small increases (e.g. dragging a price slider)
+        do not force a full redraw on every step.
+        """
+        top = max(top, 1e-9)
+        _, current = ax.get_ylim()
+        if 1.1 * top <= current <= 3 * top:
+            return False
+        ax.set_ylim(0, 1.5 * top)
+        return True
+
+    def update(self, data, title=None, draw=True):
+        """
+        Update the charts with new chart data; returns True if a full redraw was needed.
+
+        With draw=False the artists are updated but the canvas is left alone,
+        e.g. when the caller is about to savefig() anyway.
+        """
+        full = False
+        if title is not None and self.title_text is not None and title != self.title_text.get_text():
+            self.title_text.set_text(title)
+            full = True
+        if self._structure is None or tuple(data['plans']) != self._structure[0] \
+                or len(data['segments']) != len(self._structure[1]):
+            self._build(data)
+            full = True
+        elif tuple(data['segments']) != self._structure[1]:
+            # Same layout, different top-N members: relabel in place
+            self._relabel(data['segments'])
+            full = True
+
+        prices, revenues = data['prices'], data['plan_revenue']
+        for i, (bar, text) in enumerate(zip(self.price_bars, self.price_texts)):
+            bar.set_height(prices[i])
+            text.set_position((i, prices[i]))
+            text.set_text(f"{prices[i]:.2f}")
+        for i, (bar, text) in enumerate(zip(self.revenue_bars, self.revenue_texts)):
+            bar.set_height(revenues[i])
+            text.set_position((i, revenues[i]))
+            # Format revenue labels K/M if large
+            text.set_text(f"${revenues[i]/1000:.1f}k" if revenues[i] > 1000 else f"${revenues[i]:.0f}")
+
+        qty = data['segment_qty']
+        bottom = np.zeros(qty.shape[1])
+        for i, bars in enumerate(self.qty_bars):
+            for bar, b0, h in zip(bars, bottom, qty[i]):
+                bar.set_y(b0)
+                bar.set_height(h)
+            bottom += qty[i]
+
+        self._update_share(data['segment_revenue'])
+
+        full |= self._fit_ylim(self.ax_prices, prices.max(initial=0))
+        full |= self._fit_ylim(self.ax_revenue, revenues.max(initial=0))
+        full |= self._fit_ylim(self.ax_qty, bottom.max(initial=0))
+
+        if not draw:
+            pass
+        elif full or not self.use_blit or self._background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_dynamic()
+            self.canvas.blit(self.figure.bbox)
+        return full
+
+    def _update_share(self, seg_revenue):
+        # Hide segments with negligible revenue to avoid clutter
+        shown = np.where(seg_revenue > 1, seg_revenue, 0.0)
+        total = shown.sum()
+        self.no_revenue_text.set_visible(total <= 0)
+        fractions = shown / total if total > 0 else np.zeros_like(shown)
+        start = 90.0
+        for wedge, label, pct, frac in zip(self.wedges, self.wedge_labels, self.wedge_pcts, fractions):
+            end = start + 360.0 * frac
+            wedge.set_theta1(start)
+            wedge.set_theta2(end)
+            mid = np.deg2rad((start + end) / 2)
+            x, y = np.cos(mid), np.sin(mid)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_ha('left' if x >= 0 else 'right')
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f"{100 * frac:.1f}%")
+            wedge.set_visible(frac > 0)
+            # Skip text on slivers where it would overlap its neighbours
+            label.set_visible(frac >= 0.02)
+            pct.set_visible(frac >= 0.04)
+            start = end
+
+    # --- Blitting ---
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_dynamic()
+
+    def _draw_dynamic(self):
+        for artist in self._dynamic:
+            artist.axes.draw_artist(artist)
+
+
+# --- Counterfactual regret heatmap ---
+
+def regret_heatmap_order(matrix):
+    """Row order for the heatmap: grouped by chosen plan, largest regret first within a group."""
+    max_regret = matrix['regret'].max(axis=1) if matrix['regret'].shape[1] else np.zeros(len(matrix['choice']))
+    return np.lexsort((-max_regret, matrix['choice']))
+
+
+def draw_regret_heatmap(figure, instance, matrix):
+    """
+    Draw the (segment x plan) regret matrix of models.regret on a cleared figure.
+
+    Rows are segments (grouped by their chosen plan), columns plans. Red cells would
+    have earned more than the chosen plan, blue ones less; the chosen cell is 0.
+    With thousands of segments, matplotlib resamples the rows to the pixel height.
+    """
+    figure.clf()
+    ax = figure.add_subplot(111)
+    ax.set_facecolor(AXES_BG)
+    ax.set_title("Counterfactual Regret (profit vs chosen plan)", color='white', pad=10)
+    ax.tick_params(colors='white')
+    for spine in ax.spines.values(): spine.set_color(SPINE_COLOR)
+
+    order = regret_heatmap_order(matrix)
+    regret = matrix['regret'][order]
+    limit = float(np.abs(regret).max(initial=0)) or 1.0
+    image = ax.imshow(regret, aspect='auto', interpolation='nearest', cmap='RdBu_r', vmin=-limit, vmax=limit)
+    ax.set_xticks(range(instance.n_plans), [str(pid) for pid in instance.plan_ids])
+    ax.set_xlabel("Plan", color='white')
+    if instance.n_segments <= TOP_SEGMENTS * 2:
+        ax.set_yticks(range(len(order)), [str(sid) for sid in instance.segment_ids[order]])
+    else:
+        ax.set_ylabel(f"{instance.n_segments:,} segments (grouped by chosen plan)", color='white')
+        ax.set_yticks([])
+
+    colorbar = figure.colorbar(image, ax=ax)
+    colorbar.set_label("Regret ($)", color='white')
+    colorbar.ax.tick_params(colors='white')
+    figure.tight_layout()
+    return ax
+
+
+# --- Run history ---
+
+def draw_history(figure, runs, prices):
+    """
+    Draw the run history of a models.run_store.RunStore on a cleared figure.
+
+    Args:
+        runs (DataFrame): RunStore.runs(), indexed by run_id.
+        prices (DataFrame): RunStore.plan_table('price'), (runs x plans).
+    """
+    figure.clf()
+    ax_prices = figure.add_subplot(211)
+    ax_profit = figure.add_subplot(212)
+    for ax, title, xlabel, ylabel in ((ax_prices, "Price Trajectories", "Run", "Price ($)"),
+                                      (ax_profit, "Profit vs Capacity", "Capacity (GB)", "Profit ($)")):
+        ax.set_facecolor(AXES_BG)
+        ax.set_title(title, color='white', pad=10)
+        ax.set_xlabel(xlabel, color='white')
+        ax.set_ylabel(ylabel, color='white')
+        ax.tick_params(colors='white')
+        ax.grid(True, linestyle='--', alpha=0.3, color='white')
+        for spine in ax.spines.values(): spine.set_color(SPINE_COLOR)
+
+    if len(runs) == 0:
+        ax_prices.text(0.5, 0.5, "No runs recorded yet", color='white', ha='center', va='center',
+                       transform=ax_prices.transAxes)
+    else:
+        run_ids = prices.index.to_numpy()
+        for i, plan in enumerate(prices.columns):
+            ax_prices.plot(run_ids, prices[plan].to_numpy(), marker='o', markersize=3, label=str(plan),
+                           color=COLORS[i % len(COLORS)])
+        ax_prices.legend(facecolor=AXES_BG, labelcolor='white', edgecolor=SPINE_COLOR, fontsize='small')
+
+        ok = runs['objective'].notna().to_numpy()
+        ax_profit.scatter(runs['capacity'].to_numpy()[ok], runs['objective'].to_numpy()[ok], s=14, color='#64b5f6')
+        latest = runs.iloc[-1]
+        if ok[-1]:
+            ax_profit.scatter([latest['capacity']], [latest['objective']], s=40, color='#ff8a65', label="Latest")
+            ax_profit.legend(facecolor=AXES_BG, labelcolor='white', edgecolor=SPINE_COLOR, fontsize='small')
+    figure.tight_layout()
+    return ax_prices, ax_profit
@@ -1,126 +1,178 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QGridLayout,
+                             QLabel, QSlider, QPushButton, QTabWidget)
+from PyQt6.QtCore import Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
-import matplotlib.pyplot as plt
+from models.evaluator import evaluate_prices, price_vector
+from views.chart_builders import (ResultsDashboard, results_chart_data, evaluation_chart_data,
+                                  draw_regret_heatmap, draw_history)
+from utils.profiling import traced, tracer
+
+# Slider positions are integer cents
+SLIDER_SCALE = 100
 
 class ChartsTab(QWidget):
     def __init__(self):
         super().__init__()
+        # What-if state: instance and optimal prices of the last optimization
+        self.instance = None
+        self.optimal_prices = None
+        self.optimal_profit = 0.0
+        self.price_sliders = []
+        self.price_labels = []
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
+        self.chart_tabs = QTabWidget()
+        layout.addWidget(self.chart_tabs, 1)
         
         # Matplotlib Figure
         self.figure = Figure(figsize=(8, 6), dpi=100)
         self.figure.patch.set_facecolor('#2b2b2b') # Match main window background
         self.canvas = FigureCanvas(self.figure)
-        layout.addWidget(self.canvas)
+        self.dashboard = ResultsDashboard(self.figure, self.canvas)
+        self.chart_tabs.addTab(self.canvas, "Results")
+
+        # Counterfactual regret heatmap (filled by plot_regret after an optimization)
+        regret_widget = QWidget()
+        regret_layout = QVBoxLayout(regret_widget)
+        self.regret_figure = Figure(figsize=(8, 6), dpi=100)
+        self.regret_figure.patch.set_facecolor('#2b2b2b')
+        self.regret_canvas = FigureCanvas(self.regret_figure)
+        regret_layout.addWidget(self.regret_canvas, 1)
+        regret_controls = QHBoxLayout()
+        self.regret_summary = QLabel("Run an optimization to see what each segment would yield on every plan.")
+        regret_controls.addWidget(self.regret_summary, 1)
+        self.btn_export_regret = QPushButton("Export Regret...") # Connected by MainWindow
+        self.btn_export_regret.setEnabled(False)
+        regret_controls.addWidget(self.btn_export_regret)
+        regret_layout.addLayout(regret_controls)
+        self.chart_tabs.addTab(regret_widget, "Regret")
+
+        # Run history (filled by plot_history from the run store)
+        self.history_figure = Figure(figsize=(8, 6), dpi=100)
+        self.history_figure.patch.set_facecolor('#2b2b2b')
+        self.history_canvas = FigureCanvas(self.history_figure)
+        self.chart_tabs.addTab(self.history_canvas, "History")
+
+        # What-if price sliders (filled by set_what_if after an optimization)
+        self.what_if_group = QGroupBox("What-if Prices")
+        what_if_layout = QVBoxLayout(self.what_if_group)
+        self.sliders_layout = QGridLayout()
+        what_if_layout.addLayout(self.sliders_layout)
+
+        summary_layout = QHBoxLayout()
+        self.what_if_summary = QLabel("Run an optimization to explore prices around the optimum.")
+        summary_layout.addWidget(self.what_if_summary, 1)
+        self.btn_reset_prices = QPushButton("Reset to Optimum")
+        self.btn_reset_prices.clicked.connect(self.reset_what_if)
+        self.btn_reset_prices.setEnabled(False)
+        summary_layout.addWidget(self.btn_reset_prices)
+        what_if_layout.addLayout(summary_layout)
+
+        layout.addWidget(self.what_if_group)
+
+    # --- What-if Analysis ---
+
+    def set_what_if(self, instance, prices):
+        """Build one price slider per plan, starting at the optimal prices."""
+        self.instance = instance
+        self.optimal_prices = price_vector(instance.plan_ids, prices)
+        self.optimal_profit = evaluate_prices(instance, self.optimal_prices)['total_profit']
+
+        # Clear previous sliders
+        while self.sliders_layout.count():
+            item = self.sliders_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        self.price_sliders = []
+        self.price_labels = []
+
+        # Slider range: up to the highest reservation price (a/b) of the plan, at least 2x the optimum
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reservation = np.where(instance.b > 0, instance.a / instance.b, 0.0)
+        max_res = reservation.max(axis=0) if instance.n_segments else np.zeros(instance.n_plans)
+        max_prices = np.maximum(max_res, 2 * self.optimal_prices) + 1.0
+
+        for j, pid in enumerate(instance.plan_ids):
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setRange(0, int(max_prices[j] * SLIDER_SCALE))
+            slider.setValue(int(round(self.optimal_prices[j] * SLIDER_SCALE)))
+            slider.valueChanged.connect(self.on_price_slider_changed)
+            value_label = QLabel(f"${self.optimal_prices[j]:.2f}")
+            value_label.setMinimumWidth(70)
+
+            self.sliders_layout.addWidget(QLabel(str(pid)), j, 0)
+            self.sliders_layout.addWidget(slider, j, 1)
+            self.sliders_layout.addWidget(value_label, j, 2)
+            self.price_sliders.append(slider)
+            self.price_labels.append(value_label)
+
+        self.btn_reset_prices.setEnabled(True)
+        self.update_what_if_summary(evaluate_prices(instance, self.optimal_prices))
+
+    def current_what_if_prices(self):
+        return np.array([s.value() / SLIDER_SCALE for s in self.price_sliders])
+
+    def on_price_slider_changed(self, _value):
+        if self.instance is None:
+            return
+        prices = self.current_what_if_prices()
+        for label, price in zip(self.price_labels, prices):
+            label.setText(f"${price:.2f}")
+
+        # Vectorized evaluation, no solver call
+        evaluation = evaluate_prices(self.instance, prices)
+        self.update_what_if_summary(evaluation)
+        self.plot_evaluation(self.instance, evaluation)
 
+    def reset_what_if(self):
+        if self.optimal_prices is None:
+            return
+        for slider, price in zip(self.price_sliders, self.optimal_prices):
+            slider.blockSignals(True)
+            slider.setValue(int(round(price * SLIDER_SCALE)))
+            slider.blockSignals(False)
+        self.on_price_slider_changed(0)
+
+    def update_what_if_summary(self, evaluation):
+        delta = evaluation['total_profit'] - self.optimal_profit
+        usage = evaluation['total_usage']
+        cap_note = "" if evaluation['capacity_ok'] else " (OVER CAPACITY)"
+        self.what_if_summary.setText(
+            f"Profit: ${evaluation['total_profit']:,.2f} ({delta:+,.2f} vs optimum) | "
+            f"Network usage: {usage:,.0f} / {self.instance.capacity:,.0f} GB{cap_note}"
+        )
+
+    @traced()
     def plot_results(self, results):
         """Plot Grid of 4 Charts."""
-        self.figure.clear()
-        
-        # Data Preparation
-        plans = sorted(list(results['prices'].keys()))
-        prices = [results['prices'][p] for p in plans]
-        
-        # 1. Prices per Plan (Top-Left)
-        ax1 = self.figure.add_subplot(221)
-        ax1.set_facecolor('#323232')
-        bars1 = ax1.bar(plans, prices, color='#64b5f6') 
-        ax1.set_title("Optimal Prices per Plan", color='white', pad=10)
-        ax1.set_ylabel("Price ($)", color='white')
-        ax1.tick_params(colors='white')
-        ax1.grid(True, axis='y', linestyle='--', alpha=0.3, color='white')
-        for spine in ax1.spines.values(): spine.set_color('#505050')
-        ax1.bar_label(bars1, fmt='%.2f', color='white')
-
-        # 2. Revenue per Plan (Top-Right)
-        # Calculate revenue per plan
-        plan_revenue = {p: 0 for p in plans}
-        plan_qty = {p: 0 for p in plans}
-        
-        for (f, S), q in results['quantities'].items():
-            if q > 0:
-                p_val = results['prices'][f]
-                # Rev = q * price
-                rev = q * p_val
-                plan_revenue[f] += rev
-                plan_qty[f] += q
-        
-        revenues = [plan_revenue[p] for p in plans]
-        
-        ax2 = self.figure.add_subplot(222)
-        ax2.set_facecolor('#323232')
-        bars2 = ax2.bar(plans, revenues, color='#81c784')
-        ax2.set_title("Total Revenue per Plan", color='white', pad=10)
-        ax2.set_ylabel("Revenue ($)", color='white')
-        ax2.tick_params(colors='white')
-        ax2.grid(True, axis='y', linestyle='--', alpha=0.3, color='white')
-        for spine in ax2.spines.values(): spine.set_color('#505050')
-        # Format revenue labels K/M if large
-        labels2 = [f"${v/1000:.1f}k" if v > 1000 else f"${v:.0f}" for v in revenues]
-        ax2.bar_label(bars2, labels=labels2, color='white')
-
-        # 3. Quantity by Segment (Bottom-Left)
-        # Stacked bar: X=Segment, Stack=Plan
-        # Get all segments
-        all_segments = sorted(list(set(k[1] for k in results['quantities'].keys())))
-        
-        ax3 = self.figure.add_subplot(223)
-        ax3.set_facecolor('#323232')
-        
-        bottom = np.zeros(len(all_segments))
-        colors = ['#ff8a65', '#ffd54f', '#4db6ac', '#ba68c8', '#90a4ae'] # Palette
-        
-        for i, p in enumerate(plans):
-            # Quantities for this plan across all segments
-            qs = []
-            for s in all_segments:
-                qs.append(results['quantities'].get((p, s), 0))
-            
-            c = colors[i % len(colors)]
-            ax3.bar(all_segments, qs, bottom=bottom, label=p, color=c)
-            bottom += np.array(qs)
-            
-        ax3.set_title("Quantity Sold by Segment", color='white', pad=10)
-        ax3.set_ylabel("Quantity", color='white')
-        ax3.tick_params(colors='white')
-        # Rotate segment labels if many
-        plt.setp(ax3.xaxis.get_majorticklabels(), rotation=45, ha='right')
-        ax3.grid(True, axis='y', linestyle='--', alpha=0.3, color='white')
-        for spine in ax3.spines.values(): spine.set_color('#505050')
-        ax3.legend(facecolor='#323232', labelcolor='white', edgecolor='#505050', fontsize='small')
-
-        # 4. Revenue Share by Segment (Bottom-Right)
-        # Pie chart
-        segment_revenue = {s: 0 for s in all_segments}
-        for (f, s), q in results['quantities'].items():
-            if q > 0:
-                rev = q * results['prices'][f]
-                segment_revenue[s] += rev
-        
-        # Filter zero revenue segments to avoid clutter
-        pie_labels = []
-        pie_data = []
-        for s in all_segments:
-            if segment_revenue[s] > 1: # Threshold to show
-                pie_labels.append(s)
-                pie_data.append(segment_revenue[s])
-        
-        ax4 = self.figure.add_subplot(224)
-        ax4.set_facecolor('#323232') # Pie chart ignores this mostly but good practice
-        
-        if pie_data:
-            wedges, texts, autotexts = ax4.pie(pie_data, labels=pie_labels, autopct='%1.1f%%',
-                                               textprops={'color': 'white'},
-                                               colors=colors,
-                                               startangle=90)
-            ax4.set_title("Revenue Share by Segment", color='white', pad=10)
-        else:
-            ax4.text(0.5, 0.5, "No Revenue Data", color='white', ha='center', va='center')
-
-        self.figure.tight_layout()
-        self.canvas.draw()
+        with tracer.span("results_chart_data"):
+            data = results_chart_data(results)
+        with tracer.span("ResultsDashboard.update"):
+            self.dashboard.update(data)
+
+    @traced()
+    def plot_regret(self, instance, matrix):
+        """Draw the counterfactual regret heatmap of a models.regret matrix."""
+        draw_regret_heatmap(self.regret_figure, instance, matrix)
+        self.regret_canvas.draw()
+        better = matrix['regret'] > 1e-9
+        self.regret_summary.setText(
+            f"{int(better.any(axis=1).sum()):,} of {instance.n_segments:,} segments would be more profitable "
+            f"on another plan (${float(np.where(better, matrix['regret'], 0).max(axis=1, initial=0).sum()):,.2f} "
+            f"forgone)"
+        )
+        self.btn_export_regret.setEnabled(True)
+
+    @traced()
+    def plot_history(self, runs, prices):
+        """Draw price trajectories and profit vs capacity across stored runs."""
+        draw_history(self.history_figure, runs, prices)
+        self.history_canvas.draw()
+
+    def plot_evaluation(self, instance, evaluation):
+        """Plot an evaluator result straight from its arrays (no results dict)."""
+        self.dashboard.update(evaluation_chart_data(instance, evaluation, previous=self.dashboard.top_segments()))
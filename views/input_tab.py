@@ -1,16 +1,21 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTableView, 
                              QLabel, QHeaderView, QGroupBox, QFormLayout, QDoubleSpinBox, 
-                             QPushButton, QHBoxLayout, QAbstractItemView, QMessageBox)
+                             QPushButton, QHBoxLayout, QAbstractItemView)
 from PyQt6.QtCore import Qt
+from models.instance import PricingInstance
+from views.table_models import PlansTableModel, SegmentsTableModel, DemandTableModel
+from utils.profiling import traced
 
 class InputTab(QWidget):
     def __init__(self):
         super().__init__()
+        # Single array-backed instance shared by the three table models.
+        # Demand params live in instance.a / instance.b (segments x plans).
+        self.instance = PricingInstance.empty()
+        self.plans_model = PlansTableModel(self.instance)
+        self.segments_model = SegmentsTableModel(self.instance)
+        self.demand_model = DemandTableModel(self.instance)
         self.setup_ui()
-        
-        # Internal storage for relationships
-        # map segment_row -> {plan_id: {'a': ..., 'b': ...}}
-        self.demand_data = {} 
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -43,11 +48,10 @@ class InputTab(QWidget):
         p_tools.addStretch()
         p_layout.addLayout(p_tools)
 
-        self.plans_table = QTableWidget()
-        self.plans_table.setColumnCount(4)
-        self.plans_table.setHorizontalHeaderLabels(["ID", "Name", "Data (GB)", "Cost ($)"])
+        self.plans_table = QTableView()
+        self.plans_table.setModel(self.plans_model)
         self.plans_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.plans_table.itemChanged.connect(self.on_plan_changed)
+        self.plans_model.dataChanged.connect(self.on_plan_changed)
         p_layout.addWidget(self.plans_table)
         layout.addWidget(plans_group)
 
@@ -70,12 +74,13 @@ class InputTab(QWidget):
         s_content = QHBoxLayout()
         
         # Left: Segments List
-        self.segments_table = QTableWidget()
-        self.segments_table.setColumnCount(3)
-        self.segments_table.setHorizontalHeaderLabels(["ID", "Name", "Population"])
+        self.segments_table = QTableView()
+        self.segments_table.setModel(self.segments_model)
         self.segments_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Fixed row heights keep the view cheap with 100k+ segments
+        self.segments_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.segments_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.segments_table.itemSelectionChanged.connect(self.load_demand_params)
+        self.segments_table.selectionModel().currentRowChanged.connect(self.load_demand_params)
         s_content.addWidget(self.segments_table, 1) # Stretch factor 1
 
         # Right: Demand Params for Selected Segment
@@ -83,11 +88,9 @@ class InputTab(QWidget):
         self.lbl_demand = QLabel("Select a segment to edit demand parameters")
         demand_layout.addWidget(self.lbl_demand)
         
-        self.demand_table = QTableWidget()
-        self.demand_table.setColumnCount(3)
-        self.demand_table.setHorizontalHeaderLabels(["Plan ID", "Intercept (a)", "Slope (b)"])
+        self.demand_table = QTableView()
+        self.demand_table.setModel(self.demand_model) # Edits are written straight into the instance arrays
         self.demand_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.demand_table.itemChanged.connect(self.save_demand_params) # Auto-save when edited
         demand_layout.addWidget(self.demand_table)
         
         s_content.addLayout(demand_layout, 1) # Stretch factor 1
@@ -99,187 +102,77 @@ class InputTab(QWidget):
     
     def load_data(self, plans, segments, capacity):
         """Populate tables with data."""
-        self.capacity_input.setValue(capacity)
-
-        # Populate Plans
-        self.plans_table.blockSignals(True)
-        self.plans_table.setRowCount(0)
-        for p in plans:
-            self.add_plan_row(p)
-        self.plans_table.blockSignals(False)
-
-        # Populate Segments
-        self.segments_table.blockSignals(True)
-        self.segments_table.setRowCount(0)
-        self.demand_data = {} # Clear old
-        
-        for s in segments:
-            row = self.segments_table.rowCount()
-            self.segments_table.insertRow(row)
-            self.segments_table.setItem(row, 0, QTableWidgetItem(str(s['id'])))
-            self.segments_table.setItem(row, 1, QTableWidgetItem(str(s['name'])))
-            self.segments_table.setItem(row, 2, QTableWidgetItem(str(s['size'])))
-            
-            # Store demand params
-            self.demand_data[row] = s['params'] # {PlanID: {a:.., b:..}}
-
-        self.segments_table.blockSignals(False)
+        self.load_instance(PricingInstance.from_dicts(plans, segments, capacity))
+
+    def load_instance(self, instance):
+        """Populate tables from an array-backed PricingInstance."""
+        self.instance = instance
+        self.capacity_input.setValue(instance.capacity)
+        self.plans_model.set_instance(instance)
+        self.segments_model.set_instance(instance)
+        self.demand_model.set_instance(instance)
+        self.load_demand_params()
         
     # --- Plans Actions ---
 
     def add_plan_row(self, data=None):
-        row = self.plans_table.rowCount()
-        self.plans_table.insertRow(row)
         if data:
-            self.plans_table.setItem(row, 0, QTableWidgetItem(str(data['id'])))
-            self.plans_table.setItem(row, 1, QTableWidgetItem(str(data['name'])))
-            self.plans_table.setItem(row, 2, QTableWidgetItem(str(data['data_limit'])))
-            self.plans_table.setItem(row, 3, QTableWidgetItem(str(data['cost'])))
+            self.plans_model.add_plan(data['id'], data['name'], data['data_limit'], data['cost'])
         else:
             # Default new plan
-            self.plans_table.setItem(row, 0, QTableWidgetItem(f"P{row+1}"))
-            self.plans_table.setItem(row, 1, QTableWidgetItem("New Plan"))
-            self.plans_table.setItem(row, 2, QTableWidgetItem("10.0"))
-            self.plans_table.setItem(row, 3, QTableWidgetItem("5.0"))
+            row = self.instance.n_plans
+            self.plans_model.add_plan(f"P{row+1}", "New Plan", 10.0, 5.0)
+        self.load_demand_params()
             
     def remove_plan_row(self):
-        cur = self.plans_table.currentRow()
+        cur = self.plans_table.currentIndex().row()
         if cur >= 0:
-            self.plans_table.removeRow(cur)
+            self.plans_model.remove_plan(cur)
+            self.load_demand_params()
 
-    def on_plan_changed(self, item):
-        # Trigger redraw of demand table if Plan ID changed, but for now just optional
-        pass
+    def on_plan_changed(self, top_left, bottom_right, roles=()):
+        # Plan IDs are shown in the demand table, refresh it
+        if top_left.column() == 0:
+            self.load_demand_params()
 
     # --- Segments Actions ---
 
     def add_segment_row(self):
-        row = self.segments_table.rowCount()
-        self.segments_table.insertRow(row)
-        self.segments_table.setItem(row, 0, QTableWidgetItem(f"S{row+1}"))
-        self.segments_table.setItem(row, 1, QTableWidgetItem("New Segment"))
-        self.segments_table.setItem(row, 2, QTableWidgetItem("1000"))
-        self.demand_data[row] = {} # Init empty params
+        row = self.instance.n_segments
+        self.segments_model.add_segment(f"S{row+1}", "New Segment", 1000) # Demand params start at zero
 
     def remove_segment_row(self):
-        cur = self.segments_table.currentRow()
+        cur = self.segments_table.currentIndex().row()
         if cur >= 0:
-            self.segments_table.removeRow(cur)
-            if cur in self.demand_data:
-                del self.demand_data[cur]
-                # Re-index keys > cur? Yes, this is tricky with dict.
-                # Better to map IDs, but row index is easier for UI if strict.
-                # Re-build dict:
-                new_data = {}
-                for r in range(self.segments_table.rowCount()):
-                    old_r = r if r < cur else r + 1
-                    if old_r in self.demand_data:
-                        new_data[r] = self.demand_data[old_r]
-                self.demand_data = new_data
-                self.load_demand_params() # Refresh
+            # Demand rows are removed together with the segment, no re-indexing needed
+            self.segments_model.remove_segment(cur)
+            self.load_demand_params() # Refresh
 
-    def load_demand_params(self):
+    def load_demand_params(self, *args):
         """Show demand params for selected segment."""
-        row = self.segments_table.currentRow()
-        if row < 0:
+        row = self.segments_table.currentIndex().row()
+        if row < 0 or row >= self.instance.n_segments:
             self.lbl_demand.setText("Select a segment...")
-            self.demand_table.setRowCount(0)
+            self.demand_model.set_segment(-1)
             return
             
-        seg_name = self.segments_table.item(row, 1).text()
+        seg_name = self.instance.segment_names[row]
         self.lbl_demand.setText(f"Demand for: {seg_name}")
-        
-        current_params = self.demand_data.get(row, {}) # {PlanID: {a:.., b:..}}
-        
-        # Rows = Plans
-        self.demand_table.blockSignals(True)
-        self.demand_table.setRowCount(self.plans_table.rowCount())
-        for r in range(self.plans_table.rowCount()):
-            # Get Plan ID
-            p_item = self.plans_table.item(r, 0)
-            pid = p_item.text() if p_item else ""
-            
-            self.demand_table.setItem(r, 0, QTableWidgetItem(pid))
-            # Parameters
-            params = current_params.get(pid, {'a': 0, 'b': 0})
-            self.demand_table.setItem(r, 1, QTableWidgetItem(str(params['a'])))
-            self.demand_table.setItem(r, 2, QTableWidgetItem(str(params['b'])))
-            
-            # Make Plan ID read-only in this view
-            self.demand_table.item(r, 0).setFlags(Qt.ItemFlag.ItemIsEnabled)
-            
-        self.demand_table.blockSignals(False)
-
-    def save_demand_params(self, item):
-        """Save edited 'a' or 'b' back to storage."""
-        seg_row = self.segments_table.currentRow()
-        if seg_row < 0: 
-            return
-            
-        row = item.row()
-        col = item.column()
-        
-        # row corresponds to Plan row in plans_table
-        pid_item = self.demand_table.item(row, 0)
-        pid = pid_item.text()
-        
-        if seg_row not in self.demand_data:
-            self.demand_data[seg_row] = {}
-        if pid not in self.demand_data[seg_row]:
-            self.demand_data[seg_row][pid] = {'a': 0, 'b': 0}
-            
-        try:
-            val = float(item.text())
-        except ValueError:
-            val = 0.0
-            
-        if col == 1: # a
-            self.demand_data[seg_row][pid]['a'] = val
-        elif col == 2: # b
-            self.demand_data[seg_row][pid]['b'] = val
+        self.demand_model.set_segment(row)
 
     # --- Data Extraction ---
 
-    def get_data(self):
-        """Scrape all tables and return structured data."""
-        # 1. Plans
-        plans = []
-        for r in range(self.plans_table.rowCount()):
-            try:
-                plans.append({
-                    'id': self.plans_table.item(r, 0).text(),
-                    'name': self.plans_table.item(r, 1).text(),
-                    'data_limit': float(self.plans_table.item(r, 2).text()),
-                    'cost': float(self.plans_table.item(r, 3).text())
-                })
-            except ValueError:
-                pass # Skip invalid rows
+    @traced()
+    def get_instance(self):
+        """Return a snapshot of the current instance (arrays are copied)."""
+        instance = self.instance.copy()
+        instance.capacity = self.capacity_input.value()
+        return instance
 
-        # 2. Segments
-        segments = []
-        for r in range(self.segments_table.rowCount()):
-            try:
-                sid = self.segments_table.item(r, 0).text()
-                seg = {
-                    'id': sid,
-                    'name': self.segments_table.item(r, 1).text(),
-                    'size': float(self.segments_table.item(r, 2).text()),
-                    'params': self.demand_data.get(r, {})
-                }
-                # Ensure params match current plans
-                # The user might have added a plan but haven't clicked the segment to init params.
-                # So we iterate plans and ensure they exist
-                for p in plans:
-                    pid = p['id']
-                    if pid not in seg['params']:
-                        seg['params'][pid] = {'a': 0, 'b': 0} # Default
-                
-                segments.append(seg)
-            except ValueError:
-                pass
-
-        capacity = self.capacity_input.value()
-        return plans, segments, capacity
+    @traced()
+    def get_data(self):
+        """Return structured data built from the backing arrays."""
+        return self.get_instance().to_dicts()
 
     def get_capacity(self):
         return self.capacity_input.value()
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QTabWidget, 
-                             QLabel, QPushButton, QMessageBox, QStatusBar)
+                             QLabel, QPushButton, QMessageBox, QStatusBar, QFileDialog)
 from PyQt6.QtCore import Qt
 from views.input_tab import InputTab
 from views.results_tab import ResultsTab
@@ -36,6 +36,7 @@ class MainWindow(QMainWindow):
         # 3. Charts Tab
         self.charts_tab = ChartsTab()
         self.tabs.addTab(self.charts_tab, "Visualization")
+        self.charts_tab.btn_export_regret.clicked.connect(self.controller.export_regret)
         
         # Status Bar
         self.status_bar = QStatusBar()
@@ -62,6 +63,14 @@ class MainWindow(QMainWindow):
         self.btn_load = QPushButton("Load Demo Data")
         self.btn_load.clicked.connect(self.controller.load_demo_data)
         btn_layout.addWidget(self.btn_load)
+
+        self.btn_import = QPushButton("Import Data...")
+        self.btn_import.clicked.connect(self.controller.import_data)
+        btn_layout.addWidget(self.btn_import)
+
+        self.btn_export = QPushButton("Export Data...")
+        self.btn_export.clicked.connect(self.controller.export_data)
+        btn_layout.addWidget(self.btn_export)
         
         self.btn_run = QPushButton("Run Optimization")
         self.btn_run.clicked.connect(self.controller.run_optimization)
@@ -77,3 +86,11 @@ class MainWindow(QMainWindow):
 
     def show_info(self, message):
         QMessageBox.information(self, "Info", message)
+
+    def ask_open_path(self, caption, file_filter):
+        path, _ = QFileDialog.getOpenFileName(self, caption, "", file_filter)
+        return path
+
+    def ask_save_path(self, caption, file_filter):
+        path, _ = QFileDialog.getSaveFileName(self, caption, "", file_filter)
+        return path
@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, 
                              QLabel, QHeaderView, QTextEdit, QSplitter)
 from PyQt6.QtCore import Qt
+from utils.profiling import traced
 
 class ResultsTab(QWidget):
     def __init__(self):
@@ -50,6 +51,7 @@ class ResultsTab(QWidget):
 
         layout.addWidget(splitter)
 
+    @traced()
     def display_results(self, results, plans):
         """Display results dictionary."""
         profit = results['objective']
@@ -0,0 +1,184 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from models.instance import PricingInstance
+
+
+class _InstanceTableModel(QAbstractTableModel):
+    """Base class for table models that view a shared PricingInstance."""
+
+    HEADERS = []
+
+    def __init__(self, instance=None):
+        super().__init__()
+        self.instance = instance if instance is not None else PricingInstance.empty()
+
+    def set_instance(self, instance):
+        self.beginResetModel()
+        self.instance = instance
+        self.endResetModel()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    @staticmethod
+    def _to_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+
+class PlansTableModel(_InstanceTableModel):
+    HEADERS = ["ID", "Name", "Data (GB)", "Cost ($)"]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.instance.n_plans
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        r, c = index.row(), index.column()
+        if c == 0:
+            return str(self.instance.plan_ids[r])
+        if c == 1:
+            return str(self.instance.plan_names[r])
+        if c == 2:
+            return str(self.instance.data_limit[r])
+        return str(self.instance.cost[r])
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        r, c = index.row(), index.column()
+        if c == 0:
+            self.instance.plan_ids[r] = str(value)
+        elif c == 1:
+            self.instance.plan_names[r] = str(value)
+        else:
+            val = self._to_float(value)
+            if val is None:
+                return False # Reject invalid numbers, keep previous value
+            if c == 2:
+                self.instance.data_limit[r] = val
+            else:
+                self.instance.cost[r] = val
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def add_plan(self, plan_id, name, data_limit, cost):
+        row = self.instance.n_plans
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.instance.add_plan(plan_id, name, data_limit, cost)
+        self.endInsertRows()
+
+    def remove_plan(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.instance.remove_plan(row)
+        self.endRemoveRows()
+
+
+class SegmentsTableModel(_InstanceTableModel):
+    HEADERS = ["ID", "Name", "Population"]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.instance.n_segments
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        r, c = index.row(), index.column()
+        if c == 0:
+            return str(self.instance.segment_ids[r])
+        if c == 1:
+            return str(self.instance.segment_names[r])
+        return f"{self.instance.size[r]:g}"
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        r, c = index.row(), index.column()
+        if c == 0:
+            self.instance.segment_ids[r] = str(value)
+        elif c == 1:
+            self.instance.segment_names[r] = str(value)
+        else:
+            val = self._to_float(value)
+            if val is None:
+                return False
+            self.instance.size[r] = val
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def add_segment(self, segment_id, name, size):
+        row = self.instance.n_segments
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.instance.add_segment(segment_id, name, size)
+        self.endInsertRows()
+
+    def remove_segment(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.instance.remove_segment(row)
+        self.endRemoveRows()
+
+
+class DemandTableModel(_InstanceTableModel):
+    """Demand parameters (a, b) of one segment, one row per plan."""
+
+    HEADERS = ["Plan ID", "Intercept (a)", "Slope (b)"]
+
+    def __init__(self, instance=None):
+        super().__init__(instance)
+        self.segment_row = -1
+
+    def set_segment(self, row):
+        self.beginResetModel()
+        self.segment_row = row
+        self.endResetModel()
+
+    def set_instance(self, instance):
+        self.segment_row = -1
+        super().set_instance(instance)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.segment_row < 0:
+            return 0
+        return self.instance.n_plans
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 0:
+            # Plan ID is read-only in this view
+            return Qt.ItemFlag.ItemIsEnabled
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        r, c = index.row(), index.column()
+        if c == 0:
+            return str(self.instance.plan_ids[r])
+        matrix = self.instance.a if c == 1 else self.instance.b
+        return f"{matrix[self.segment_row, r]:g}"
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() == 0:
+            return False
+        val = self._to_float(value)
+        if val is None:
+            val = 0.0
+        matrix = self.instance.a if index.column() == 1 else self.instance.b
+        matrix[self.segment_row, index.row()] = val
+        self.dataChanged.emit(index, index, [role])
+        return True